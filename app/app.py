@@ -1,11 +1,18 @@
+import contextlib
 import reflex as rx
+from app.audit import audit_writer, mark_interrupted_runs
+from app.database import init_db
 from app.pages.index import index
 from app.pages.login import login_page
 from app.pages.admin import admin_page
 from app.pages.permissions import permissions_page
+from app.pages.logs import logs_page
+from app.pages.stats import stats_page
 from app.state import AppState
 from app.states.admin_state import AdminState
 from app.states.permissions_state import PermissionsState
+from app.states.logs_state import LogsState
+from app.states.stats_state import StatsState
 from app.pages.profile import profile_page
 
 app = rx.App(
@@ -19,6 +26,18 @@ app = rx.App(
         ),
     ],
 )
+
+
+@contextlib.asynccontextmanager
+async def database_lifespan():
+    """Prepara la base al arrancar y cierra el historial de ejecuciones al salir."""
+    if init_db():
+        mark_interrupted_runs()
+    yield
+    audit_writer.shutdown()
+
+
+app.register_lifespan_task(database_lifespan)
 app.add_page(login_page, route="/")
 app.add_page(index, route="/home", on_load=AppState.on_load)
 app.add_page(profile_page, route="/profile")
@@ -27,4 +46,14 @@ app.add_page(
     permissions_page,
     route="/admin/permissions",
     on_load=PermissionsState.on_load_permissions,
-)
\ No newline at end of file
+)
+app.add_page(
+    logs_page,
+    route="/logs",
+    on_load=[AppState.on_load, LogsState.on_load_logs],
+)
+app.add_page(
+    stats_page,
+    route="/admin/stats",
+    on_load=[AppState.on_load, StatsState.on_load_stats],
+)
@@ -0,0 +1,298 @@
+"""
+Registro de ejecuciones (tabla `executions`) fuera del camino de ejecución.
+
+`run_tool` sólo encola eventos en memoria; un hilo propio los vuelca a la base
+en lotes (un INSERT masivo para los inicios y un UPDATE por lote para los
+finales) cada AUDIT_FLUSH_SECONDS o cuando se juntan AUDIT_BATCH_SIZE eventos.
+Si la base no responde, los eventos se reintentan en el siguiente ciclo.
+
+Cada fila guarda el worker ("host:pid") que lanzó la ejecución. Al arrancar,
+`mark_interrupted_runs` marca como "interrupted" las filas que quedaron en
+"running" de workers de este host que ya no existen.
+"""
+
+import atexit
+import datetime
+import logging
+import os
+import queue
+import socket
+import threading
+from typing import Any
+
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.database import engine
+from app.models import Execution, User
+
+AUDIT_FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", "2"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+AUDIT_MAX_PENDING = int(os.getenv("AUDIT_MAX_PENDING", "10000"))
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_FINISH_COLUMNS = (
+    "status",
+    "finished_at",
+    "exit_code",
+    "duration_seconds",
+    "cpu_seconds",
+    "peak_rss_kb",
+    "output_bytes",
+)
+
+
+class AuditWriter:
+    """Cola de eventos de ejecución que un hilo de fondo escribe en lotes."""
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue()
+        self._active: set[str] = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.RLock()
+        self._pending_starts: dict[str, dict[str, Any]] = {}
+        self._pending_finishes: dict[str, dict[str, Any]] = {}
+        self._thread: threading.Thread | None = None
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name="audit-writer", daemon=True
+                )
+                self._thread.start()
+
+    def record_start(
+        self,
+        run_id: str,
+        user_id: int | None,
+        username: str,
+        relpath: str,
+        script_hash: str | None = None,
+    ) -> None:
+        """Encola el inicio de una ejecución (no bloquea ni toca la base)."""
+        with self._lock:
+            self._active.add(run_id)
+        self._queue.put(
+            (
+                "start",
+                {
+                    "run_id": run_id,
+                    "user_id": user_id,
+                    "username": username,
+                    "script_relpath": relpath,
+                    "script_hash": script_hash,
+                    "status": "running",
+                    "started_at": datetime.datetime.utcnow(),
+                    "worker": WORKER_ID,
+                    **dict.fromkeys(_FINISH_COLUMNS[1:]),
+                },
+            )
+        )
+        self._ensure_thread()
+
+    def record_finish(
+        self,
+        run_id: str,
+        status: str,
+        exit_code: int | None = None,
+        duration_seconds: float | None = None,
+        cpu_seconds: float | None = None,
+        peak_rss_kb: int | None = None,
+        output_bytes: int | None = None,
+    ) -> None:
+        """Encola el resultado de una ejecución iniciada con `record_start`."""
+        with self._lock:
+            if run_id not in self._active:
+                return
+            self._active.discard(run_id)
+        self._queue.put(
+            (
+                "finish",
+                {
+                    "run_id": run_id,
+                    "status": status,
+                    "finished_at": datetime.datetime.utcnow(),
+                    "exit_code": exit_code,
+                    "duration_seconds": duration_seconds,
+                    "cpu_seconds": cpu_seconds,
+                    "peak_rss_kb": peak_rss_kb,
+                    "output_bytes": output_bytes,
+                },
+            )
+        )
+        self._ensure_thread()
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                kind, row = self._queue.get(timeout=AUDIT_FLUSH_SECONDS)
+            except queue.Empty:
+                self.flush()
+                continue
+            self._collect(kind, row)
+            if self._queue.qsize() + len(self._pending_starts) >= AUDIT_BATCH_SIZE:
+                self.flush()
+
+    def _collect(self, kind: str, row: dict[str, Any]) -> None:
+        with self._flush_lock:
+            if kind == "start":
+                self._pending_starts[row["run_id"]] = row
+            elif row["run_id"] in self._pending_starts:
+                # Inicio y final en el mismo lote: se inserta la fila ya cerrada.
+                self._pending_starts[row["run_id"]].update(row)
+            else:
+                self._pending_finishes[row["run_id"]] = row
+
+    def flush(self) -> None:
+        """Escribe en la base todos los eventos encolados hasta ahora."""
+        with self._flush_lock:
+            while True:
+                try:
+                    kind, row = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._collect(kind, row)
+            if not self._pending_starts and not self._pending_finishes:
+                return
+            starts = list(self._pending_starts.values())
+            finishes = list(self._pending_finishes.values())
+            try:
+                with engine.begin() as conn:
+                    _clear_deleted_users(conn, starts)
+                    _write(conn, starts, finishes)
+            except IntegrityError as e:
+                logging.warning(f"Execution batch rejected ({e}); retrying row by row")
+                self._flush_row_by_row(starts, finishes)
+                return
+            except Exception as e:
+                logging.warning(
+                    f"Could not write {len(starts) + len(finishes)} execution records: {e}"
+                )
+                self._drop_overflow()
+                return
+            self._pending_starts.clear()
+            self._pending_finishes.clear()
+
+    def _flush_row_by_row(
+        self, starts: list[dict[str, Any]], finishes: list[dict[str, Any]]
+    ) -> None:
+        """
+        Escribe cada evento en su propia transacción: las filas que la base
+        rechaza se descartan (y se loguean) sin frenar a las demás. Si la base
+        deja de responder, lo que falta queda pendiente para el próximo ciclo.
+        """
+        for pending, row, batch in [
+            *((self._pending_starts, row, ([row], [])) for row in starts),
+            *((self._pending_finishes, row, ([], [row])) for row in finishes),
+        ]:
+            try:
+                with engine.begin() as conn:
+                    _clear_deleted_users(conn, batch[0])
+                    _write(conn, *batch)
+            except IntegrityError as e:
+                logging.error(f"Dropping execution record {row['run_id']}: {e}")
+            except Exception as e:
+                logging.warning(f"Could not write execution records: {e}")
+                self._drop_overflow()
+                return
+            del pending[row["run_id"]]
+
+    def _drop_overflow(self) -> None:
+        """Con la base caída, limita lo que se retiene en memoria."""
+        overflow = (
+            len(self._pending_starts) + len(self._pending_finishes) - AUDIT_MAX_PENDING
+        )
+        if overflow <= 0:
+            return
+        logging.error(f"Dropping {overflow} execution records (database unavailable)")
+        for pending in (self._pending_finishes, self._pending_starts):
+            for run_id in list(pending)[:overflow]:
+                del pending[run_id]
+                overflow -= 1
+
+    def shutdown(self) -> None:
+        """Marca como interrumpidas las ejecuciones en curso y vacía la cola."""
+        with self._lock:
+            active = list(self._active)
+        for run_id in active:
+            self.record_finish(run_id, "interrupted")
+        self.flush()
+
+
+def _clear_deleted_users(conn, starts: list[dict[str, Any]]) -> None:
+    """
+    Pone en NULL el `user_id` de los usuarios borrados mientras la ejecución
+    esperaba en la cola, igual que haría el ON DELETE SET NULL de la FK.
+    """
+    user_ids = {row["user_id"] for row in starts if row["user_id"] is not None}
+    if not user_ids:
+        return
+    existing = set(conn.execute(select(User.id).where(User.id.in_(user_ids))).scalars())
+    for row in starts:
+        if row["user_id"] is not None and row["user_id"] not in existing:
+            row["user_id"] = None
+
+
+def _write(conn, starts: list[dict[str, Any]], finishes: list[dict[str, Any]]) -> None:
+    if starts:
+        conn.execute(insert(Execution), starts)
+    if finishes:
+        conn.execute(
+            update(Execution)
+            .where(Execution.run_id == bindparam("b_run_id"))
+            .values({col: bindparam(f"b_{col}") for col in _FINISH_COLUMNS}),
+            [{f"b_{key}": value for key, value in row.items()} for row in finishes],
+        )
+
+
+def mark_interrupted_runs() -> int:
+    """
+    Cierra como "interrupted" las ejecuciones que quedaron en "running" porque
+    su worker (de este host) terminó sin registrar el final.
+    """
+    host = socket.gethostname()
+    stale: list[str] = []
+    try:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(Execution.run_id, Execution.worker).where(
+                    Execution.status == "running",
+                    Execution.worker.like(f"{host}:%"),
+                )
+            ).all()
+            for run_id, worker in rows:
+                pid = int(worker.rsplit(":", 1)[1])
+                if pid != os.getpid() and _pid_alive(pid):
+                    continue
+                stale.append(run_id)
+            if stale:
+                conn.execute(
+                    update(Execution)
+                    .where(Execution.run_id.in_(stale))
+                    .values(
+                        status="interrupted", finished_at=datetime.datetime.utcnow()
+                    )
+                )
+    except Exception as e:
+        logging.warning(f"Could not mark interrupted executions: {e}")
+        return 0
+    if stale:
+        logging.warning(f"Marked {len(stale)} executions as interrupted")
+    return len(stale)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+audit_writer = AuditWriter()
+atexit.register(audit_writer.shutdown)
@@ -0,0 +1,83 @@
+from sqlalchemy import create_engine, event, insert, select
+
+from app import audit
+from app.models import Execution, User
+
+
+def _writer(monkeypatch) -> audit.AuditWriter:
+    """Writer sin hilo de fondo: el test decide cuándo se vuelca."""
+    writer = audit.AuditWriter()
+    monkeypatch.setattr(writer, "_ensure_thread", lambda: None)
+    return writer
+
+
+def _rows(db) -> dict[str, tuple]:
+    with db.connect() as conn:
+        rows = conn.execute(
+            select(Execution.run_id, Execution.user_id, Execution.status)
+        ).all()
+    return {row.run_id: (row.user_id, row.status) for row in rows}
+
+
+def _record_statements(db) -> list[str]:
+    statements: list[str] = []
+    event.listen(
+        db,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement.split()[0]),
+    )
+    return statements
+
+
+def test_batches_starts_and_finishes(db, monkeypatch):
+    writer = _writer(monkeypatch)
+    for i in range(50):
+        writer.record_start(f"run{i}", None, "ana", "a.py")
+    writer.record_finish("run0", "ok", exit_code=0)
+    statements = _record_statements(db)
+    writer.flush()
+    assert statements.count("INSERT") == 1
+    assert statements.count("UPDATE") == 0
+    for i in range(1, 50):
+        writer.record_finish(f"run{i}", "failed", exit_code=1)
+    writer.flush()
+    assert statements.count("UPDATE") == 1
+    rows = _rows(db)
+    assert rows["run0"] == (None, "ok")
+    assert {rows[f"run{i}"][1] for i in range(1, 50)} == {"failed"}
+
+
+def test_rejected_row_does_not_drop_the_batch(db, monkeypatch):
+    with db.begin() as conn:
+        conn.execute(insert(User), {"id": 1, "username": "ana", "password_hash": "x"})
+        conn.execute(
+            insert(Execution),
+            {"run_id": "dup", "script_relpath": "a.py", "status": "ok"},
+        )
+    writer = _writer(monkeypatch)
+    writer.record_start("good1", 1, "ana", "a.py")
+    writer.record_start("dup", 1, "ana", "a.py")
+    writer.record_start("good2", 7, "borrado", "a.py")
+    writer.flush()
+    rows = _rows(db)
+    # El usuario 7 ya no existe: se guarda como lo haría ON DELETE SET NULL.
+    assert rows == {
+        "dup": (None, "ok"),
+        "good1": (1, "running"),
+        "good2": (None, "running"),
+    }
+    assert not writer._pending_starts and not writer._pending_finishes
+
+
+def test_keeps_events_while_the_database_is_down(db, tmp_path, monkeypatch):
+    writer = _writer(monkeypatch)
+    monkeypatch.setattr(
+        audit, "engine", create_engine(f"sqlite:///{tmp_path}/missing/x.db")
+    )
+    writer.record_start("run1", None, "ana", "a.py")
+    writer.record_finish("run1", "ok")
+    writer.flush()
+    assert "run1" in writer._pending_starts
+    monkeypatch.setattr(audit, "engine", db)
+    writer.flush()
+    assert _rows(db) == {"run1": (None, "ok")}
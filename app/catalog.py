@@ -0,0 +1,87 @@
+import collections
+import os
+import threading
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping
+from . import utils
+
+CATALOG_KEEP_VERSIONS = int(os.getenv("CATALOG_KEEP_VERSIONS", "4"))
+
+_catalog_lock = threading.Lock()
+_catalogs: collections.OrderedDict[tuple[str, int], "Catalog"] = (
+    collections.OrderedDict()
+)
+
+
+class Catalog:
+    """
+    Snapshot inmutable de las herramientas descubiertas, compartido por todas
+    las sesiones del proceso. Las sesiones guardan sólo `version` y las rutas
+    que pueden ver; los datos de cada herramienta se leen de aquí.
+
+    Las herramientas quedan ordenadas por grupo (y dentro de cada grupo en el
+    orden del descubrimiento), que es el orden en que se muestran.
+    """
+
+    __slots__ = ("version", "tools", "positions", "groups", "file_keys")
+
+    def __init__(
+        self,
+        version: int,
+        tools: Iterable[dict[str, Any]],
+        file_keys: Mapping[str, tuple[int, int]] | None = None,
+    ):
+        self.version = version
+        self.file_keys: Mapping[str, tuple[int, int]] = MappingProxyType(
+            dict(file_keys or {})
+        )
+        self.tools: tuple[Mapping[str, Any], ...] = tuple(
+            MappingProxyType(dict(tool))
+            for tool in sorted(tools, key=lambda t: t["group"])
+        )
+        self.positions: Mapping[str, int] = MappingProxyType(
+            {tool["relpath"]: i for i, tool in enumerate(self.tools)}
+        )
+        groups: dict[str, int] = {}
+        for tool in self.tools:
+            groups[tool["group"]] = groups.get(tool["group"], 0) + 1
+        self.groups: Mapping[str, int] = MappingProxyType(groups)
+
+    def __len__(self) -> int:
+        return len(self.tools)
+
+    def get(self, relpath: str) -> Mapping[str, Any] | None:
+        position = self.positions.get(relpath)
+        return None if position is None else self.tools[position]
+
+    def visible(self, allowed: Iterable[str]) -> list[str]:
+        """Rutas de `allowed` presentes en el catálogo, en orden de presentación."""
+        return sorted(
+            (relpath for relpath in allowed if relpath in self.positions),
+            key=self.positions.__getitem__,
+        )
+
+
+def current(root_path: str) -> Catalog:
+    """Catálogo del snapshot de descubrimiento vigente de `root_path`."""
+    version, tools, file_keys = utils.discovery_snapshot(root_path)
+    catalog = _catalogs.get((root_path, version))
+    if catalog is not None:
+        return catalog
+    with _catalog_lock:
+        catalog = _catalogs.get((root_path, version))
+        if catalog is None:
+            catalog = Catalog(version, tools, file_keys)
+            _catalogs[(root_path, version)] = catalog
+            while len(_catalogs) > CATALOG_KEEP_VERSIONS:
+                _catalogs.popitem(last=False)
+        return catalog
+
+
+def get(root_path: str, version: int) -> Catalog:
+    """
+    Catálogo de una versión concreta. Si ya se descartó (hubo más de
+    CATALOG_KEEP_VERSIONS cambios desde entonces) se devuelve el vigente.
+    """
+    catalog = _catalogs.get((root_path, version))
+    return catalog if catalog is not None else current(root_path)
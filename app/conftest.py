@@ -0,0 +1,23 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app import audit, database, stats
+from app.models import Base
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Base SQLite vacía para el test, en lugar de la de DATABASE_URL."""
+    engine = database.create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    for module in (database, audit, stats):
+        monkeypatch.setattr(module, "engine", engine)
+    monkeypatch.setattr(
+        database,
+        "SessionLocal",
+        sessionmaker(autocommit=False, autoflush=False, bind=engine),
+    )
+    monkeypatch.setattr(database, "_synced_digest", None)
+    database.invalidate_user_permissions()
+    yield engine
+    engine.dispose()
@@ -1,19 +1,42 @@
 import os
+import hashlib
+import asyncio
 import bcrypt
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from datetime import datetime
-from sqlalchemy import create_engine, event
+from sqlalchemy import (
+    create_engine,
+    delete,
+    event,
+    func,
+    insert,
+    inspect,
+    literal,
+    make_url,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 from typing import Generator
-from app.models import Base, User, Permission
+from app.models import Base, Execution, User, Permission, UserPermission
 
 DB_PATH = os.getenv("DB_PATH", "vec_tools.db")
-DATABASE_URL = f"sqlite:///{DB_PATH}"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DB_PATH}")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
 
 
-@event.listens_for(engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
     """Activa el modo WAL al conectar a la base de datos para mejor rendimiento."""
     cursor = dbapi_connection.cursor()
@@ -25,6 +48,37 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
         cursor.close()
 
 
+def create_db_engine(url: str = DATABASE_URL) -> Engine:
+    """
+    Crea el engine a partir de DATABASE_URL (por defecto SQLite en DB_PATH).
+
+    Con SQLite se mantienen las pragmas de WAL; con un servidor (MySQL/Postgres)
+    se usa un pool configurable con DB_POOL_SIZE, DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE, DB_POOL_TIMEOUT y DB_POOL_PRE_PING. Una URL `mysql://` sin
+    driver usa pymysql, que es el que está en requirements.txt.
+    """
+    db_url = make_url(url)
+    if db_url.get_backend_name() == "sqlite":
+        sqlite_engine = create_engine(
+            db_url, connect_args={"check_same_thread": False}
+        )
+        event.listen(sqlite_engine, "connect", set_sqlite_pragma)
+        return sqlite_engine
+    if db_url.drivername == "mysql":
+        db_url = db_url.set(drivername="mysql+pymysql")
+    return create_engine(
+        db_url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
+
+engine = create_db_engine()
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -55,13 +109,120 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     )
 
 
-def init_db():
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "4"))
+_hash_executor = ThreadPoolExecutor(
+    max_workers=HASH_WORKERS, thread_name_prefix="password-hash"
+)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Igual que `hash_password`, pero en el pool de hashing para no bloquear el
+    event loop (bcrypt libera el GIL mientras calcula).
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Igual que `verify_password`, pero en el pool de hashing."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor, verify_password, plain_password, hashed_password
+    )
+
+
+def _add_missing_columns(inspector) -> None:
+    """
+    Agrega a tablas existentes las columnas nuevas que lo permiten: las que
+    aceptan NULL o tienen default del servidor.
+    """
+    for table in Base.metadata.sorted_tables:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if column.server_default is None and not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            default = ""
+            if column.server_default is not None:
+                default = column.server_default.arg
+                if hasattr(default, "compile"):
+                    default = default.compile(dialect=engine.dialect)
+                default = f" DEFAULT {default}"
+            not_null = "" if column.nullable else " NOT NULL"
+            with engine.begin() as conn:
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+                        f"{column_type}{not_null}{default}"
+                    )
+                )
+            logging.info(f"Added column {table.name}.{column.name}.")
+
+
+def _create_user_permissions_unique_index(inspector) -> None:
+    unique_index = next(
+        index
+        for index in UserPermission.__table__.indexes
+        if index.name == "ux_user_permissions_user_permission"
+    )
+    existing = {ix["name"] for ix in inspector.get_indexes("user_permissions")}
+    if unique_index.name in existing:
+        return
+    with engine.begin() as conn:
+        first_ids = (
+            select(func.min(UserPermission.id).label("id"))
+            .group_by(UserPermission.user_id, UserPermission.permission_id)
+            .subquery()
+        )
+        keep = select(first_ids.c.id)
+        duplicates = conn.execute(
+            delete(UserPermission).where(UserPermission.id.not_in(keep))
+        ).rowcount
+        if duplicates:
+            logging.warning(f"Removed {duplicates} duplicated user permissions.")
+        unique_index.create(bind=conn)
+    logging.info(f"Created index {unique_index.name}.")
+
+
+def _create_missing_indexes(inspector, table) -> None:
+    """Crea en una tabla existente los índices declarados que todavía no tiene."""
+    existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name in existing:
+            continue
+        with engine.begin() as conn:
+            index.create(bind=conn)
+        logging.info(f"Created index {index.name}.")
+
+
+def _migrate_schema():
+    """
+    Lleva bases creadas con versiones anteriores al esquema actual.
+    `create_all` no modifica tablas existentes, así que las columnas e índices
+    nuevos se crean aquí (de forma idempotente).
+    """
+    inspector = inspect(engine)
+    _add_missing_columns(inspector)
+    _create_user_permissions_unique_index(inspector)
+    _create_missing_indexes(inspector, Execution.__table__)
+
+
+_db_init_lock = threading.Lock()
+_db_ready = False
+
+
+def init_db() -> bool:
     """
     Crea todas las tablas en la base de datos y un usuario administrador
-    inicial si no existe ninguno.
+    inicial si no existe ninguno. Devuelve True si la base quedó operativa.
     """
+    global _db_ready
     try:
         Base.metadata.create_all(bind=engine)
+        _migrate_schema()
         with get_session() as db:
             admin_user_exists = db.query(User).filter(User.is_admin == True).first()
             if not admin_user_exists:
@@ -82,20 +243,236 @@ def init_db():
                 logging.warning(
                     f"Admin user '{admin_username}' created. Please change the default password."
                 )
+        _db_ready = True
     except Exception as e:
         logging.exception(f"An error occurred during DB initialization: {e}")
+        _db_ready = False
+    return _db_ready
+
+
+def ensure_db() -> bool:
+    """
+    Inicializa la base de datos una única vez por proceso. Normalmente ya lo hizo
+    la tarea de arranque de la app; en ese caso sólo se consulta el flag.
+    Si la inicialización falló se reintenta en la siguiente llamada.
+    """
+    if _db_ready:
+        return True
+    with _db_init_lock:
+        if _db_ready:
+            return True
+        return init_db()
+
+
+_SYNC_CHUNK = 500
+_synced_digest: str | None = None
+_sync_lock = threading.Lock()
+
+
+def _insert_ignoring_duplicates(table):
+    """INSERT que ignora filas que violan una clave única, según el dialecto."""
+    if engine.dialect.name == "sqlite":
+        return sqlite_insert(table).on_conflict_do_nothing()
+    if engine.dialect.name == "postgresql":
+        return postgresql_insert(table).on_conflict_do_nothing()
+    return insert(table).prefix_with("IGNORE")
+
+
+def _set_orphaned(db: Session, ids: list[int], orphaned: bool) -> None:
+    for i in range(0, len(ids), _SYNC_CHUNK):
+        db.execute(
+            update(Permission)
+            .where(Permission.id.in_(ids[i : i + _SYNC_CHUNK]))
+            .values(orphaned=orphaned)
+        )
 
 
 def sync_permissions(discovered_tools: list[dict]):
-    """Syncs discovered script relpaths with the Permission table."""
-    with get_session() as db:
-        existing_permissions = {p.script_relpath for p in db.query(Permission).all()}
-        discovered_relpaths = {tool["relpath"] for tool in discovered_tools}
-        new_relpaths = discovered_relpaths - existing_permissions
-        if new_relpaths:
+    """
+    Syncs discovered script relpaths with the Permission table.
+
+    Si el conjunto de relpaths no cambió desde la última sincronización del
+    proceso no se consulta la base. Si cambió, los nuevos se insertan en bloque
+    ignorando los existentes y los permisos de scripts que ya no existen se
+    marcan como huérfanos (y se desmarcan si el script vuelve). La diferencia
+    se calcula en Python y se actualiza por id en bloques de _SYNC_CHUNK, para
+    no pasar todas las rutas como parámetros de una sola consulta.
+
+    Un descubrimiento vacío con permisos ya cargados se toma como una falla
+    (directorio no montado o ilegible) y no se sincroniza: si no, todos los
+    permisos quedarían huérfanos.
+    """
+    global _synced_digest
+    relpaths = sorted({tool["relpath"] for tool in discovered_tools})
+    digest = hashlib.sha1("\n".join(relpaths).encode("utf-8")).hexdigest()
+    if digest == _synced_digest:
+        return
+    with _sync_lock:
+        if digest == _synced_digest:
+            return
+        with get_session() as db:
+            if not relpaths:
+                if db.execute(select(Permission.id).limit(1)).first() is not None:
+                    logging.warning(
+                        "Permissions sync skipped: no scripts discovered."
+                    )
+                    return
+            statement = _insert_ignoring_duplicates(Permission.__table__)
+            for i in range(0, len(relpaths), _SYNC_CHUNK):
+                db.execute(
+                    statement,
+                    [
+                        {"script_relpath": relpath, "orphaned": False}
+                        for relpath in relpaths[i : i + _SYNC_CHUNK]
+                    ],
+                )
+            current = set(relpaths)
+            to_orphan = []
+            to_restore = []
+            for permission_id, relpath, orphaned in db.execute(
+                select(Permission.id, Permission.script_relpath, Permission.orphaned)
+            ):
+                if relpath in current:
+                    if orphaned:
+                        to_restore.append(permission_id)
+                elif not orphaned:
+                    to_orphan.append(permission_id)
+            _set_orphaned(db, to_orphan, True)
+            _set_orphaned(db, to_restore, False)
+            db.commit()
+        if to_orphan or to_restore:
             logging.info(
-                f"Found {len(new_relpaths)} new scripts to add to permissions table."
+                f"Permissions sync: {len(to_orphan)} orphaned, "
+                f"{len(to_restore)} restored."
+            )
+        _synced_digest = digest
+
+
+PERMISSION_CACHE_TTL = float(os.getenv("PERMISSION_CACHE_TTL", "60"))
+_permission_cache: dict[int, tuple[float, frozenset[str]]] = {}
+_permission_cache_lock = threading.Lock()
+# Se incrementan al invalidar: una consulta que empezó antes no guarda su
+# resultado (ya viejo) en la caché.
+_permission_generations: dict[int, int] = {}
+_permission_generation_all = 0
+
+
+def get_user_relpaths(user_id: int) -> frozenset[str]:
+    """
+    Scripts que `user_id` puede ejecutar, desde una caché compartida por todas
+    las sesiones del proceso. Las entradas se invalidan al cambiar los permisos
+    del usuario y, como red de seguridad entre workers, vencen a los
+    PERMISSION_CACHE_TTL segundos.
+    """
+    now = time.monotonic()
+    cached = _permission_cache.get(user_id)
+    if cached is not None and now - cached[0] < PERMISSION_CACHE_TTL:
+        return cached[1]
+    with _permission_cache_lock:
+        generation = (
+            _permission_generation_all,
+            _permission_generations.get(user_id, 0),
+        )
+    with get_session() as db:
+        relpaths = frozenset(
+            relpath
+            for (relpath,) in db.query(Permission.script_relpath)
+            .join(UserPermission, UserPermission.permission_id == Permission.id)
+            .filter(UserPermission.user_id == user_id)
+        )
+    with _permission_cache_lock:
+        if generation == (
+            _permission_generation_all,
+            _permission_generations.get(user_id, 0),
+        ):
+            _permission_cache[user_id] = (now, relpaths)
+    return relpaths
+
+
+def invalidate_user_permissions(user_id: int | None = None) -> None:
+    """Descarta los permisos cacheados de `user_id` (o de todos los usuarios)."""
+    global _permission_generation_all
+    with _permission_cache_lock:
+        if user_id is None:
+            _permission_generation_all += 1
+            _permission_cache.clear()
+        else:
+            _permission_generations[user_id] = (
+                _permission_generations.get(user_id, 0) + 1
+            )
+            _permission_cache.pop(user_id, None)
+
+
+def apply_permission_changes(
+    user_id: int, grant_ids: list[int], revoke_ids: list[int]
+) -> tuple[int, int]:
+    """
+    Concede y revoca permisos de un usuario en una sola transacción, con
+    sentencias por conjunto (INSERT ... SELECT y DELETE ... IN) en vez de una
+    fila y un commit por permiso. Devuelve (concedidos, revocados).
+    """
+    granted = revoked = 0
+    with get_session() as db:
+        if revoke_ids:
+            revoked = db.execute(
+                delete(UserPermission).where(
+                    UserPermission.user_id == user_id,
+                    UserPermission.permission_id.in_(revoke_ids),
+                )
+            ).rowcount
+        if grant_ids:
+            already_granted = (
+                select(UserPermission.id)
+                .where(
+                    UserPermission.user_id == user_id,
+                    UserPermission.permission_id == Permission.id,
+                )
+                .exists()
+            )
+            granted = db.execute(
+                insert(UserPermission).from_select(
+                    ["user_id", "permission_id", "granted_at"],
+                    select(
+                        literal(user_id), Permission.id, literal(datetime.utcnow())
+                    ).where(Permission.id.in_(grant_ids), ~already_granted),
+                )
+            ).rowcount
+        db.commit()
+    invalidate_user_permissions(user_id)
+    return granted, revoked
+
+
+def copy_permissions(source_user_id: int, target_user_id: int) -> tuple[int, int]:
+    """
+    Reemplaza los permisos de `target_user_id` por los de `source_user_id` en una
+    sola transacción. Devuelve (concedidos, revocados).
+    """
+    source_ids = select(UserPermission.permission_id).where(
+        UserPermission.user_id == source_user_id
+    )
+    with get_session() as db:
+        revoked = db.execute(
+            delete(UserPermission).where(
+                UserPermission.user_id == target_user_id,
+                UserPermission.permission_id.not_in(source_ids),
+            )
+        ).rowcount
+        already_granted = (
+            select(UserPermission.id)
+            .where(
+                UserPermission.user_id == target_user_id,
+                UserPermission.permission_id == Permission.id,
+            )
+            .exists()
+        )
+        granted = db.execute(
+            insert(UserPermission).from_select(
+                ["user_id", "permission_id", "granted_at"],
+                select(
+                    literal(target_user_id), Permission.id, literal(datetime.utcnow())
+                ).where(Permission.id.in_(source_ids), ~already_granted),
             )
-            for relpath in new_relpaths:
-                db.add(Permission(script_relpath=relpath))
-            db.commit()
\ No newline at end of file
+        ).rowcount
+        db.commit()
+    invalidate_user_permissions(target_user_id)
+    return granted, revoked
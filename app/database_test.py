@@ -0,0 +1,98 @@
+import contextlib
+
+from app import database
+from app.models import Permission, User, UserPermission
+
+
+def _user_with_permission(relpath: str) -> tuple[int, int]:
+    with database.get_session() as session:
+        user = User(username="ana", password_hash="x")
+        permission = Permission(script_relpath=relpath)
+        session.add_all([user, permission])
+        session.flush()
+        session.add(UserPermission(user_id=user.id, permission_id=permission.id))
+        session.commit()
+        return user.id, permission.id
+
+
+def test_revoke_during_a_lookup_is_not_cached_over(db, monkeypatch):
+    user_id, permission_id = _user_with_permission("g/a.py")
+    real_session = database.get_session
+    revoked = False
+
+    @contextlib.contextmanager
+    def session_then_revoke():
+        # La consulta de la búsqueda ya leyó el permiso; el admin lo revoca
+        # antes de que el resultado se guarde en la caché.
+        nonlocal revoked
+        with real_session() as session:
+            yield session
+        if not revoked:
+            revoked = True
+            database.apply_permission_changes(user_id, [], [permission_id])
+
+    monkeypatch.setattr(database, "get_session", session_then_revoke)
+    assert database.get_user_relpaths(user_id) == {"g/a.py"}
+    assert revoked
+    assert database.get_user_relpaths(user_id) == frozenset()
+
+
+def test_cached_permissions_follow_grants_and_revokes(db):
+    user_id, permission_id = _user_with_permission("g/a.py")
+    assert database.get_user_relpaths(user_id) == {"g/a.py"}
+    database.apply_permission_changes(user_id, [], [permission_id])
+    assert database.get_user_relpaths(user_id) == frozenset()
+    database.apply_permission_changes(user_id, [permission_id], [])
+    assert database.get_user_relpaths(user_id) == {"g/a.py"}
+
+
+def _permissions() -> dict[str, bool]:
+    with database.get_session() as session:
+        return {
+            p.script_relpath: p.orphaned for p in session.query(Permission).all()
+        }
+
+
+def _tools(*relpaths: str) -> list[dict]:
+    return [{"relpath": relpath} for relpath in relpaths]
+
+
+def test_sync_orphans_and_restores_permissions(db, monkeypatch):
+    monkeypatch.setattr(database, "_SYNC_CHUNK", 2)
+    database.sync_permissions(_tools("g/a.py", "g/b.py", "g/c.py"))
+    assert _permissions() == {"g/a.py": False, "g/b.py": False, "g/c.py": False}
+    with database.get_session() as session:
+        user = User(username="ana", password_hash="x")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+    with database.get_session() as session:
+        a_id = (
+            session.query(Permission.id)
+            .filter(Permission.script_relpath == "g/a.py")
+            .scalar()
+        )
+    database.apply_permission_changes(user_id, [a_id], [])
+
+    database.sync_permissions(_tools("g/b.py", "g/c.py", "g/d.py"))
+    assert _permissions() == {
+        "g/a.py": True,
+        "g/b.py": False,
+        "g/c.py": False,
+        "g/d.py": False,
+    }
+    # El script vuelve: el permiso se desmarca y el usuario lo conserva.
+    database.sync_permissions(_tools("g/a.py", "g/b.py"))
+    assert _permissions() == {
+        "g/a.py": False,
+        "g/b.py": False,
+        "g/c.py": True,
+        "g/d.py": True,
+    }
+    assert database.get_user_relpaths(user_id) == {"g/a.py"}
+
+
+def test_sync_skips_an_empty_discovery(db):
+    database.sync_permissions(_tools("g/a.py"))
+    database.sync_permissions([])
+    assert _permissions() == {"g/a.py": False}
@@ -0,0 +1,413 @@
+"""
+Ejecuciones como trabajos independientes de la sesión del navegador.
+
+`start_job` encola el script y lo corre en una tarea propia del proceso, no en
+la tarea de fondo de Reflex de quien lo pidió: cerrar la pestaña o recargar la
+página no lo detiene ni pierde el resultado. El estado del trabajo vive aquí
+(y en la tabla `executions`), la salida completa en RUN_LOGS_DIR y la vista
+final en el resumen que guarda `utils.save_run_summary`. Cualquier sesión del
+mismo usuario puede volver a engancharse con `snapshot` + `follow`.
+
+Los trabajos terminados se conservan en memoria JOB_RETENTION_SECONDS; pasado
+ese tiempo (o desde otro worker) se reconstruyen desde la base y el disco.
+
+Los scripts idempotentes pueden declarar en 'tools.json' "cache_ttl" (segundos)
+y "cache_scope" ("user" o "shared"): `cached_result` devuelve entonces la
+última ejecución correcta dentro del TTL para la misma versión del script
+(`utils.script_fingerprint`), sin volver a lanzarlo.
+"""
+
+import asyncio
+import datetime
+import logging
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator
+
+from sqlalchemy import or_, select
+
+from app import utils
+from app.audit import audit_writer
+from app.database import get_session
+from app.models import Execution
+from app.scheduler import scheduler
+
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+JOB_LIST_LIMIT = int(os.getenv("JOB_LIST_LIMIT", "10"))
+ACTIVE_STATUSES = ("queued", "running")
+
+_jobs: dict[str, dict[str, Any]] = {}
+
+
+def _empty_event(run_id: str, stderr: str = "") -> dict[str, Any]:
+    return {
+        "run_id": run_id,
+        "stdout": "",
+        "stderr": stderr,
+        "stdout_bytes": 0,
+        "stderr_bytes": 0,
+        "truncated": False,
+        "logged": False,
+        "done": False,
+        "ok": False,
+        "status": "queued",
+    }
+
+
+def _notify(job: dict[str, Any]) -> None:
+    job["version"] += 1
+    job["changed"].set()
+    job["changed"] = asyncio.Event()
+
+
+def _prune_jobs() -> None:
+    cutoff = time.monotonic() - JOB_RETENTION_SECONDS
+    for run_id, job in list(_jobs.items()):
+        if job["finished_at"] is not None and job["finished_at"] < cutoff:
+            del _jobs[run_id]
+
+
+def start_job(root: str, relpath: str, user_id: int | None, username: str) -> str:
+    """Encola una ejecución de `relpath` y devuelve su id (el `run_id`)."""
+    _prune_jobs()
+    run_id = uuid.uuid4().hex
+    job = {
+        "run_id": run_id,
+        "user_id": user_id,
+        "username": username,
+        "relpath": relpath,
+        "status": "queued",
+        "queue_position": 0,
+        "event": _empty_event(run_id),
+        "created_at": datetime.datetime.utcnow(),
+        "finished_at": None,
+        "cancel_requested": False,
+        "version": 0,
+        "changed": asyncio.Event(),
+    }
+    _jobs[run_id] = job
+    job["task"] = asyncio.create_task(_run_job(job, root), name=f"job-{run_id}")
+    return run_id
+
+
+async def _run_job(job: dict[str, Any], root: str) -> None:
+    run_id = job["run_id"]
+    tool = utils.get_tool(root, job["relpath"]) or {}
+    limits = utils.script_limits(tool)
+    ticket = scheduler.submit(
+        job["user_id"], job["relpath"], int(tool.get("max_concurrency", 0) or 0)
+    )
+    job["ticket"] = ticket
+    started = False
+    try:
+        # El scheduler despierta al ticket cada vez que cambia su posición.
+        while not scheduler.is_running(ticket):
+            position = scheduler.position(ticket)
+            if job["cancel_requested"] or not position:
+                job["queue_position"] = 0
+                job["event"] = {
+                    **_empty_event(run_id, "Ejecución cancelada antes de empezar."),
+                    "done": True,
+                    "status": "cancelled",
+                }
+                return
+            job["queue_position"] = position
+            _notify(job)
+            await scheduler.wait_change(ticket)
+        job["queue_position"] = 0
+        job["status"] = "running"
+        audit_writer.record_start(
+            run_id,
+            job["user_id"],
+            job["username"],
+            job["relpath"],
+            await asyncio.to_thread(utils.script_fingerprint, root, job["relpath"]),
+        )
+        started = True
+        _notify(job)
+        async for event in utils.stream_script(
+            root,
+            job["relpath"],
+            timeout=limits["timeout"],
+            run_id=run_id,
+            limits=limits,
+        ):
+            if job["cancel_requested"] and not event["done"]:
+                # Se pidió antes de que el proceso quedara registrado.
+                utils.cancel_run(run_id)
+            job["event"] = event
+            if event["done"]:
+                rusage = event["rusage"] or {}
+                audit_writer.record_finish(
+                    run_id,
+                    event["status"],
+                    exit_code=event["exit_code"],
+                    duration_seconds=event["duration_seconds"],
+                    cpu_seconds=(
+                        rusage["user_cpu"] + rusage["sys_cpu"] if rusage else None
+                    ),
+                    peak_rss_kb=rusage.get("max_rss_kb"),
+                    output_bytes=event["stdout_bytes"] + event["stderr_bytes"],
+                )
+                utils.save_run_summary(run_id, _summary(job, event))
+            else:
+                _notify(job)
+    except Exception as e:
+        logging.exception(f"Job {run_id} failed: {e}")
+        job["event"] = {
+            **job["event"],
+            "stderr": f"Error de ejecución inesperado: {str(e)}",
+            "done": True,
+            "status": "error",
+        }
+    finally:
+        scheduler.release(ticket)
+        if not job["event"]["done"]:
+            job["event"] = {**job["event"], "done": True, "status": "interrupted"}
+        if started:
+            # No-op si ya se registró el final.
+            audit_writer.record_finish(run_id, job["event"]["status"])
+        job["status"] = job["event"]["status"]
+        job["finished_at"] = time.monotonic()
+        _notify(job)
+
+
+def _summary(job: dict[str, Any], event: dict[str, Any]) -> dict[str, Any]:
+    return {
+        key: event[key]
+        for key in (
+            "stdout",
+            "stderr",
+            "stdout_bytes",
+            "stderr_bytes",
+            "truncated",
+            "logged",
+            "ok",
+            "status",
+        )
+    } | {"relpath": job["relpath"]}
+
+
+def _snapshot(job: dict[str, Any]) -> dict[str, Any]:
+    event = job["event"]
+    return {
+        "run_id": job["run_id"],
+        "relpath": job["relpath"],
+        "status": job["status"],
+        "queue_position": job["queue_position"],
+        "stdout": event["stdout"],
+        "stderr": event["stderr"],
+        "stdout_bytes": event["stdout_bytes"],
+        "stderr_bytes": event["stderr_bytes"],
+        "truncated": event["truncated"],
+        "logged": event["logged"],
+        "done": event["done"],
+        "ok": event["ok"],
+        "version": job["version"],
+    }
+
+
+def _owned(user_id: int | None, owner_id: int | None, is_admin: bool) -> bool:
+    return is_admin or (user_id is not None and user_id == owner_id)
+
+
+async def snapshot(
+    run_id: str, user_id: int | None, is_admin: bool = False
+) -> dict[str, Any] | None:
+    """
+    Estado actual de un trabajo para mostrarlo en el modal. Si ya no está en
+    memoria se arma con la fila de `executions` y el resumen guardado en disco,
+    leídos en un hilo aparte.
+    """
+    job = _jobs.get(run_id)
+    if job is not None:
+        return _snapshot(job) if _owned(user_id, job["user_id"], is_admin) else None
+    return await asyncio.to_thread(_stored_job, run_id, user_id, is_admin)
+
+
+def _stored_job(
+    run_id: str, user_id: int | None, is_admin: bool
+) -> dict[str, Any] | None:
+    with get_session() as db:
+        row = db.execute(
+            select(Execution).where(Execution.run_id == run_id)
+        ).scalar_one_or_none()
+        if row is None or not _owned(user_id, row.user_id, is_admin):
+            return None
+        relpath, status = row.script_relpath, row.status
+    summary = utils.load_run_summary(run_id) or {}
+    if status == "running":
+        summary["stderr"] = (
+            "La ejecución sigue en curso en otro servidor; "
+            "su salida estará aquí al terminar."
+        )
+    return _stored_snapshot(run_id, relpath, status, summary)
+
+
+def _stored_snapshot(
+    run_id: str, relpath: str, status: str, summary: dict[str, Any]
+) -> dict[str, Any]:
+    """Snapshot de un trabajo terminado armado con su resumen guardado en disco."""
+    return {
+        "run_id": run_id,
+        "relpath": relpath,
+        "status": status,
+        "queue_position": 0,
+        "stdout": summary.get("stdout", ""),
+        "stderr": summary.get("stderr", ""),
+        "stdout_bytes": summary.get("stdout_bytes", 0),
+        "stderr_bytes": summary.get("stderr_bytes", 0),
+        "truncated": summary.get("truncated", False),
+        "logged": summary.get("logged", False),
+        "done": True,
+        "ok": summary.get("ok", status == "ok"),
+        "version": 0,
+    }
+
+
+async def follow(run_id: str) -> AsyncIterator[dict[str, Any]]:
+    """Produce un snapshot cada vez que el trabajo cambia, hasta que termina."""
+    job = _jobs.get(run_id)
+    if job is None:
+        return
+    while True:
+        changed = job["changed"]
+        yield _snapshot(job)
+        if job["event"]["done"]:
+            return
+        await changed.wait()
+
+
+def cancel_job(run_id: str, user_id: int | None, is_admin: bool = False) -> bool:
+    """Cancela un trabajo en cola o en curso de este proceso."""
+    job = _jobs.get(run_id)
+    if job is None or job["event"]["done"]:
+        return False
+    if not _owned(user_id, job["user_id"], is_admin):
+        return False
+    job["cancel_requested"] = True
+    if "ticket" in job:
+        # Si todavía espera turno sale de la cola sin llegar a arrancar.
+        scheduler.withdraw(job["ticket"])
+    utils.cancel_run(run_id)
+    return True
+
+
+def cache_policy(tool: dict[str, Any] | None) -> tuple[int, str]:
+    """(TTL en segundos, alcance) de la caché de resultados; TTL 0 = sin caché."""
+    tool = tool or {}
+    try:
+        ttl = max(0, int(tool.get("cache_ttl", 0) or 0))
+    except (TypeError, ValueError):
+        logging.warning(f"Invalid 'cache_ttl' for {tool.get('relpath')} in tools.json")
+        ttl = 0
+    scope = "shared" if tool.get("cache_scope") == "shared" else "user"
+    return ttl, scope
+
+
+def cached_result(
+    root: str, relpath: str, user_id: int | None
+) -> dict[str, Any] | None:
+    """
+    Snapshot de la última ejecución correcta reutilizable para `relpath`, o
+    None si el script no es cacheable o no hay una vigente. Incluye
+    `cached_at` (UTC) con la hora en que terminó.
+    """
+    ttl, scope = cache_policy(utils.get_tool(root, relpath))
+    if not ttl:
+        return None
+    fingerprint = utils.script_fingerprint(root, relpath)
+    if fingerprint is None:
+        return None
+    since = datetime.datetime.utcnow() - datetime.timedelta(seconds=ttl)
+    query = (
+        select(Execution.run_id, Execution.finished_at)
+        .where(
+            Execution.script_relpath == relpath,
+            Execution.status == "ok",
+            Execution.script_hash == fingerprint,
+            Execution.finished_at >= since,
+        )
+        .order_by(Execution.finished_at.desc())
+        .limit(1)
+    )
+    if scope == "user":
+        query = query.where(Execution.user_id == user_id)
+    try:
+        with get_session() as db:
+            row = db.execute(query).first()
+    except Exception as e:
+        logging.warning(f"Could not look up cached result for {relpath}: {e}")
+        return None
+    if row is None:
+        return None
+    summary = utils.load_run_summary(row.run_id)
+    if summary is None:
+        return None
+    return _stored_snapshot(row.run_id, relpath, "ok", summary) | {
+        "cached_at": row.finished_at
+    }
+
+
+async def user_jobs(user_id: int | None) -> list[dict[str, Any]]:
+    """
+    Trabajos recientes del usuario, los activos primero: los de este proceso
+    desde memoria y el resto (otros workers, sesiones anteriores) desde la base,
+    consultada en un hilo aparte.
+
+    Los trabajos en cola sólo existen en la memoria del worker: no tienen fila
+    en `executions` hasta que arrancan, así que un reinicio los pierde.
+    """
+    if user_id is None:
+        return []
+    jobs: dict[str, dict[str, Any]] = {}
+    for run_id, relpath, status, started_at in await asyncio.to_thread(
+        _recent_rows, user_id
+    ):
+        jobs[run_id] = {
+            "run_id": run_id,
+            "relpath": relpath,
+            "status": status,
+            "started_at": started_at,
+        }
+    for job in _jobs.values():
+        if job["user_id"] == user_id:
+            jobs[job["run_id"]] = {
+                "run_id": job["run_id"],
+                "relpath": job["relpath"],
+                "status": job["status"],
+                "started_at": job["created_at"],
+            }
+    ordered = sorted(
+        jobs.values(),
+        key=lambda j: (
+            j["status"] not in ACTIVE_STATUSES,
+            -j["started_at"].timestamp(),
+        ),
+    )
+    return ordered[:JOB_LIST_LIMIT]
+
+
+def _recent_rows(user_id: int) -> list:
+    """Ejecuciones del último día (o todavía en curso) de `user_id` en la base."""
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=1)
+    try:
+        with get_session() as db:
+            return db.execute(
+                select(
+                    Execution.run_id,
+                    Execution.script_relpath,
+                    Execution.status,
+                    Execution.started_at,
+                )
+                .where(
+                    Execution.user_id == user_id,
+                    or_(Execution.status == "running", Execution.started_at >= since),
+                )
+                .order_by(Execution.started_at.desc())
+                .limit(JOB_LIST_LIMIT)
+            ).all()
+    except Exception as e:
+        logging.warning(f"Could not list jobs for user {user_id}: {e}")
+        return []
@@ -0,0 +1,171 @@
+"""
+Metadatos de los scripts (título, descripción e ícono) extraídos de su
+docstring de módulo y del bloque de comentarios del encabezado, sin importar
+el script. Se calculan en un pool de hilos a pedido y se cachean por
+(ruta, mtime, tamaño); mientras no están listos las tarjetas muestran lo que
+venga de tools.json.
+"""
+
+import ast
+import concurrent.futures
+import io
+import logging
+import os
+import re
+import threading
+import tokenize
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterable, Mapping
+
+METADATA_WORKERS = int(os.getenv("METADATA_WORKERS", "4"))
+METADATA_MAX_BYTES = int(os.getenv("METADATA_MAX_BYTES", str(16 * 1024)))
+METADATA_DESC_CHARS = 200
+METADATA_FIELDS = ("title", "desc", "icon")
+
+_HEADER_KEYS = {
+    "title": "title",
+    "titulo": "title",
+    "título": "title",
+    "desc": "desc",
+    "description": "desc",
+    "descripcion": "desc",
+    "descripción": "desc",
+    "icon": "icon",
+    "icono": "icon",
+}
+_HEADER_RE = re.compile(r"^#\s*([\wáéíóú]+)\s*:\s*(.+?)\s*$", re.IGNORECASE)
+_SKIP_COMMENT_RE = re.compile(r"^#!|^#.*coding[:=]|^#\s*-\*-")
+
+_metadata_executor = ThreadPoolExecutor(
+    max_workers=METADATA_WORKERS, thread_name_prefix="script-metadata"
+)
+_metadata_lock = threading.Lock()
+_metadata_cache: dict[str, tuple[tuple[int, int], dict[str, str]]] = {}
+_pending: dict[str, Future] = {}
+_generation = 0
+
+
+def _shorten(text: str) -> str:
+    text = " ".join(text.split())
+    if len(text) <= METADATA_DESC_CHARS:
+        return text
+    return text[: METADATA_DESC_CHARS - 1].rstrip() + "…"
+
+
+def parse_script_metadata(source: bytes) -> dict[str, str]:
+    """
+    Lee el encabezado de un script con `tokenize`: los comentarios anteriores
+    al primer statement y el docstring del módulo. Los comentarios
+    "# Título: …", "# Descripción: …" e "# Icono: …" (o en inglés) fijan ese
+    campo; si no hay descripción explícita se usa el primer párrafo del
+    docstring o, en su defecto, el resto de los comentarios.
+    """
+    fields: dict[str, str] = {}
+    comments: list[str] = []
+    docstring = ""
+    try:
+        readline = io.BytesIO(source[:METADATA_MAX_BYTES]).readline
+        for token in tokenize.tokenize(readline):
+            if token.type in (tokenize.ENCODING, tokenize.NL, tokenize.NEWLINE):
+                continue
+            if token.type == tokenize.COMMENT:
+                if _SKIP_COMMENT_RE.match(token.string):
+                    continue
+                match = _HEADER_RE.match(token.string)
+                key = match and _HEADER_KEYS.get(match.group(1).lower())
+                if key:
+                    fields.setdefault(key, match.group(2))
+                else:
+                    comments.append(token.string.lstrip("#").strip())
+                continue
+            if token.type == tokenize.STRING:
+                try:
+                    value = ast.literal_eval(token.string)
+                except (ValueError, SyntaxError):
+                    value = None
+                if isinstance(value, str):
+                    docstring = value
+            break
+    except (tokenize.TokenError, SyntaxError, UnicodeDecodeError) as e:
+        # Se usa lo leído hasta el error (encabezado cortado, encoding inválido).
+        logging.debug(f"Incomplete script header: {e}")
+    paragraph = docstring.strip().split("\n\n", 1)[0]
+    desc = fields.get("desc") or paragraph or " ".join(c for c in comments if c)
+    if desc:
+        fields["desc"] = desc
+    return {key: _shorten(fields[key]) for key in METADATA_FIELDS if fields.get(key)}
+
+
+def _load(path: str, key: tuple[int, int]) -> dict[str, str]:
+    global _generation
+    metadata: dict[str, str] = {}
+    try:
+        with open(path, "rb") as f:
+            metadata = parse_script_metadata(f.read(METADATA_MAX_BYTES))
+    except Exception as e:
+        logging.warning(f"Could not read script metadata from {path}: {e}")
+    finally:
+        # Aun si falla, se cachea el resultado: si no, la tarjeta quedaría
+        # esperando para siempre y cada ventana volvería a pedirlo.
+        with _metadata_lock:
+            _metadata_cache[path] = (key, metadata)
+            _pending.pop(path, None)
+            _generation += 1
+    return metadata
+
+
+def generation() -> int:
+    """Cambia cada vez que se termina de calcular algún metadato."""
+    return _generation
+
+
+def lookup(path: str, key: tuple[int, int] | None) -> dict[str, str] | None:
+    """
+    Metadatos de `path` si ya están calculados para `key` (mtime_ns, tamaño,
+    tomados del snapshot de descubrimiento: no se hace stat por tarjeta). Si
+    no, encola el cálculo en el pool y devuelve None.
+    """
+    if key is None:
+        return {}
+    cached = _metadata_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with _metadata_lock:
+        cached = _metadata_cache.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        if path not in _pending:
+            _pending[path] = _metadata_executor.submit(_load, path, key)
+    return None
+
+
+def wait_for(paths: Iterable[str], timeout: float) -> None:
+    """Espera hasta `timeout` segundos a que terminen los cálculos pendientes."""
+    with _metadata_lock:
+        futures = [_pending[path] for path in paths if path in _pending]
+    if futures:
+        concurrent.futures.wait(futures, timeout=timeout)
+
+
+def enrich(
+    root: str,
+    tools: list[dict[str, Any]],
+    file_keys: Mapping[str, tuple[int, int]],
+) -> list[str]:
+    """
+    Completa en el lugar los campos vacíos de `tools` con los metadatos ya
+    calculados (tools.json tiene prioridad). `file_keys` es el (mtime_ns,
+    tamaño) de cada relpath según el descubrimiento. Devuelve las rutas
+    completas de los scripts cuyos metadatos todavía se están calculando.
+    """
+    pending = []
+    for tool in tools:
+        path = os.path.join(root, tool["relpath"])
+        metadata = lookup(path, file_keys.get(tool["relpath"]))
+        if metadata is None:
+            pending.append(path)
+            continue
+        for field, value in metadata.items():
+            if not tool.get(field):
+                tool[field] = value
+    return pending
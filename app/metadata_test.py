@@ -0,0 +1,38 @@
+from app import metadata
+
+
+def _load(tmp_path, name: str, source: bytes) -> dict[str, str]:
+    path = tmp_path / name
+    path.write_bytes(source)
+    key = (path.stat().st_mtime_ns, len(source))
+    assert metadata.lookup(str(path), key) is None
+    metadata.wait_for([str(path)], timeout=5)
+    return metadata.lookup(str(path), key)
+
+
+def test_docstring_and_header_comments(tmp_path):
+    source = (
+        "#!/usr/bin/env python3\n"
+        "# Título: Reporte de flota\n"
+        "# Icono: truck\n"
+        '"""Exporta el estado de la flota a CSV.\n\nDetalle largo."""\n'
+        "import os\n"
+    ).encode()
+    assert _load(tmp_path, "report.py", source) == {
+        "title": "Reporte de flota",
+        "desc": "Exporta el estado de la flota a CSV.",
+        "icon": "truck",
+    }
+
+
+def test_latin1_script_does_not_stay_pending(tmp_path):
+    source = '# Descripción: año\n"""Revisión de vehículos."""\n'.encode("latin-1")
+    assert _load(tmp_path, "latin1.py", source) == {}
+    assert str(tmp_path / "latin1.py") not in metadata._pending
+
+
+def test_invalid_syntax_keeps_what_was_read(tmp_path):
+    source = b"# Title: Roto\nx = (\n"
+    assert _load(tmp_path, "broken.py", source) == {"title": "Roto"}
+    source = b'# Title: Cortado\n"""sin cerrar\n'
+    assert _load(tmp_path, "unterminated.py", source) == {"title": "Cortado"}
@@ -1,5 +1,15 @@
 import datetime
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    false,
+)
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -31,6 +41,7 @@ class Permission(Base):
     id = Column(Integer, primary_key=True, index=True)
     script_relpath = Column(String(500), unique=True, nullable=False, index=True)
     description = Column(String(500), nullable=True)
+    orphaned = Column(Boolean, default=False, server_default=false(), nullable=False)
 
 
 class UserPermission(Base):
@@ -39,9 +50,49 @@ class UserPermission(Base):
     """
 
     __tablename__ = "user_permissions"
+    __table_args__ = (
+        Index(
+            "ux_user_permissions_user_permission",
+            "user_id",
+            "permission_id",
+            unique=True,
+        ),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     permission_id = Column(Integer, ForeignKey("permissions.id"), nullable=False)
     granted_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
     user = relationship("User", back_populates="permissions")
-    permission = relationship("Permission")
\ No newline at end of file
+    permission = relationship("Permission")
+
+
+class Execution(Base):
+    """
+    Historial de ejecuciones de scripts. Lo escribe `app.audit` en lotes.
+    """
+
+    __tablename__ = "executions"
+    __table_args__ = (
+        # Paginación por cursor (started_at, id): listado general y filtros por
+        # usuario o script sin ordenar en memoria.
+        Index("ix_executions_started", "started_at", "id"),
+        Index("ix_executions_user_started", "user_id", "started_at", "id"),
+        Index("ix_executions_relpath_started", "script_relpath", "started_at", "id"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String(32), unique=True, nullable=False, index=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    username = Column(String(50), nullable=True)
+    script_relpath = Column(String(500), nullable=False)
+    script_hash = Column(String(64), nullable=True)
+    status = Column(String(20), default="running", nullable=False, index=True)
+    started_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    exit_code = Column(Integer, nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    cpu_seconds = Column(Float, nullable=True)
+    peak_rss_kb = Column(Integer, nullable=True)
+    output_bytes = Column(Integer, nullable=True)
+    worker = Column(String(100), nullable=True)
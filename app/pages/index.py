@@ -2,13 +2,93 @@ import reflex as rx
 from app.state import AppState, Tool
 from typing import cast
 
+SEARCH_DEBOUNCE_MS = 250
 LOGO_URL = "https://backoffice.staging.vecfleet.io/static/media/logo-login-app.3ef99420e5a1cc400d8f.png"
 
 
+def jobs_menu() -> rx.Component:
+    """
+    Menú con las ejecuciones recientes del usuario; permite volver a ver
+    cualquiera desde cualquier página.
+    """
+    return rx.popover.root(
+        rx.popover.trigger(
+            rx.el.button(
+                rx.icon(tag="list-checks", class_name="h-5 w-5"),
+                rx.cond(
+                    AppState.active_jobs_count > 0,
+                    rx.el.span(
+                        AppState.active_jobs_count,
+                        class_name="absolute -top-1 -right-1 bg-purple-600 text-white text-xs rounded-full h-4 min-w-4 px-1 flex items-center justify-center",
+                    ),
+                    rx.fragment(),
+                ),
+                on_click=AppState.refresh_jobs,
+                class_name="relative text-gray-500 hover:text-gray-700 dark:text-gray-400 dark:hover:text-gray-200",
+            )
+        ),
+        rx.popover.content(
+            rx.el.h3(
+                "Mis ejecuciones",
+                class_name="text-sm font-semibold text-gray-700 dark:text-gray-300 mb-2",
+            ),
+            rx.cond(
+                AppState.my_jobs.length() > 0,
+                rx.el.ul(
+                    rx.foreach(
+                        AppState.my_jobs,
+                        lambda job: rx.el.li(
+                            rx.cond(
+                                job["active"],
+                                rx.spinner(size="1"),
+                                rx.icon(
+                                    tag="circle-check",
+                                    class_name="h-4 w-4 text-gray-400",
+                                ),
+                            ),
+                            rx.el.div(
+                                rx.el.p(
+                                    job["relpath"],
+                                    class_name="text-sm font-medium truncate",
+                                ),
+                                rx.el.p(
+                                    job["started_at"] + " · " + job["status"],
+                                    class_name="text-xs text-gray-500",
+                                ),
+                                class_name="flex-1 min-w-0",
+                            ),
+                            rx.popover.close(
+                                rx.el.button(
+                                    "Ver",
+                                    on_click=AppState.attach_job(job["run_id"]),
+                                    class_name="text-xs text-purple-700 hover:underline dark:text-purple-300",
+                                )
+                            ),
+                            class_name="flex items-center gap-3 py-2",
+                        ),
+                    ),
+                    class_name="divide-y divide-gray-100 dark:divide-gray-800",
+                ),
+                rx.el.p(
+                    "Sin ejecuciones recientes.", class_name="text-sm text-gray-500"
+                ),
+            ),
+            width="340px",
+        ),
+    )
+
+
 def top_bar() -> rx.Component:
     """
-    Barra de navegación superior fija con logo, título, toggle de tema y botón de logout.
+    Barra de navegación superior fija con logo, título, ejecuciones del usuario,
+    toggle de tema y botón de logout. Incluye el modal de resultados, así una
+    ejecución se puede seguir desde cualquier página.
     """
+    return rx.fragment(top_bar_header(), results_modal())
+
+
+def top_bar_header() -> rx.Component:
+    """Cabecera fija de `top_bar`."""
     return rx.el.header(
         rx.el.div(
             rx.el.img(src=LOGO_URL, class_name="h-8"),
@@ -19,6 +99,7 @@ def top_bar() -> rx.Component:
             class_name="flex items-center gap-4",
         ),
         rx.el.div(
+            jobs_menu(),
             rx.el.div(
                 rx.icon(tag="sun", class_name="h-5 w-5 text-gray-500"),
                 rx.el.button(
@@ -45,6 +126,7 @@ def top_bar() -> rx.Component:
             class_name="flex items-center gap-6",
         ),
         class_name="fixed top-0 left-0 right-0 h-16 bg-white/80 backdrop-blur-sm border-b border-gray-200 dark:bg-gray-900/80 dark:border-gray-800 flex items-center justify-between px-6 z-30",
+        on_mount=AppState.watch_jobs,
     )
 
 
@@ -61,15 +143,26 @@ def sidebar() -> rx.Component:
                 ),
                 rx.el.nav(
                     rx.foreach(
-                        AppState.groups_list,
-                        lambda group_item: rx.el.a(
+                        AppState.group_summaries,
+                        lambda group: rx.el.a(
                             rx.icon(tag="folder", class_name="h-5 w-5 text-gray-400"),
                             rx.el.span(
-                                group_item[0],
+                                group["name"],
                                 class_name="font-medium text-gray-700 dark:text-gray-300",
                             ),
-                            href=f"#{group_item[0]}",
-                            class_name="flex items-center gap-3 px-4 py-2.5 rounded-lg hover:bg-purple-50 dark:hover:bg-gray-800 transition-colors",
+                            rx.el.span(
+                                group["count"],
+                                class_name="ml-auto text-xs text-gray-400",
+                            ),
+                            on_click=[
+                                AppState.show_group(group["name"]),
+                                rx.redirect("/home"),
+                            ],
+                            class_name=rx.cond(
+                                AppState.selected_group == group["name"],
+                                "flex items-center gap-3 px-4 py-2.5 rounded-lg bg-purple-50 dark:bg-gray-800 cursor-pointer transition-colors",
+                                "flex items-center gap-3 px-4 py-2.5 rounded-lg hover:bg-purple-50 dark:hover:bg-gray-800 cursor-pointer transition-colors",
+                            ),
                         ),
                     ),
                     class_name="flex flex-col gap-1",
@@ -109,6 +202,24 @@ def sidebar() -> rx.Component:
                             href="/admin/permissions",
                             class_name="flex items-center gap-3 px-4 py-2.5 rounded-lg hover:bg-purple-50 dark:hover:bg-gray-800 transition-colors",
                         ),
+                        rx.el.a(
+                            rx.icon(tag="history", class_name="h-5 w-5 text-gray-400"),
+                            rx.el.span(
+                                "Logs",
+                                class_name="font-medium text-gray-700 dark:text-gray-300",
+                            ),
+                            href="/logs",
+                            class_name="flex items-center gap-3 px-4 py-2.5 rounded-lg hover:bg-purple-50 dark:hover:bg-gray-800 transition-colors",
+                        ),
+                        rx.el.a(
+                            rx.icon(tag="gauge", class_name="h-5 w-5 text-gray-400"),
+                            rx.el.span(
+                                "Rendimiento",
+                                class_name="font-medium text-gray-700 dark:text-gray-300",
+                            ),
+                            href="/admin/stats",
+                            class_name="flex items-center gap-3 px-4 py-2.5 rounded-lg hover:bg-purple-50 dark:hover:bg-gray-800 transition-colors",
+                        ),
                         class_name="space-y-1",
                     ),
                 ),
@@ -121,12 +232,10 @@ def sidebar() -> rx.Component:
 
 def tool_card(tool: Tool) -> rx.Component:
     """
-    Tarjeta individual para una herramienta.
+    Tarjeta individual para una herramienta. Sólo se muestran herramientas que
+    el usuario puede ejecutar; `run_tool` vuelve a verificar el permiso.
     """
     tool_var = cast(rx.Var, tool)
-    has_permission = AppState.user_is_admin | AppState.user_permissions.contains(
-        tool_var["relpath"]
-    )
     return rx.el.div(
         rx.el.div(
             rx.el.div(
@@ -134,11 +243,6 @@ def tool_card(tool: Tool) -> rx.Component:
                     rx.cond(tool_var["icon"] != "", tool_var["icon"], "settings"),
                     class_name="h-6 w-6 text-purple-600",
                 ),
-                rx.cond(
-                    ~has_permission,
-                    rx.icon(tag="lock", class_name="h-4 w-4 text-yellow-500"),
-                    rx.fragment(),
-                ),
                 class_name="flex items-center gap-2",
             ),
             rx.el.span(
@@ -153,17 +257,151 @@ def tool_card(tool: Tool) -> rx.Component:
         ),
         rx.el.p(
             rx.cond(tool_var["desc"] != "", tool_var["desc"], tool_var["relpath"]),
-            class_name="text-sm text-gray-500 dark:text-gray-400 mb-4 h-10 overflow-hidden",
+            class_name="text-sm text-gray-500 dark:text-gray-400 mb-2 h-10 overflow-hidden",
+        ),
+        rx.el.div(
+            rx.cond(
+                AppState.tool_stats.contains(tool_var["relpath"]),
+                rx.fragment(
+                    rx.icon(tag="timer", class_name="h-3.5 w-3.5"),
+                    rx.el.span(AppState.tool_stats[tool_var["relpath"]]),
+                ),
+                rx.fragment(),
+            ),
+            class_name="flex items-center gap-1 text-xs text-gray-400 dark:text-gray-500 mb-3 h-4",
         ),
         rx.el.button(
             "Ejecutar",
             rx.icon(tag="play", class_name="ml-2 h-4 w-4"),
             on_click=lambda: AppState.run_tool(tool_var["relpath"]),
-            disabled=~has_permission,
             class_name="w-full bg-gray-800 text-white font-semibold py-2.5 rounded-lg hover:bg-gray-900 dark:bg-purple-600 dark:hover:bg-purple-700 transition-colors flex items-center justify-center disabled:bg-gray-400 disabled:cursor-not-allowed dark:disabled:bg-gray-600",
         ),
         class_name="bg-white p-5 rounded-xl border border-gray-200 shadow-md hover:shadow-lg hover:border-purple-300 transition-all duration-300 transform hover:-translate-y-1 dark:bg-gray-800/50 dark:border-gray-700 dark:hover:border-purple-500",
-        opacity=rx.cond(has_permission, "100%", "60%"),
+    )
+
+
+def output_summary() -> rx.Component:
+    """
+    Vista acotada (principio y final) de STDOUT/STDERR de la última ejecución.
+    """
+    return rx.fragment(
+        rx.el.div(
+            rx.el.div(
+                rx.el.h3(
+                    "STDOUT",
+                    class_name="font-semibold text-gray-700 dark:text-gray-300 mb-2",
+                ),
+                rx.el.button(
+                    rx.icon(tag="copy"),
+                    on_click=rx.set_clipboard(AppState.stdout),
+                    class_name="text-gray-400 hover:text-gray-600 dark:text-gray-500 dark:hover:text-gray-300",
+                ),
+                class_name="flex justify-between items-center",
+            ),
+            rx.el.pre(
+                rx.el.code(
+                    AppState.stdout,
+                    class_name="text-xs font-mono dark:text-gray-300",
+                ),
+                class_name="bg-gray-50 p-4 rounded-md border max-h-64 overflow-y-auto dark:bg-gray-800 dark:border-gray-700",
+            ),
+            class_name="mb-4",
+        ),
+        rx.el.div(
+            rx.el.div(
+                rx.el.h3(
+                    "STDERR",
+                    class_name="font-semibold text-red-700 dark:text-red-400 mb-2",
+                ),
+                rx.el.button(
+                    rx.icon(tag="copy"),
+                    on_click=rx.set_clipboard(AppState.stderr),
+                    class_name="text-gray-400 hover:text-gray-600 dark:text-gray-500 dark:hover:text-gray-300",
+                ),
+                class_name="flex justify-between items-center",
+            ),
+            rx.el.pre(
+                rx.el.code(
+                    AppState.stderr,
+                    class_name="text-xs font-mono text-red-600 dark:text-red-400",
+                ),
+                class_name="bg-red-50 p-4 rounded-md border border-red-200 max-h-64 overflow-y-auto dark:bg-red-900/20 dark:border-red-500/30",
+            ),
+            class_name=rx.cond(AppState.stderr != "", "block", "hidden"),
+        ),
+        rx.cond(
+            AppState.output_truncated & AppState.output_logged & ~AppState.running,
+            rx.el.div(
+                rx.el.span(
+                    "La salida fue recortada. Ver completa:",
+                    class_name="text-gray-500 dark:text-gray-400",
+                ),
+                rx.el.button(
+                    "STDOUT",
+                    on_click=AppState.show_log_page("stdout", 0),
+                    class_name="text-purple-700 font-semibold hover:underline dark:text-purple-300",
+                ),
+                rx.el.button(
+                    "STDERR",
+                    on_click=AppState.show_log_page("stderr", 0),
+                    class_name="text-purple-700 font-semibold hover:underline dark:text-purple-300",
+                ),
+                class_name="flex items-center gap-3 mt-4",
+            ),
+        ),
+    )
+
+
+def full_log_view() -> rx.Component:
+    """
+    Paginador sobre la salida completa de la ejecución guardada en disco.
+    """
+    return rx.el.div(
+        rx.el.div(
+            rx.el.h3(
+                AppState.log_stream.upper() + " completo",
+                class_name="font-semibold text-gray-700 dark:text-gray-300",
+            ),
+            rx.el.button(
+                "Volver al resumen",
+                on_click=AppState.hide_log,
+                class_name="text-purple-700 font-semibold hover:underline dark:text-purple-300",
+            ),
+            class_name="flex justify-between items-center mb-2",
+        ),
+        rx.el.pre(
+            rx.el.code(
+                AppState.log_text,
+                class_name="text-xs font-mono dark:text-gray-300",
+            ),
+            class_name="bg-gray-50 p-4 rounded-md border max-h-96 overflow-y-auto dark:bg-gray-800 dark:border-gray-700",
+        ),
+        rx.el.div(
+            rx.el.button(
+                rx.icon(tag="chevron-left", class_name="h-4 w-4"),
+                on_click=AppState.show_log_page(
+                    AppState.log_stream, AppState.log_page - 1
+                ),
+                disabled=AppState.log_page <= 0,
+                class_name="p-1 rounded hover:bg-gray-100 disabled:opacity-40 dark:hover:bg-gray-700",
+            ),
+            rx.el.span(
+                "Página ",
+                AppState.log_page + 1,
+                " de ",
+                AppState.log_page_count,
+                class_name="text-gray-500 dark:text-gray-400",
+            ),
+            rx.el.button(
+                rx.icon(tag="chevron-right", class_name="h-4 w-4"),
+                on_click=AppState.show_log_page(
+                    AppState.log_stream, AppState.log_page + 1
+                ),
+                disabled=AppState.log_page + 1 >= AppState.log_page_count,
+                class_name="p-1 rounded hover:bg-gray-100 disabled:opacity-40 dark:hover:bg-gray-700",
+            ),
+            class_name="flex items-center justify-center gap-3 mt-2",
+        ),
     )
 
 
@@ -181,55 +419,34 @@ def results_modal() -> rx.Component:
                     AppState.selected_tool_title,
                     class_name="text-xl font-bold text-gray-900 dark:text-white mb-4",
                 ),
-                rx.el.div(
+                rx.cond(
+                    AppState.cached_at != "",
                     rx.el.div(
-                        rx.el.div(
-                            rx.el.h3(
-                                "STDOUT",
-                                class_name="font-semibold text-gray-700 dark:text-gray-300 mb-2",
-                            ),
-                            rx.el.button(
-                                rx.icon(tag="copy"),
-                                on_click=rx.set_clipboard(AppState.stdout),
-                                class_name="text-gray-400 hover:text-gray-600 dark:text-gray-500 dark:hover:text-gray-300",
-                            ),
-                            class_name="flex justify-between items-center",
-                        ),
-                        rx.el.pre(
-                            rx.el.code(
-                                AppState.stdout,
-                                class_name="text-xs font-mono dark:text-gray-300",
-                            ),
-                            class_name="bg-gray-50 p-4 rounded-md border max-h-64 overflow-y-auto dark:bg-gray-800 dark:border-gray-700",
+                        rx.icon(tag="history", class_name="h-4 w-4 mr-2"),
+                        "Resultado en caché de las " + AppState.cached_at + " — ",
+                        rx.el.button(
+                            "volver a ejecutar",
+                            on_click=AppState.run_tool(AppState.selected_relpath, True),
+                            class_name="ml-1 font-semibold underline",
                         ),
-                        class_name="mb-4",
+                        class_name="flex items-center bg-purple-50 text-purple-800 px-4 py-2 rounded-lg mb-4 text-sm dark:bg-purple-800/20 dark:text-purple-300",
                     ),
-                    rx.el.div(
-                        rx.el.div(
-                            rx.el.h3(
-                                "STDERR",
-                                class_name="font-semibold text-red-700 dark:text-red-400 mb-2",
-                            ),
-                            rx.el.button(
-                                rx.icon(tag="copy"),
-                                on_click=rx.set_clipboard(AppState.stderr),
-                                class_name="text-gray-400 hover:text-gray-600 dark:text-gray-500 dark:hover:text-gray-300",
-                            ),
-                            class_name="flex justify-between items-center",
-                        ),
-                        rx.el.pre(
-                            rx.el.code(
-                                AppState.stderr,
-                                class_name="text-xs font-mono text-red-600 dark:text-red-400",
-                            ),
-                            class_name="bg-red-50 p-4 rounded-md border border-red-200 max-h-64 overflow-y-auto dark:bg-red-900/20 dark:border-red-500/30",
-                        ),
-                        class_name=rx.cond(AppState.stderr != "", "block", "hidden"),
+                    rx.fragment(),
+                ),
+                rx.el.div(
+                    rx.cond(
+                        AppState.log_stream != "",
+                        full_log_view(),
+                        output_summary(),
                     ),
                     rx.el.div(
                         rx.spinner(class_name="text-purple-600 dark:text-purple-400"),
                         rx.el.p(
-                            "Ejecutando...",
+                            rx.cond(
+                                AppState.queue_position > 0,
+                                "En cola, posición " + AppState.queue_position.to_string(),
+                                "Ejecutando...",
+                            ),
                             class_name="text-sm text-gray-500 dark:text-gray-400 ml-3",
                         ),
                         class_name="flex items-center justify-center mt-4",
@@ -238,6 +455,17 @@ def results_modal() -> rx.Component:
                     class_name="text-sm",
                 ),
                 rx.el.div(
+                    rx.cond(
+                        AppState.running,
+                        rx.el.button(
+                            "Cancelar",
+                            rx.icon(tag="square", class_name="ml-2 h-4 w-4"),
+                            on_click=AppState.cancel_run,
+                            disabled=AppState.cancel_requested,
+                            class_name="bg-red-600 text-white px-4 py-2 rounded-lg font-medium hover:bg-red-700 flex items-center disabled:bg-gray-400",
+                        ),
+                        rx.fragment(),
+                    ),
                     rx.radix.primitives.dialog.close(
                         rx.el.button(
                             "Cerrar",
@@ -245,7 +473,7 @@ def results_modal() -> rx.Component:
                             class_name="bg-gray-100 text-gray-700 px-4 py-2 rounded-lg font-medium hover:bg-gray-200 dark:bg-gray-700 dark:text-gray-300 dark:hover:bg-gray-600",
                         )
                     ),
-                    class_name="flex justify-end mt-6 pt-4 border-t dark:border-gray-700",
+                    class_name="flex justify-end gap-3 mt-6 pt-4 border-t dark:border-gray-700",
                 ),
                 class_name="fixed top-1/2 left-1/2 -translate-x-1/2 -translate-y-1/2 bg-white rounded-xl shadow-2xl p-6 w-full max-w-2xl z-50 dark:bg-gray-800 dark:border dark:border-gray-700",
             ),
@@ -255,6 +483,118 @@ def results_modal() -> rx.Component:
     )
 
 
+def search_bar() -> rx.Component:
+    """
+    Buscador de herramientas. La consulta se resuelve en el servidor contra el
+    índice del catálogo y se envía con debounce para no disparar un evento por
+    tecla.
+    """
+    return rx.el.div(
+        rx.icon(tag="search", class_name="h-5 w-5 text-gray-400"),
+        rx.debounce_input(
+            rx.el.input(
+                placeholder="Buscar herramientas por nombre, grupo o descripción…",
+                value=AppState.search_query,
+                on_change=AppState.set_search_query,
+                class_name="flex-1 bg-transparent outline-none text-sm text-gray-800 dark:text-gray-100",
+            ),
+            debounce_timeout=SEARCH_DEBOUNCE_MS,
+        ),
+        rx.cond(
+            AppState.search_query != "",
+            rx.el.button(
+                rx.icon(tag="x", class_name="h-4 w-4"),
+                on_click=AppState.clear_search,
+                class_name="text-gray-400 hover:text-gray-600",
+            ),
+            rx.fragment(),
+        ),
+        class_name="flex items-center gap-3 bg-white dark:bg-gray-900 border border-gray-200 dark:border-gray-700 rounded-xl px-4 py-2.5 mb-8",
+    )
+
+
+def search_results() -> rx.Component:
+    """Resultados de la búsqueda, ordenados por relevancia."""
+    return rx.el.section(
+        rx.el.h2(
+            AppState.search_total.to_string() + " resultados",
+            class_name="text-sm font-semibold text-gray-500 uppercase tracking-wider mb-4",
+        ),
+        rx.el.div(
+            rx.foreach(AppState.search_results, tool_card),
+            class_name="grid grid-cols-[repeat(auto-fill,minmax(300px,1fr))] gap-6",
+        ),
+        rx.cond(
+            AppState.search_results.length() < AppState.search_total,
+            _window_button("Ver más resultados", AppState.load_more_results),
+            rx.fragment(),
+        ),
+        class_name="mb-12",
+    )
+
+
+def _window_button(label: str, on_click) -> rx.Component:
+    return rx.el.div(
+        rx.el.button(
+            label,
+            on_click=on_click,
+            class_name="bg-purple-50 hover:bg-purple-100 text-purple-700 font-semibold px-4 py-2 rounded-lg text-sm transition-colors dark:bg-purple-800/20 dark:text-purple-300 dark:hover:bg-purple-800/40",
+        ),
+        class_name="flex justify-center my-6",
+    )
+
+
+def tool_groups() -> rx.Component:
+    """
+    Herramientas agrupadas por carpeta. Sólo se montan las tarjetas de la
+    ventana actual; al hacer scroll cerca del final se pide la página siguiente.
+    """
+    return rx.cond(
+        AppState.has_tools,
+        rx.fragment(
+            rx.cond(
+                AppState.has_previous_tools,
+                _window_button("Ver anteriores", AppState.load_previous_tools),
+                rx.fragment(),
+            ),
+            rx.foreach(
+                AppState.tool_window,
+                lambda group: rx.el.section(
+                    rx.el.h2(
+                        group["name"],
+                        class_name="text-2xl font-bold text-gray-800 dark:text-white mb-6 pt-4",
+                    ),
+                    rx.el.div(
+                        rx.foreach(group["tools"], tool_card),
+                        class_name="grid grid-cols-[repeat(auto-fill,minmax(300px,1fr))] gap-6",
+                    ),
+                    class_name="mb-12",
+                ),
+            ),
+            rx.cond(
+                AppState.has_more_tools,
+                _window_button("Ver más", AppState.load_more_tools),
+                rx.fragment(),
+            ),
+        ),
+        rx.el.div(
+            rx.el.div(
+                rx.icon(tag="folder-x", class_name="h-12 w-12 text-gray-400"),
+                rx.el.h3(
+                    "No hay herramientas disponibles",
+                    class_name="mt-4 text-lg font-semibold text-gray-600 dark:text-gray-400",
+                ),
+                rx.el.p(
+                    "No se encontraron scripts en el directorio configurado.",
+                    class_name="mt-1 text-sm text-gray-500 dark:text-gray-400",
+                ),
+                class_name="flex flex-col items-center justify-center p-8 border-2 border-dashed border-gray-300 rounded-lg bg-gray-50 dark:bg-gray-800/20 dark:border-gray-700",
+            ),
+            class_name="flex items-center justify-center h-full",
+        ),
+    )
+
+
 def index() -> rx.Component:
     """
     Página principal del dashboard.
@@ -266,44 +606,24 @@ def index() -> rx.Component:
             sidebar(),
             rx.el.div(
                 rx.cond(
-                    AppState.has_tools,
-                    rx.foreach(
-                        AppState.groups_list,
-                        lambda group_item: rx.el.section(
-                            rx.el.h2(
-                                group_item[0],
-                                id=group_item[0],
-                                class_name="text-2xl font-bold text-gray-800 dark:text-white mb-6 pt-4 scroll-mt-20",
-                            ),
-                            rx.el.div(
-                                rx.foreach(group_item[1], tool_card),
-                                class_name="grid grid-cols-[repeat(auto-fill,minmax(300px,1fr))] gap-6",
-                            ),
-                            class_name="mb-12",
-                        ),
-                    ),
+                    ~AppState.db_ready,
                     rx.el.div(
-                        rx.el.div(
-                            rx.icon(
-                                tag="folder-x", class_name="h-12 w-12 text-gray-400"
-                            ),
-                            rx.el.h3(
-                                "No hay herramientas disponibles",
-                                class_name="mt-4 text-lg font-semibold text-gray-600 dark:text-gray-400",
-                            ),
-                            rx.el.p(
-                                "No se encontraron scripts en el directorio configurado.",
-                                class_name="mt-1 text-sm text-gray-500 dark:text-gray-400",
-                            ),
-                            class_name="flex flex-col items-center justify-center p-8 border-2 border-dashed border-gray-300 rounded-lg bg-gray-50 dark:bg-gray-800/20 dark:border-gray-700",
-                        ),
-                        class_name="flex items-center justify-center h-full",
+                        rx.icon(tag="database", class_name="h-5 w-5 mr-2"),
+                        "La base de datos no está disponible. Reintentá en unos minutos.",
+                        class_name="flex items-center bg-red-100 border border-red-400 text-red-700 px-4 py-2 rounded-lg mb-6 text-sm",
                     ),
                 ),
-                class_name="ml-64 pt-20 px-8 pb-8 h-full",
+                search_bar(),
+                rx.cond(
+                    AppState.search_query != "",
+                    search_results(),
+                    tool_groups(),
+                ),
+                id="tools-scroll",
+                on_scroll_end=AppState.check_tools_scroll,
+                class_name="ml-64 pt-20 px-8 pb-8 h-screen overflow-y-auto",
             ),
-            results_modal(),
             class_name="bg-gray-50 dark:bg-gray-950 min-h-screen font-['Inter']",
         ),
         rx.fragment(),
-    )
\ No newline at end of file
+    )
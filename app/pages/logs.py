@@ -0,0 +1,193 @@
+import reflex as rx
+from app.state import AppState
+from app.pages.index import top_bar, sidebar
+from app.states.logs_state import EXECUTION_STATUSES, LogsState
+
+HEADER_H = "64px"
+TH_CLASS = "px-4 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider bg-gray-50 dark:bg-gray-900 sticky top-0"
+TD_CLASS = "px-4 py-2 whitespace-nowrap text-sm"
+
+
+def _status_badge(status: rx.Var) -> rx.Component:
+    return rx.badge(
+        status,
+        color_scheme=rx.match(
+            status,
+            ("ok", "green"),
+            ("running", "blue"),
+            ("failed", "red"),
+            ("error", "red"),
+            ("timeout", "orange"),
+            ("memory_limit", "orange"),
+            ("cpu_limit", "orange"),
+            ("cancelled", "amber"),
+            ("interrupted", "purple"),
+            "gray",
+        ),
+        variant="soft",
+    )
+
+
+def _filters_bar() -> rx.Component:
+    """Filtros del historial; se aplican en el servidor."""
+    return rx.hstack(
+        rx.input(
+            placeholder="Usuario",
+            value=LogsState.filter_username,
+            on_change=lambda v: LogsState.set_filter("username", v),
+            size="2",
+        ),
+        rx.input(
+            placeholder="Script (ruta exacta)",
+            value=LogsState.filter_relpath,
+            on_change=lambda v: LogsState.set_filter("relpath", v),
+            size="2",
+            width="280px",
+        ),
+        rx.select(
+            EXECUTION_STATUSES,
+            placeholder="Estado",
+            value=LogsState.filter_status,
+            on_change=lambda v: LogsState.set_filter("status", v),
+            size="2",
+        ),
+        rx.input(
+            type="date",
+            value=LogsState.filter_date_from,
+            on_change=lambda v: LogsState.set_filter("date_from", v),
+            size="2",
+        ),
+        rx.input(
+            type="date",
+            value=LogsState.filter_date_to,
+            on_change=lambda v: LogsState.set_filter("date_to", v),
+            size="2",
+        ),
+        rx.button("Filtrar", size="2", on_click=LogsState.apply_filters),
+        rx.button(
+            "Limpiar",
+            size="2",
+            variant="soft",
+            color_scheme="gray",
+            on_click=LogsState.clear_filters,
+        ),
+        align="center",
+        wrap="wrap",
+        width="100%",
+        mb="3",
+    )
+
+
+def _executions_table() -> rx.Component:
+    """Tabla con la página de ejecuciones visible."""
+    return rx.box(
+        rx.el.table(
+            rx.el.thead(
+                rx.el.tr(
+                    rx.el.th("Inicio (UTC)", class_name=TH_CLASS),
+                    rx.el.th("Usuario", class_name=TH_CLASS),
+                    rx.el.th("Script", class_name=TH_CLASS),
+                    rx.el.th("Estado", class_name=TH_CLASS),
+                    rx.el.th("Código", class_name=TH_CLASS),
+                    rx.el.th("Duración", class_name=TH_CLASS),
+                    rx.el.th("Memoria", class_name=TH_CLASS),
+                    rx.el.th("Salida", class_name=TH_CLASS),
+                )
+            ),
+            rx.el.tbody(
+                rx.foreach(
+                    LogsState.rows,
+                    lambda r: rx.el.tr(
+                        rx.el.td(r.started_at, class_name=TD_CLASS),
+                        rx.el.td(r.username, class_name=TD_CLASS),
+                        rx.el.td(rx.code(r.script_relpath), class_name=TD_CLASS),
+                        rx.el.td(_status_badge(r.status), class_name=TD_CLASS),
+                        rx.el.td(r.exit_code, class_name=TD_CLASS),
+                        rx.el.td(r.duration, class_name=TD_CLASS),
+                        rx.el.td(r.peak_rss_mb, class_name=TD_CLASS),
+                        rx.el.td(r.output_kb, class_name=TD_CLASS),
+                        key=r.id,
+                        class_name="bg-white dark:bg-gray-800",
+                    ),
+                ),
+                class_name="bg-white divide-y divide-gray-200 dark:bg-gray-800 dark:divide-gray-700",
+            ),
+            class_name="min-w-full divide-y divide-gray-200 dark:divide-gray-700",
+        ),
+        rx.cond(
+            LogsState.rows.length() == 0,
+            rx.center(
+                rx.text("Sin ejecuciones.", color_scheme="gray", size="2"),
+                padding="24px",
+            ),
+            rx.fragment(),
+        ),
+        id="logs-scroll",
+        class_name="shadow overflow-auto border border-gray-200 sm:rounded-lg dark:border-gray-700",
+        max_height="calc(100vh - 260px)",
+    )
+
+
+def _pagination() -> rx.Component:
+    """Botones de página anterior y siguiente."""
+    return rx.hstack(
+        rx.button(
+            "Anterior",
+            variant="soft",
+            size="2",
+            disabled=~LogsState.has_previous,
+            on_click=LogsState.previous_page,
+        ),
+        rx.text("Página ", LogsState.page_number, size="2", color_scheme="gray"),
+        rx.button(
+            "Siguiente",
+            variant="soft",
+            size="2",
+            disabled=~LogsState.has_next,
+            on_click=LogsState.next_page,
+        ),
+        justify="center",
+        align="center",
+        spacing="3",
+        padding="12px",
+    )
+
+
+def logs_page() -> rx.Component:
+    """Historial de ejecuciones (admin)."""
+    return rx.cond(
+        AppState.is_authenticated & AppState.user_is_admin,
+        rx.box(
+            top_bar(),
+            rx.box(
+                sidebar(),
+                rx.box(
+                    rx.hstack(
+                        rx.heading("Ejecuciones", size="6"),
+                        rx.spacer(),
+                        rx.button("Refrescar", on_click=LogsState.on_load_logs),
+                        align="center",
+                        width="100%",
+                        mb="4",
+                    ),
+                    _filters_bar(),
+                    rx.cond(
+                        LogsState.error_message != "",
+                        rx.callout(
+                            LogsState.error_message,
+                            icon="triangle_alert",
+                            color_scheme="red",
+                            mb="3",
+                        ),
+                        rx.fragment(),
+                    ),
+                    _executions_table(),
+                    _pagination(),
+                    padding="16px",
+                    pt=HEADER_H,
+                ),
+            ),
+            class_name="bg-gray-50 dark:bg-gray-950 min-h-screen font-['Inter']",
+        ),
+        rx.fragment(),
+    )
@@ -1,24 +1,118 @@
 import reflex as rx
 from app.state import AppState
-from app.pages.index import top_bar, sidebar
+from app.pages.index import SEARCH_DEBOUNCE_MS, top_bar, sidebar
 from app.states.permissions_state import PermissionsState
 
 HEADER_H = "64px"
 
 
+def _sortable_header(label: str, column: str) -> rx.Component:
+    """Encabezado que ordena la tabla de usuarios en el servidor al hacer click."""
+    return rx.el.th(
+        rx.el.button(
+            label,
+            rx.cond(
+                PermissionsState.users_sort_by == column,
+                rx.icon(
+                    tag=rx.cond(
+                        PermissionsState.users_sort_desc, "arrow-down", "arrow-up"
+                    ),
+                    class_name="h-3 w-3",
+                ),
+                rx.fragment(),
+            ),
+            on_click=PermissionsState.sort_users(column),
+            class_name="flex items-center gap-1 uppercase tracking-wider",
+        ),
+        class_name="px-4 py-3 text-left text-xs font-medium text-gray-500",
+    )
+
+
+def _users_pager() -> rx.Component:
+    """Controles de paginación de la tabla de usuarios."""
+    return rx.hstack(
+        rx.text(
+            PermissionsState.users_total.to_string() + " usuarios",
+            size="2",
+            color_scheme="gray",
+        ),
+        rx.spacer(),
+        rx.icon_button(
+            "chevron-left",
+            variant="soft",
+            size="1",
+            disabled=PermissionsState.users_page <= 0,
+            on_click=PermissionsState.set_users_page(PermissionsState.users_page - 1),
+        ),
+        rx.text(
+            "Página ",
+            PermissionsState.users_page + 1,
+            " de ",
+            PermissionsState.users_page_count,
+            size="2",
+        ),
+        rx.icon_button(
+            "chevron-right",
+            variant="soft",
+            size="1",
+            disabled=PermissionsState.users_page + 1
+            >= PermissionsState.users_page_count,
+            on_click=PermissionsState.set_users_page(PermissionsState.users_page + 1),
+        ),
+        align="center",
+        width="100%",
+        mt="3",
+    )
+
+
+def _permissions_pager() -> rx.Component:
+    """Controles de paginación del listado de permisos del modal."""
+    return rx.hstack(
+        rx.text(
+            PermissionsState.filtered_total.to_string() + " scripts",
+            size="2",
+            color_scheme="gray",
+        ),
+        rx.spacer(),
+        rx.icon_button(
+            "chevron-left",
+            variant="soft",
+            size="1",
+            disabled=PermissionsState.permissions_page <= 0,
+            on_click=PermissionsState.set_permissions_page(
+                PermissionsState.permissions_page - 1
+            ),
+        ),
+        rx.text(
+            "Página ",
+            PermissionsState.permissions_page + 1,
+            " de ",
+            PermissionsState.permissions_page_count,
+            size="2",
+        ),
+        rx.icon_button(
+            "chevron-right",
+            variant="soft",
+            size="1",
+            disabled=PermissionsState.permissions_page + 1
+            >= PermissionsState.permissions_page_count,
+            on_click=PermissionsState.set_permissions_page(
+                PermissionsState.permissions_page + 1
+            ),
+        ),
+        align="center",
+        width="100%",
+        mt="3",
+    )
+
+
 def _users_table() -> rx.Component:
     """Tabla de usuarios con contador de permisos y botón Editar."""
     return rx.el.table(
         rx.el.thead(
             rx.el.tr(
-                rx.el.th(
-                    "Usuario",
-                    class_name="px-4 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider",
-                ),
-                rx.el.th(
-                    "# Permisos",
-                    class_name="px-4 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider",
-                ),
+                _sortable_header("Usuario", "username"),
+                _sortable_header("# Permisos", "permission_count"),
                 rx.el.th("", class_name="px-4 py-3"),
             )
         ),
@@ -70,7 +164,7 @@ def _permissions_list() -> rx.Component:
         ),
         rx.el.tbody(
             rx.foreach(
-                PermissionsState.all_permissions,
+                PermissionsState.visible_permissions,
                 lambda p: rx.el.tr(
                     rx.el.td(p.id, class_name="px-4 py-2 whitespace-nowrap"),
                     rx.el.td(
@@ -78,7 +172,7 @@ def _permissions_list() -> rx.Component:
                     ),
                     rx.el.td(
                         rx.checkbox(
-                            checked=PermissionsState.user_permissions.contains(
+                            checked=PermissionsState.effective_permissions.contains(
                                 p.id
                             ).bool(),
                             on_change=lambda v: PermissionsState.toggle_permission(
@@ -118,11 +212,80 @@ def _edit_permissions_modal() -> rx.Component:
                 mb="3",
             ),
             rx.hstack(
+                rx.debounce_input(
+                    rx.input(
+                        placeholder="Buscar script por nombre, grupo o ruta…",
+                        value=PermissionsState.search_term,
+                        on_change=PermissionsState.set_search_term,
+                        width="100%",
+                    ),
+                    debounce_timeout=SEARCH_DEBOUNCE_MS,
+                ),
+                align="center",
+                width="100%",
+                mb="3",
+            ),
+            rx.hstack(
+                rx.button(
+                    "Conceder filtrados",
+                    size="2",
+                    variant="soft",
+                    on_click=PermissionsState.grant_filtered,
+                ),
+                rx.button(
+                    "Revocar filtrados",
+                    size="2",
+                    variant="soft",
+                    color_scheme="red",
+                    on_click=PermissionsState.revoke_filtered,
+                ),
+                rx.spacer(),
                 rx.input(
-                    placeholder="Buscar por ruta de script…",
-                    on_change=PermissionsState.set_search_term,
-                    width="100%",
-                    default_value=PermissionsState.search_term,
+                    placeholder="Copiar permisos de (usuario)…",
+                    value=PermissionsState.copy_from_username,
+                    on_change=PermissionsState.set_copy_from_username,
+                    size="2",
+                ),
+                rx.button(
+                    "Copiar",
+                    size="2",
+                    variant="soft",
+                    on_click=PermissionsState.copy_from_user,
+                ),
+                align="center",
+                width="100%",
+                mb="3",
+            ),
+            rx.hstack(
+                rx.checkbox(
+                    "Aplicar cambios en bloque",
+                    checked=PermissionsState.staged_mode,
+                    on_change=PermissionsState.set_staged_mode,
+                ),
+                rx.spacer(),
+                rx.cond(
+                    PermissionsState.pending_changes > 0,
+                    rx.hstack(
+                        rx.text(
+                            PermissionsState.pending_changes.to_string()
+                            + " cambios pendientes",
+                            size="2",
+                        ),
+                        rx.button(
+                            "Descartar",
+                            size="2",
+                            variant="soft",
+                            color_scheme="gray",
+                            on_click=PermissionsState.discard_pending_changes,
+                        ),
+                        rx.button(
+                            "Aplicar cambios",
+                            size="2",
+                            on_click=PermissionsState.apply_pending_changes,
+                        ),
+                        align="center",
+                    ),
+                    rx.fragment(),
                 ),
                 align="center",
                 width="100%",
@@ -130,8 +293,10 @@ def _edit_permissions_modal() -> rx.Component:
             ),
             rx.box(
                 _permissions_list(),
-                class_name="shadow overflow-hidden border border-gray-200 sm:rounded-lg dark:border-gray-700",
+                class_name="shadow overflow-auto border border-gray-200 sm:rounded-lg dark:border-gray-700",
+                max_height="calc(100vh - 380px)",
             ),
+            _permissions_pager(),
             class_name="fixed inset-x-4 top-20 md:inset-x-20 lg:inset-x-40 bg-white dark:bg-gray-900 border border-gray-200 dark:border-gray-700 rounded-2xl p-4 z-50",
         ),
         rx.fragment(),
@@ -150,6 +315,11 @@ def permissions_page() -> rx.Component:
                     rx.hstack(
                         rx.heading("Permisos", size="6"),
                         rx.spacer(),
+                        rx.button(
+                            "Re-escanear scripts",
+                            variant="soft",
+                            on_click=AppState.refresh_tools,
+                        ),
                         rx.button(
                             "Refrescar", on_click=PermissionsState.on_load_permissions
                         ),
@@ -161,6 +331,7 @@ def permissions_page() -> rx.Component:
                         _users_table(),
                         class_name="shadow overflow-hidden border border-gray-200 sm:rounded-lg dark:border-gray-700",
                     ),
+                    _users_pager(),
                     _edit_permissions_modal(),
                     padding="16px",
                     pt=HEADER_H,
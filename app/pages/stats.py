@@ -0,0 +1,130 @@
+import reflex as rx
+from app.state import AppState
+from app.pages.index import top_bar, sidebar
+from app.states.stats_state import StatsState
+
+HEADER_H = "64px"
+TH_CLASS = "px-4 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider"
+TD_CLASS = "px-4 py-2 whitespace-nowrap text-sm"
+
+
+def _stats_table() -> rx.Component:
+    """Scripts ordenados del más lento al más rápido (p95)."""
+    return rx.el.table(
+        rx.el.thead(
+            rx.el.tr(
+                rx.el.th("Script", class_name=TH_CLASS),
+                rx.el.th("Ejecuciones", class_name=TH_CLASS),
+                rx.el.th("Media", class_name=TH_CLASS),
+                rx.el.th("Máx", class_name=TH_CLASS),
+                rx.el.th("p50", class_name=TH_CLASS),
+                rx.el.th("p95", class_name=TH_CLASS),
+                rx.el.th("p99", class_name=TH_CLASS),
+                rx.el.th("CPU p50", class_name=TH_CLASS),
+                rx.el.th("Memoria pico p95", class_name=TH_CLASS),
+                rx.el.th("Salida media", class_name=TH_CLASS),
+                rx.el.th("Tendencia", class_name=TH_CLASS),
+            )
+        ),
+        rx.el.tbody(
+            rx.foreach(
+                StatsState.rows,
+                lambda r: rx.el.tr(
+                    rx.el.td(rx.code(r.relpath), class_name=TD_CLASS),
+                    rx.el.td(r.runs, class_name=TD_CLASS),
+                    rx.el.td(r.avg, class_name=TD_CLASS),
+                    rx.el.td(r.max, class_name=TD_CLASS),
+                    rx.el.td(r.p50, class_name=TD_CLASS),
+                    rx.el.td(r.p95, class_name=TD_CLASS),
+                    rx.el.td(r.p99, class_name=TD_CLASS),
+                    rx.el.td(r.cpu_p50, class_name=TD_CLASS),
+                    rx.el.td(r.rss_p95, class_name=TD_CLASS),
+                    rx.el.td(r.output_avg, class_name=TD_CLASS),
+                    rx.el.td(
+                        rx.text(
+                            r.trend,
+                            color_scheme=rx.cond(r.trend_up, "red", "green"),
+                            size="2",
+                        ),
+                        class_name=TD_CLASS,
+                    ),
+                    on_click=StatsState.select_script(r.relpath),
+                    class_name=rx.cond(
+                        StatsState.selected_relpath == r.relpath,
+                        "bg-purple-50 dark:bg-gray-700 cursor-pointer",
+                        "bg-white dark:bg-gray-800 cursor-pointer hover:bg-gray-50",
+                    ),
+                ),
+            ),
+            class_name="bg-white divide-y divide-gray-200 dark:bg-gray-800 dark:divide-gray-700",
+        ),
+        class_name="min-w-full divide-y divide-gray-200 dark:divide-gray-700",
+    )
+
+
+def _trend_chart() -> rx.Component:
+    """Duración diaria (p50 y p95, en segundos) del script seleccionado."""
+    return rx.box(
+        rx.heading(
+            "Evolución diaria de ",
+            rx.code(StatsState.selected_relpath),
+            size="3",
+            mb="2",
+        ),
+        rx.recharts.line_chart(
+            rx.recharts.line(data_key="p50", stroke="#7c3aed", name="p50 (s)"),
+            rx.recharts.line(data_key="p95", stroke="#f59e0b", name="p95 (s)"),
+            rx.recharts.x_axis(data_key="day"),
+            rx.recharts.y_axis(),
+            rx.recharts.cartesian_grid(stroke_dasharray="3 3"),
+            rx.recharts.graphing_tooltip(),
+            rx.recharts.legend(),
+            data=StatsState.daily,
+            height=260,
+            width="100%",
+        ),
+        class_name="bg-white dark:bg-gray-800 border border-gray-200 dark:border-gray-700 rounded-lg p-4 mb-4",
+    )
+
+
+def stats_page() -> rx.Component:
+    """Tablero de rendimiento de scripts (admin)."""
+    return rx.cond(
+        AppState.is_authenticated & AppState.user_is_admin,
+        rx.box(
+            top_bar(),
+            rx.box(
+                sidebar(),
+                rx.box(
+                    rx.hstack(
+                        rx.heading("Rendimiento de scripts", size="6"),
+                        rx.text(
+                            "Últimos ",
+                            StatsState.window_days,
+                            " días",
+                            size="2",
+                            color_scheme="gray",
+                        ),
+                        rx.spacer(),
+                        rx.button("Recalcular", on_click=StatsState.refresh_stats),
+                        align="center",
+                        width="100%",
+                        mb="4",
+                    ),
+                    rx.cond(
+                        StatsState.selected_relpath != "",
+                        _trend_chart(),
+                        rx.fragment(),
+                    ),
+                    rx.box(
+                        _stats_table(),
+                        class_name="shadow overflow-auto border border-gray-200 sm:rounded-lg dark:border-gray-700",
+                    ),
+                    padding="16px",
+                    pt=HEADER_H,
+                ),
+            ),
+            class_name="bg-gray-50 dark:bg-gray-950 min-h-screen font-['Inter']",
+        ),
+        rx.fragment(),
+    )
@@ -0,0 +1,326 @@
+"""
+Servidor de procesos pre-calentados para ejecutar scripts.
+
+Se activa con SCRIPT_EXEC_MODE=prewarm. Cada worker web lanza (una vez) un
+proceso plantilla con `python -m app.prewarm <socket>` que importa por adelantado
+las dependencias pesadas (PREWARM_MODULES) y queda escuchando en un socket Unix.
+Por cada ejecución la plantilla hace fork: el hijo abre una sesión nueva, recibe
+sus propios stdout/stderr, directorio y argv, re-siembra los generadores
+aleatorios y ejecuta el script como `__main__`. La plantilla nunca ejecuta
+scripts, así que cada ejecución parte del mismo estado limpio que un
+intérprete nuevo, salvo por los módulos ya importados y PYTHONHASHSEED, que es
+el de la plantilla.
+
+Este módulo no debe importar nada de la app: la plantilla tiene que quedar
+liviana y sin estado de Reflex ni de la base de datos.
+"""
+
+import asyncio
+import json
+import os
+import resource
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import traceback
+from typing import Any
+
+PREWARM_MODULES = os.getenv("PREWARM_MODULES", "pandas,numpy,sqlalchemy")
+_MAX_REQUEST_BYTES = 64 * 1024
+
+
+def rlimits(limits: dict[str, int] | None) -> list[tuple[int, int, int]]:
+    """
+    (recurso, blando, duro) de los límites de un script: `max_rss_mb` como
+    RLIMIT_DATA (memoria privada escribible, que es la que crece con el heap)
+    y `cpu_seconds` como RLIMIT_CPU (SIGXCPU al llegar al límite, SIGKILL unos
+    segundos después).
+    """
+    result = []
+    if limits and limits.get("max_rss_mb"):
+        data_bytes = limits["max_rss_mb"] * 1024 * 1024
+        result.append((resource.RLIMIT_DATA, data_bytes, data_bytes))
+    if limits and limits.get("cpu_seconds"):
+        cpu = limits["cpu_seconds"]
+        result.append((resource.RLIMIT_CPU, cpu, cpu + 5))
+    return result
+
+
+def apply_limits(limits: dict[str, int] | None) -> None:
+    """Aplica al proceso actual los `rlimits` de un script y su `nice`."""
+    for limit, soft, hard in rlimits(limits):
+        resource.setrlimit(limit, (soft, hard))
+    if limits and limits.get("nice"):
+        os.setpriority(os.PRIO_PROCESS, 0, limits["nice"])
+
+
+def _finalize_interpreter() -> None:
+    """
+    Lo que hace un intérprete al terminar normalmente y `os._exit` se saltea:
+    esperar los hilos no daemon y correr los handlers de `atexit`.
+    """
+    import atexit
+    import threading
+
+    try:
+        threading._shutdown()
+    except BaseException:
+        traceback.print_exc()
+    atexit._run_exitfuncs()
+
+
+def _run_child(request: dict[str, Any], stdout_fd: int, stderr_fd: int) -> None:
+    """Código del proceso hijo: nunca retorna."""
+    code = 1
+    try:
+        os.setsid()
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        for fd in (devnull, stdout_fd, stderr_fd):
+            os.close(fd)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        apply_limits(request.get("limits"))
+        path = request["path"]
+        os.chdir(request.get("cwd") or os.path.dirname(path))
+        sys.argv = [path, *request.get("args", [])]
+        sys.path[0] = os.path.dirname(path)
+        if "random" in sys.modules:
+            sys.modules["random"].seed()
+        if "numpy" in sys.modules:
+            sys.modules["numpy"].random.seed()
+        import runpy
+
+        try:
+            runpy.run_path(path, run_name="__main__")
+            code = 0
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        _finalize_interpreter()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code & 0xFF)
+
+
+def rusage_dict(rusage) -> dict[str, float]:
+    """
+    Datos de `os.wait4` que se registran por ejecución (ru_maxrss está en KiB
+    en Linux). Un hijo de la plantilla no hace exec, así que su pico incluye
+    los módulos pre-cargados que comparte con ella.
+    """
+    return {
+        "max_rss_kb": rusage.ru_maxrss,
+        "user_cpu": rusage.ru_utime,
+        "sys_cpu": rusage.ru_stime,
+    }
+
+
+def serve(socket_path: str) -> None:
+    """Bucle principal de la plantilla: acepta pedidos y hace fork por cada uno."""
+    for module in filter(None, (m.strip() for m in PREWARM_MODULES.split(","))):
+        try:
+            __import__(module)
+        except Exception as e:
+            print(f"prewarm: could not import {module}: {e}", file=sys.stderr)
+    parent_pid = os.getppid()
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(64)
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ, None)
+    children: dict[int, tuple[int, socket.socket]] = {}
+    try:
+        while os.getppid() == parent_pid:
+            for key, _ in selector.select(timeout=1.0):
+                if key.fileobj is listener:
+                    conn, _ = listener.accept()
+                    try:
+                        msg, fds, _, _ = socket.recv_fds(conn, _MAX_REQUEST_BYTES, 2)
+                        request = json.loads(msg)
+                        if len(fds) != 2:
+                            raise ValueError("expected stdout and stderr descriptors")
+                    except Exception as e:
+                        print(f"prewarm: bad request: {e}", file=sys.stderr)
+                        conn.close()
+                        continue
+                    pid = os.fork()
+                    if pid == 0:
+                        selector.close()
+                        listener.close()
+                        conn.close()
+                        for pidfd, other in children.values():
+                            os.close(pidfd)
+                            other.close()
+                        _run_child(request, fds[0], fds[1])
+                    for fd in fds:
+                        os.close(fd)
+                    pidfd = os.pidfd_open(pid)
+                    children[pid] = (pidfd, conn)
+                    selector.register(pidfd, selectors.EVENT_READ, pid)
+                    conn.sendall(json.dumps({"pid": pid}).encode() + b"\n")
+                else:
+                    pid = key.data
+                    pidfd, conn = children.pop(pid)
+                    selector.unregister(pidfd)
+                    os.close(pidfd)
+                    _, status, rusage = os.wait4(pid, 0)
+                    try:
+                        conn.sendall(
+                            json.dumps(
+                                {
+                                    "returncode": os.waitstatus_to_exitcode(status),
+                                    "rusage": rusage_dict(rusage),
+                                }
+                            ).encode()
+                            + b"\n"
+                        )
+                    except OSError:
+                        pass
+                    conn.close()
+    finally:
+        listener.close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+
+
+class PrewarmedProcess:
+    """
+    Proceso lanzado desde la plantilla, con la misma interfaz mínima que
+    `asyncio.subprocess.Process` que usa `utils.stream_script`.
+    """
+
+    def __init__(
+        self,
+        pid: int,
+        stdout: asyncio.StreamReader,
+        stderr: asyncio.StreamReader,
+        control: asyncio.StreamReader,
+        control_writer: asyncio.StreamWriter,
+    ):
+        self.pid = pid
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode: int | None = None
+        self.rusage: dict[str, float] | None = None
+        self._control = control
+        self._control_writer = control_writer
+        # Una sola lectura del resultado: `stream_script` y `cancel_run` pueden
+        # esperar el mismo proceso a la vez, como con `_LocalProcess`.
+        self._exited = asyncio.ensure_future(self._read_result())
+
+    async def _read_result(self) -> int:
+        try:
+            line = await self._control.readline()
+        finally:
+            self._control_writer.close()
+        if not line:
+            raise RuntimeError("prewarm server closed the connection")
+        result = json.loads(line)
+        self.rusage = result.get("rusage")
+        self.returncode = int(result["returncode"])
+        return self.returncode
+
+    async def wait(self) -> int:
+        return await asyncio.shield(self._exited)
+
+
+_server: subprocess.Popen | None = None
+_socket_path = os.path.join(
+    tempfile.gettempdir(), f"vec-tools-prewarm-{os.getpid()}.sock"
+)
+_server_lock: asyncio.Lock | None = None
+
+
+async def _ensure_server() -> str:
+    global _server, _server_lock
+    if _server_lock is None:
+        _server_lock = asyncio.Lock()
+    async with _server_lock:
+        if _server is not None and _server.poll() is None:
+            return _socket_path
+        if os.path.exists(_socket_path):
+            os.unlink(_socket_path)
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        _server = subprocess.Popen(
+            [sys.executable, "-m", "app.prewarm", _socket_path],
+            cwd=project_root,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+        )
+        for _ in range(600):
+            if os.path.exists(_socket_path) or _server.poll() is not None:
+                break
+            await asyncio.sleep(0.05)
+        if not os.path.exists(_socket_path):
+            raise RuntimeError("prewarm server did not start")
+        return _socket_path
+
+
+async def pipe_reader(pipe) -> asyncio.StreamReader:
+    """Envuelve el extremo de lectura de un pipe en un StreamReader de asyncio."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=2**16)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+    return reader
+
+
+async def spawn(
+    path: str, cwd: str | None = None, limits: dict[str, int] | None = None
+) -> PrewarmedProcess:
+    """Ejecuta `path` en un hijo de la plantilla pre-calentada, con `limits` aplicados."""
+    socket_path = await _ensure_server()
+    stdout_r, stdout_w = os.pipe()
+    stderr_r, stderr_w = os.pipe()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        request = json.dumps({"path": path, "cwd": cwd, "limits": limits}).encode()
+        socket.send_fds(sock, [request], [stdout_w, stderr_w])
+    except Exception:
+        sock.close()
+        for fd in (stdout_r, stderr_r):
+            os.close(fd)
+        raise
+    finally:
+        os.close(stdout_w)
+        os.close(stderr_w)
+    sock.setblocking(False)
+    control, control_writer = await asyncio.open_unix_connection(sock=sock)
+    line = await control.readline()
+    if not line:
+        control_writer.close()
+        for fd in (stdout_r, stderr_r):
+            os.close(fd)
+        raise RuntimeError("prewarm server rejected the request")
+    pid = int(json.loads(line)["pid"])
+    return PrewarmedProcess(
+        pid,
+        await pipe_reader(os.fdopen(stdout_r, "rb", 0)),
+        await pipe_reader(os.fdopen(stderr_r, "rb", 0)),
+        control,
+        control_writer,
+    )
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1])
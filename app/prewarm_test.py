@@ -0,0 +1,40 @@
+import asyncio
+import subprocess
+import sys
+import textwrap
+
+from app import prewarm
+
+SCRIPT = textwrap.dedent(
+    """
+    import atexit
+    import threading
+    import time
+
+    def work():
+        time.sleep(0.2)
+        print("thread done", flush=True)
+
+    atexit.register(lambda: print("atexit ran", flush=True))
+    threading.Thread(target=work).start()
+    print("main done", flush=True)
+    """
+)
+
+
+async def _run_prewarmed(path: str) -> tuple[int, str]:
+    process = await prewarm.spawn(path)
+    stdout = await process.stdout.read()
+    await process.stderr.read()
+    return await process.wait(), stdout.decode()
+
+
+def test_prewarm_runs_threads_and_atexit_like_a_new_interpreter(tmp_path):
+    script = tmp_path / "script.py"
+    script.write_text(SCRIPT)
+    expected = subprocess.run(
+        [sys.executable, str(script)], capture_output=True, text=True, check=True
+    ).stdout
+    returncode, stdout = asyncio.run(_run_prewarmed(str(script)))
+    assert returncode == 0
+    assert stdout == expected == "main done\nthread done\natexit ran\n"
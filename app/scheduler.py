@@ -0,0 +1,127 @@
+import asyncio
+import itertools
+import os
+from typing import Any
+
+MAX_PARALLEL_RUNS = int(os.getenv("MAX_PARALLEL_RUNS", "4"))
+MAX_RUNS_PER_USER = int(os.getenv("MAX_RUNS_PER_USER", "2"))
+
+
+class RunScheduler:
+    """
+    Cola de ejecuciones compartida por todas las sesiones del proceso.
+
+    Limita las ejecuciones simultáneas a `max_parallel` en total y a
+    `max_per_user` por usuario; cada script puede declarar además su propio
+    límite (`max_concurrency` en tools.json). Entre las ejecuciones en espera
+    se atiende primero al usuario con menos ejecuciones en curso y, a igualdad,
+    a la que llegó antes, de modo que nadie monopoliza los slots.
+
+    Cada vez que la cola cambia (al encolar, arrancar, liberar o retirar) se
+    recalculan las posiciones de todos los que esperan y se despierta a los
+    que cambiaron de posición, así `wait_change` no necesita sondear.
+    """
+
+    def __init__(self, max_parallel: int, max_per_user: int):
+        self.max_parallel = max_parallel
+        self.max_per_user = max_per_user
+        self._seq = itertools.count(1)
+        self._waiting: dict[int, dict[str, Any]] = {}
+        self._running: dict[int, dict[str, Any]] = {}
+
+    def _running_for(self, key: str, value: Any) -> int:
+        return sum(1 for t in self._running.values() if t[key] == value)
+
+    def _queue_order(self) -> list[dict[str, Any]]:
+        return sorted(
+            self._waiting.values(),
+            key=lambda t: (self._running_for("user_id", t["user_id"]), t["id"]),
+        )
+
+    def _can_start(self, ticket: dict[str, Any]) -> bool:
+        if len(self._running) >= self.max_parallel:
+            return False
+        if (
+            self.max_per_user > 0
+            and self._running_for("user_id", ticket["user_id"]) >= self.max_per_user
+        ):
+            return False
+        limit = ticket["script_limit"]
+        if limit > 0 and self._running_for("relpath", ticket["relpath"]) >= limit:
+            return False
+        return True
+
+    @staticmethod
+    def _wake(ticket: dict[str, Any]) -> None:
+        ticket["changed"].set()
+        ticket["changed"] = asyncio.Event()
+
+    def _dispatch(self) -> None:
+        """Arranca lo que entre en los slots libres y publica las posiciones."""
+        started = True
+        while started and len(self._running) < self.max_parallel:
+            started = False
+            for ticket in self._queue_order():
+                if self._can_start(ticket):
+                    del self._waiting[ticket["id"]]
+                    self._running[ticket["id"]] = ticket
+                    ticket["position"] = 0
+                    self._wake(ticket)
+                    started = True
+                    break
+        for position, ticket in enumerate(self._queue_order(), start=1):
+            if ticket["position"] != position:
+                ticket["position"] = position
+                self._wake(ticket)
+
+    def submit(self, user_id: int | None, relpath: str, script_limit: int = 0) -> int:
+        """Encola una ejecución y devuelve su ticket."""
+        ticket = {
+            "id": next(self._seq),
+            "user_id": user_id,
+            "relpath": relpath,
+            "script_limit": script_limit,
+            "position": 0,
+            "changed": asyncio.Event(),
+        }
+        self._waiting[ticket["id"]] = ticket
+        self._dispatch()
+        return ticket["id"]
+
+    def position(self, ticket_id: int) -> int:
+        """Posición en la cola (1 = el próximo); 0 si ya está en ejecución o no existe."""
+        ticket = self._waiting.get(ticket_id)
+        return ticket["position"] if ticket is not None else 0
+
+    def is_running(self, ticket_id: int) -> bool:
+        return ticket_id in self._running
+
+    async def wait_change(self, ticket_id: int) -> None:
+        """
+        Espera a que el ticket en cola cambie de posición, arranque o sea
+        retirado. Vuelve enseguida si ya no está en la cola.
+        """
+        ticket = self._waiting.get(ticket_id)
+        if ticket is not None:
+            await ticket["changed"].wait()
+
+    def withdraw(self, ticket_id: int) -> bool:
+        """Retira un ticket que todavía espera; False si ya arrancó o no existe."""
+        ticket = self._waiting.pop(ticket_id, None)
+        if ticket is None:
+            return False
+        self._wake(ticket)
+        self._dispatch()
+        return True
+
+    def release(self, ticket_id: int) -> None:
+        """Libera el slot (o retira de la cola) y arranca las siguientes ejecuciones."""
+        ticket = self._running.pop(ticket_id, None) or self._waiting.pop(
+            ticket_id, None
+        )
+        if ticket is not None:
+            self._wake(ticket)
+        self._dispatch()
+
+
+scheduler = RunScheduler(MAX_PARALLEL_RUNS, MAX_RUNS_PER_USER)
@@ -0,0 +1,81 @@
+import asyncio
+
+from app.scheduler import RunScheduler
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_parallel_per_user_and_per_script_limits():
+    async def scenario():
+        scheduler = RunScheduler(max_parallel=3, max_per_user=2)
+        a1 = scheduler.submit(1, "a.py")
+        a2 = scheduler.submit(1, "b.py")
+        a3 = scheduler.submit(1, "c.py")
+        b1 = scheduler.submit(2, "solo.py", script_limit=1)
+        b2 = scheduler.submit(2, "solo.py", script_limit=1)
+        running = [t for t in (a1, a2, a3, b1, b2) if scheduler.is_running(t)]
+        assert running == [a1, a2, b1]
+        assert scheduler.position(a3) and scheduler.position(b2)
+        scheduler.release(b1)
+        # El slot libre es de b2 (mismo script, ahora sin otra instancia).
+        assert scheduler.is_running(b2)
+        assert not scheduler.is_running(a3)
+        scheduler.release(a1)
+        assert scheduler.is_running(a3)
+
+    _run(scenario())
+
+
+def test_user_with_fewer_running_jobs_goes_first():
+    async def scenario():
+        scheduler = RunScheduler(max_parallel=2, max_per_user=0)
+        scheduler.submit(1, "a.py")
+        first = scheduler.submit(1, "a.py")
+        heavy = scheduler.submit(1, "a.py")
+        light = scheduler.submit(2, "a.py")
+        assert scheduler.position(light) == 1
+        assert scheduler.position(heavy) == 2
+        scheduler.release(first)
+        assert scheduler.is_running(light)
+        assert scheduler.position(heavy) == 1
+
+    _run(scenario())
+
+
+def test_positions_are_published_without_polling():
+    async def scenario():
+        scheduler = RunScheduler(max_parallel=1, max_per_user=0)
+        running = scheduler.submit(1, "a.py")
+        first = scheduler.submit(2, "a.py")
+        second = scheduler.submit(3, "a.py")
+        assert (scheduler.position(first), scheduler.position(second)) == (1, 2)
+        waiter = asyncio.ensure_future(scheduler.wait_change(second))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        scheduler.release(running)
+        await asyncio.wait_for(waiter, timeout=1)
+        assert scheduler.is_running(first)
+        assert scheduler.position(second) == 1
+
+    _run(scenario())
+
+
+def test_withdraw_wakes_the_waiter_and_moves_the_queue():
+    async def scenario():
+        scheduler = RunScheduler(max_parallel=1, max_per_user=0)
+        running = scheduler.submit(1, "a.py")
+        first = scheduler.submit(2, "a.py")
+        second = scheduler.submit(3, "a.py")
+        waiters = [
+            asyncio.ensure_future(scheduler.wait_change(t)) for t in (first, second)
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.withdraw(first)
+        await asyncio.wait_for(asyncio.gather(*waiters), timeout=1)
+        assert scheduler.position(first) == 0
+        assert scheduler.position(second) == 1
+        assert not scheduler.withdraw(running)
+
+    _run(scenario())
@@ -0,0 +1,230 @@
+import bisect
+import collections
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from typing import Any, Iterable, Mapping
+from . import catalog, metadata
+
+SEARCH_FIELD_WEIGHTS = {
+    "name": 5.0,
+    "title": 4.0,
+    "group": 2.0,
+    "relpath": 2.0,
+    "desc": 1.0,
+}
+SEARCH_MIN_SIMILARITY = 0.4
+SEARCH_MAX_FUZZY_TOKENS = 20
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_index_lock = threading.Lock()
+_indexes: dict[str, "ToolSearchIndex"] = {}
+
+
+def normalize(text: str) -> str:
+    """Minúsculas y sin acentos ("Configuración" -> "configuracion")."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def _trigrams(token: str) -> set[str]:
+    padded = f"  {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class ToolSearchIndex:
+    """
+    Índice invertido en memoria sobre nombre, título, descripción, grupo y ruta
+    de los scripts de un snapshot de descubrimiento. Cada término de la consulta
+    se resuelve por token exacto, por prefijo (búsqueda binaria sobre los tokens
+    ordenados) o por similitud de trigramas, y los scripts deben coincidir con
+    todos los términos; el puntaje suma el peso del campo por la calidad de la
+    coincidencia.
+
+    Los metadatos del docstring (ver `app.metadata`) llegan después de armar
+    el índice y se suman con `add_fields`.
+    """
+
+    def __init__(self, tools: Iterable[Mapping[str, Any]], version: int = 0):
+        self.version = version
+        self.metadata_generation = -1
+        self._with_metadata: set[int] = set()
+        self.relpaths: list[str] = []
+        self._sort_keys: list[str] = []
+        postings: dict[str, dict[int, float]] = collections.defaultdict(dict)
+        for doc_id, tool in enumerate(tools):
+            self.relpaths.append(tool["relpath"])
+            self._sort_keys.append(normalize(tool.get("title") or tool["name"]))
+            for field, weight in SEARCH_FIELD_WEIGHTS.items():
+                for token in tokenize(str(tool.get(field) or "")):
+                    doc_weights = postings[token]
+                    if doc_weights.get(doc_id, 0.0) < weight:
+                        doc_weights[doc_id] = weight
+        self._postings = dict(postings)
+        self._tokens = sorted(self._postings)
+        self._trigram_tokens: dict[str, list[str]] = collections.defaultdict(list)
+        for token in self._tokens:
+            for gram in _trigrams(token):
+                self._trigram_tokens[gram].append(token)
+        self._doc_ids = {relpath: i for i, relpath in enumerate(self.relpaths)}
+
+    def __len__(self) -> int:
+        return len(self.relpaths)
+
+    def add_fields(self, relpath: str, fields: Mapping[str, str]) -> None:
+        """Indexa campos de `relpath` que no estaban al construir el índice."""
+        doc_id = self._doc_ids[relpath]
+        for field, text in fields.items():
+            weight = SEARCH_FIELD_WEIGHTS.get(field)
+            if not weight:
+                continue
+            for token in tokenize(text):
+                doc_weights = self._postings.get(token)
+                if doc_weights is None:
+                    doc_weights = self._postings[token] = {}
+                    bisect.insort(self._tokens, token)
+                    for gram in _trigrams(token):
+                        self._trigram_tokens[gram].append(token)
+                if doc_weights.get(doc_id, 0.0) < weight:
+                    doc_weights[doc_id] = weight
+        if fields.get("title"):
+            self._sort_keys[doc_id] = normalize(fields["title"])
+
+    def sync_metadata(self, root_path: str, snapshot: "catalog.Catalog") -> None:
+        """
+        Indexa los metadatos ya calculados de los scripts que todavía no los
+        tenían; `tools.json` tiene prioridad, como en las tarjetas. Los que
+        faltan se encolan en el pool de `app.metadata`, así la búsqueda llega
+        a cubrir todo el árbol y no sólo las tarjetas que se mostraron.
+        """
+        generation = metadata.generation()
+        for doc_id, relpath in enumerate(self.relpaths):
+            if doc_id in self._with_metadata:
+                continue
+            extra = metadata.lookup(
+                os.path.join(root_path, relpath), snapshot.file_keys.get(relpath)
+            )
+            if extra is None:
+                continue
+            self._with_metadata.add(doc_id)
+            tool = snapshot.get(relpath) or {}
+            fields = {key: value for key, value in extra.items() if not tool.get(key)}
+            if fields:
+                self.add_fields(relpath, fields)
+        self.metadata_generation = generation
+
+    def _fuzzy_tokens(self, term: str) -> list[tuple[str, float]]:
+        grams = _trigrams(term)
+        hits: collections.Counter[str] = collections.Counter()
+        for gram in grams:
+            hits.update(self._trigram_tokens.get(gram, ()))
+        matches = []
+        for token, shared in hits.items():
+            similarity = shared / (len(grams) + len(token) + 1 - shared)
+            if similarity >= SEARCH_MIN_SIMILARITY:
+                matches.append((token, similarity))
+        matches.sort(key=lambda m: -m[1])
+        return matches[:SEARCH_MAX_FUZZY_TOKENS]
+
+    def _term_scores(self, term: str) -> dict[int, float]:
+        """Puntaje por documento de un término de la consulta."""
+        scores: dict[int, float] = {}
+
+        def add(token: str, quality: float) -> None:
+            for doc_id, weight in self._postings[token].items():
+                score = weight * quality
+                if scores.get(doc_id, 0.0) < score:
+                    scores[doc_id] = score
+
+        start = bisect.bisect_left(self._tokens, term)
+        for token in self._tokens[start:]:
+            if not token.startswith(term):
+                break
+            add(token, 3.0 if token == term else 2.0)
+        if len(term) >= 3:
+            for token, similarity in self._fuzzy_tokens(term):
+                add(token, similarity)
+        return scores
+
+    def search(
+        self,
+        query: str,
+        allowed: Iterable[str] | None = None,
+        limit: int | None = None,
+    ) -> list[str]:
+        """
+        Devuelve las rutas relativas que coinciden con `query`, de la más a la
+        menos relevante. `allowed` restringe el resultado a esas rutas.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        totals: dict[int, float] | None = None
+        for term in dict.fromkeys(terms):
+            scores = self._term_scores(term)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {
+                    doc_id: total + scores[doc_id]
+                    for doc_id, total in totals.items()
+                    if doc_id in scores
+                }
+            if not totals:
+                return []
+        if allowed is not None:
+            allowed_ids = {
+                self._doc_ids[relpath]
+                for relpath in allowed
+                if relpath in self._doc_ids
+            }
+            totals = {d: s for d, s in totals.items() if d in allowed_ids}
+        ranked = sorted(totals, key=lambda d: (-totals[d], self._sort_keys[d]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self.relpaths[d] for d in ranked]
+
+
+def get_index(root_path: str) -> ToolSearchIndex:
+    """
+    Índice del snapshot de descubrimiento actual de `root_path`. Se construye
+    una sola vez por versión y se comparte entre todas las sesiones; los
+    metadatos calculados desde la última consulta se le suman al pedirlo.
+    """
+    snapshot = catalog.current(root_path)
+    index = _indexes.get(root_path)
+    if index is not None and index.version == snapshot.version:
+        if index.metadata_generation == metadata.generation():
+            return index
+    with _index_lock:
+        index = _indexes.get(root_path)
+        if index is None or index.version != snapshot.version:
+            started = time.perf_counter()
+            index = ToolSearchIndex(snapshot.tools, snapshot.version)
+            _indexes[root_path] = index
+            logging.info(
+                f"Search index for {root_path} v{snapshot.version}: "
+                f"{len(index)} scripts in "
+                f"{(time.perf_counter() - started) * 1000:.0f} ms."
+            )
+        if index.metadata_generation != metadata.generation():
+            index.sync_metadata(root_path, snapshot)
+        return index
+
+
+def search_tools(
+    root_path: str,
+    query: str,
+    allowed: Iterable[str] | None = None,
+    limit: int | None = None,
+) -> list[str]:
+    """Atajo de `get_index(root_path).search(...)`."""
+    return get_index(root_path).search(query, allowed=allowed, limit=limit)
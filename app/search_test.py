@@ -0,0 +1,82 @@
+import os
+
+from app import catalog, metadata, search
+
+TOOLS = [
+    {
+        "relpath": "red/backup.py",
+        "name": "backup",
+        "title": "Respaldo",
+        "group": "red",
+        "desc": "Copia la configuración de los routers",
+    },
+    {
+        "relpath": "red/routers.py",
+        "name": "routers",
+        "title": "Routers",
+        "group": "red",
+        "desc": "Lista los equipos",
+    },
+    {
+        "relpath": "usuarios/alta.py",
+        "name": "alta",
+        "title": "Alta de usuario",
+        "group": "usuarios",
+        "desc": "Crea la cuenta y hace backup del perfil",
+    },
+]
+
+
+def test_name_match_outranks_description_match():
+    index = search.ToolSearchIndex(TOOLS)
+    assert index.search("routers") == ["red/routers.py", "red/backup.py"]
+    assert index.search("backup") == ["red/backup.py", "usuarios/alta.py"]
+
+
+def test_prefix_accent_and_fuzzy_matches():
+    index = search.ToolSearchIndex(TOOLS)
+    assert index.search("rout")[0] == "red/routers.py"
+    assert index.search("configuracion") == ["red/backup.py"]
+    assert index.search("respaldos") == ["red/backup.py"]
+
+
+def test_every_term_must_match_and_allowed_filters():
+    index = search.ToolSearchIndex(TOOLS)
+    assert index.search("backup perfil") == ["usuarios/alta.py"]
+    assert index.search("backup inexistente") == []
+    assert index.search("backup", allowed=["usuarios/alta.py"]) == [
+        "usuarios/alta.py"
+    ]
+    assert index.search("backup", limit=1) == ["red/backup.py"]
+
+
+def test_add_fields_makes_new_words_searchable():
+    index = search.ToolSearchIndex(TOOLS)
+    assert index.search("firewall") == []
+    index.add_fields("red/routers.py", {"desc": "Revisa reglas del firewall"})
+    assert index.search("firewall") == ["red/routers.py"]
+    assert index.search("firew") == ["red/routers.py"]
+    assert index.search("routers") == ["red/routers.py", "red/backup.py"]
+
+
+def test_get_index_picks_up_docstring_metadata(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    tools = [
+        {"relpath": "limpieza.py", "name": "limpieza", "group": "varios"},
+        {"relpath": "otro.py", "name": "otro", "group": "varios", "desc": "Fijo"},
+    ]
+    (tmp_path / "limpieza.py").write_text('"""Purga temporales viejos."""\n')
+    (tmp_path / "otro.py").write_text('"""Ignorado por tools.json."""\n')
+    file_keys = {}
+    for tool in tools:
+        stat = os.stat(tmp_path / tool["relpath"])
+        file_keys[tool["relpath"]] = (stat.st_mtime_ns, stat.st_size)
+    snapshot = catalog.Catalog(1, tools, file_keys)
+    monkeypatch.setattr(catalog, "current", lambda root_path: snapshot)
+    monkeypatch.setattr(search, "_indexes", {})
+
+    # La primera consulta encola el cálculo de los metadatos.
+    assert search.search_tools(root, "temporales") == []
+    metadata.wait_for([os.path.join(root, t["relpath"]) for t in tools], 10)
+    assert search.search_tools(root, "temporales") == ["limpieza.py"]
+    assert search.search_tools(root, "ignorado") == []
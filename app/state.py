@@ -1,9 +1,45 @@
 import reflex as rx
+import asyncio
+import datetime
 import os
 from typing import TypedDict, cast, Optional
-from . import utils
-from .database import get_session, init_db, verify_password, sync_permissions
-from .models import User as UserModel, UserPermission
+from . import catalog, jobs, metadata, search, stats, utils
+from .database import (
+    ensure_db,
+    get_session,
+    get_user_relpaths,
+    sync_permissions,
+    verify_password_async,
+)
+from .models import User as UserModel
+
+
+LIMIT_MESSAGES = {
+    "timeout": "El script superó su tiempo límite y fue detenido.",
+    "memory_limit": "El script superó su límite de memoria y fue detenido.",
+    "cpu_limit": "El script superó su límite de CPU y fue detenido.",
+}
+
+
+JOBS_REFRESH_SECONDS = float(os.getenv("JOBS_REFRESH_SECONDS", "3"))
+TOOLS_PAGE_SIZE = int(os.getenv("TOOLS_PAGE_SIZE", "60"))
+TOOLS_MAX_CARDS = int(os.getenv("TOOLS_MAX_CARDS", "240"))
+METADATA_WAIT_SECONDS = float(os.getenv("METADATA_WAIT_SECONDS", "10"))
+
+_TOOLS_NEAR_END_JS = """
+(() => {
+    const el = document.getElementById("tools-scroll");
+    return !!el && el.scrollTop + el.clientHeight >= el.scrollHeight - 600;
+})()
+"""
+
+
+class JobInfo(TypedDict):
+    run_id: str
+    relpath: str
+    status: str
+    started_at: str
+    active: bool
 
 
 class Tool(TypedDict):
@@ -15,6 +51,16 @@ class Tool(TypedDict):
     icon: str
 
 
+class ToolGroup(TypedDict):
+    name: str
+    tools: list[Tool]
+
+
+class GroupInfo(TypedDict):
+    name: str
+    count: int
+
+
 class AppState(rx.State):
     @rx.event
     def get_user_id(self) -> int | None:
@@ -32,42 +78,85 @@ class AppState(rx.State):
     user: Optional[str] = None
     user_id: Optional[int] = None
     user_is_admin: bool = False
-    user_permissions: set[str] = set()
     error_message: str = ""
-    tools: list[Tool] = []
-    groups: dict[str, list[Tool]] = {}
+    group_summaries: list[GroupInfo] = []
+    tool_window: list[ToolGroup] = []
+    tools_offset: int = 0
+    tools_end: int = 0
+    tools_total: int = 0
+    selected_group: str = ""
+    catalog_version: int = 0
     running: bool = False
     selected_relpath: str = ""
     stdout: str = ""
     stderr: str = ""
+    run_id: str = ""
+    output_truncated: bool = False
+    output_logged: bool = False
+    stdout_bytes: int = 0
+    stderr_bytes: int = 0
+    log_stream: str = ""
+    log_page: int = 0
+    log_text: str = ""
+    queue_position: int = 0
     modal_open: bool = False
+    db_ready: bool = True
+    tool_stats: dict[str, str] = {}
+    cancel_requested: bool = False
+    cached_at: str = ""
+    my_jobs: list[JobInfo] = []
+    search_query: str = ""
+    search_results: list[Tool] = []
+    search_total: int = 0
+    _visible_relpaths: list[str] = []
+    _search_matches: list[str] = []
+    _metadata_pending: bool = False
+    _watching_jobs: bool = False
     tools_root_abs: str = os.getenv(
         "TOOLS_ROOT_ABS", os.path.join(os.getcwd(), "support_scripts")
     )
 
+    @rx.var
+    def active_jobs_count(self) -> int:
+        return sum(1 for job in self.my_jobs if job["active"])
+
     @rx.var
     def selected_tool_title(self) -> str:
         """
         Devuelve el t	ulo de la herramienta actualmente seleccionada para el modal.
         """
-        for tool in self.tools:
-            if tool["relpath"] == self.selected_relpath:
-                return tool.get("title") or tool.get("name")
+        snapshot = catalog.get(self.tools_root_abs, self.catalog_version)
+        tool = snapshot.get(self.selected_relpath)
+        if tool is not None:
+            extra = metadata.lookup(
+                os.path.join(self.tools_root_abs, self.selected_relpath),
+                snapshot.file_keys.get(self.selected_relpath),
+            )
+            return tool.get("title") or (extra or {}).get("title") or tool.get("name")
         return "Resultado de Ejecuci\tn"
 
     @rx.var
-    def groups_list(self) -> list[tuple[str, list[Tool]]]:
+    def log_page_count(self) -> int:
         """
-        Convierte el diccionario de grupos a una lista de tuplas para usar en rx.foreach.
+        Cantidad de páginas de la salida completa del stream que se está viendo.
         """
-        return sorted(list(self.groups.items()))
+        total = self.stderr_bytes if self.log_stream == "stderr" else self.stdout_bytes
+        return max(1, -(-total // utils.LOG_PAGE_BYTES))
 
     @rx.var
     def has_tools(self) -> bool:
         """
         Devuelve True si hay al menos un grupo de herramientas.
         """
-        return len(self.groups) > 0
+        return self.tools_total > 0
+
+    @rx.var
+    def has_more_tools(self) -> bool:
+        return self.tools_end < self.tools_total
+
+    @rx.var
+    def has_previous_tools(self) -> bool:
+        return self.tools_offset > 0
 
     @rx.var
     def is_authenticated(self) -> bool:
@@ -77,7 +166,7 @@ class AppState(rx.State):
         return self.user_id is not None
 
     @rx.event
-    def login(self, form_data: dict):
+    async def login(self, form_data: dict):
         """
         Valida las credenciales contra la base de datos y establece el estado de la sesión.
         Reflex se encarga de persistir el estado automáticamente.
@@ -88,17 +177,19 @@ class AppState(rx.State):
             user_in_db = (
                 db.query(UserModel).filter(UserModel.username == username).first()
             )
-            if user_in_db and verify_password(password, user_in_db.password_hash):
-                self.user_id = int(user_in_db.id)
-                self.user = user_in_db.username
-                self.user_is_admin = user_in_db.is_admin
-                self.error_message = ""
-                return rx.redirect("/home")
-            else:
-                self.error_message = "Usuario o contraseña incorrectos."
-                self.user_id = None
-                self.user = None
-                self.user_is_admin = False
+        if user_in_db and await verify_password_async(
+            password, user_in_db.password_hash
+        ):
+            self.user_id = int(user_in_db.id)
+            self.user = user_in_db.username
+            self.user_is_admin = user_in_db.is_admin
+            self.error_message = ""
+            return rx.redirect("/home")
+        else:
+            self.error_message = "Usuario o contraseña incorrectos."
+            self.user_id = None
+            self.user = None
+            self.user_is_admin = False
 
     @rx.event
     def logout(self):
@@ -111,70 +202,427 @@ class AppState(rx.State):
     @rx.event
     async def on_load(self):
         """
-        Se ejecuta al cargar la página. Inicializa la BD y descubre las herramientas.
-        """
-        init_db()
-        if self.is_authenticated:
-            all_discovered_tools = utils.discover_tools(self.tools_root_abs)
-            sync_permissions(all_discovered_tools)
-            with get_session() as db:
-                if self.user_is_admin:
-                    from app.states.admin_state import AdminState
-
-                    admin_state = await self.get_state(AdminState)
-                    await admin_state.load_users()
-                    self.tools = all_discovered_tools
-                    self.user_permissions = set(
-                        (tool["relpath"] for tool in all_discovered_tools)
-                    )
-                else:
-                    user_perms = (
-                        db.query(UserPermission)
-                        .join(UserPermission.permission)
-                        .filter(UserPermission.user_id == self.user_id)
-                        .all()
-                    )
-                    allowed_relpaths = {
-                        up.permission.script_relpath for up in user_perms
-                    }
-                    self.user_permissions = allowed_relpaths
-                    self.tools = [
-                        cast(Tool, t)
-                        for t in all_discovered_tools
-                        if t["relpath"] in allowed_relpaths
-                    ]
-            new_groups = {}
-            for tool in self.tools:
-                group_name = tool["group"]
-                if group_name not in new_groups:
-                    new_groups[group_name] = []
-                new_groups[group_name].append(tool)
-            self.groups = new_groups
+        Se ejecuta al cargar la página. Comprueba que la BD esté inicializada
+        y descubre las herramientas.
+        """
+        self.db_ready = ensure_db()
+        if self.is_authenticated and self.db_ready:
+            snapshot = catalog.current(self.tools_root_abs)
+            sync_permissions(snapshot.tools)
+            self.catalog_version = snapshot.version
+            if self.user_is_admin:
+                from app.states.admin_state import AdminState
+
+                admin_state = await self.get_state(AdminState)
+                await admin_state.load_users()
+                self._visible_relpaths = []
+                self.tools_total = len(snapshot)
+                self.group_summaries = [
+                    {"name": name, "count": count}
+                    for name, count in snapshot.groups.items()
+                ]
+            else:
+                self._visible_relpaths = snapshot.visible(
+                    get_user_relpaths(self.user_id)
+                )
+                self.tools_total = len(self._visible_relpaths)
+                group_counts: dict[str, int] = {}
+                for relpath in self._visible_relpaths:
+                    group = snapshot.get(relpath)["group"]
+                    group_counts[group] = group_counts.get(group, 0) + 1
+                self.group_summaries = [
+                    {"name": name, "count": count}
+                    for name, count in group_counts.items()
+                ]
+            stats.refresh_in_background()
+            start = self._group_start(self.selected_group)
+            self._set_tool_window(start, min(self.tools_total, start + TOOLS_PAGE_SIZE))
+            self._apply_search()
+            self.my_jobs = await self._fetch_jobs()
+            events = [self._metadata_followup()]
+            if any(job["active"] for job in self.my_jobs):
+                events.append(AppState.watch_jobs)
+            return [event for event in events if event is not None]
+        else:
+            self.catalog_version = 0
+            self._visible_relpaths = []
+            self.group_summaries = []
+            self.tools_total = 0
+            self._set_tool_window(0, 0)
+            self._search_matches = []
+            self._show_search_results(0)
+
+    def _catalog(self) -> catalog.Catalog:
+        return catalog.get(self.tools_root_abs, self.catalog_version)
+
+    def _visible_tools(self, start: int, end: int) -> list[Tool]:
+        """
+        Herramientas [start, end) de las que ve el usuario, leídas del catálogo
+        compartido; la sesión sólo guarda la versión y las rutas permitidas.
+        """
+        snapshot = self._catalog()
+        if self.user_is_admin:
+            tools = snapshot.tools[start:end]
+        else:
+            tools = [snapshot.get(r) for r in self._visible_relpaths[start:end]]
+        return self._with_metadata([dict(tool) for tool in tools if tool is not None])
+
+    def _with_metadata(self, tools: list[dict]) -> list[Tool]:
+        """Completa las tarjetas con los metadatos de los scripts ya calculados."""
+        if metadata.enrich(self.tools_root_abs, tools, self._catalog().file_keys):
+            self._metadata_pending = True
+        return [cast(Tool, tool) for tool in tools]
+
+    def _metadata_followup(self):
+        """Evento a encadenar si quedaron tarjetas esperando sus metadatos."""
+        if self._metadata_pending:
+            self._metadata_pending = False
+            return AppState.fill_metadata
+
+    @rx.event(background=True)
+    async def fill_metadata(self):
+        """Rearma las tarjetas montadas cuando terminan de calcularse sus metadatos."""
+        async with self:
+            paths = [
+                os.path.join(self.tools_root_abs, tool["relpath"])
+                for group in self.tool_window
+                for tool in group["tools"]
+            ] + [
+                os.path.join(self.tools_root_abs, tool["relpath"])
+                for tool in self.search_results
+            ]
+        await asyncio.to_thread(metadata.wait_for, paths, METADATA_WAIT_SECONDS)
+        async with self:
+            self._set_tool_window(self.tools_offset, self.tools_end)
+            self._show_search_results(len(self.search_results))
+            self._metadata_pending = False
+
+    def _update_tool_stats(self):
+        """Duración típica sólo de las tarjetas montadas (ventana y búsqueda)."""
+        script_stats = stats.cached_script_stats()
+        mounted = [tool for group in self.tool_window for tool in group["tools"]]
+        self.tool_stats = {
+            tool["relpath"]: label
+            for tool in mounted + self.search_results
+            if (
+                label := stats.typical_duration_label(
+                    script_stats.get(tool["relpath"])
+                )
+            )
+        }
+
+    def _set_tool_window(self, offset: int, end: int):
+        """
+        Deja en el estado sólo las tarjetas [offset, end) del catálogo visible,
+        agrupadas; el resto no se serializa ni se monta en el navegador.
+        """
+        self.tools_offset = offset
+        self.tools_end = end
+        window: list[ToolGroup] = []
+        for tool in self._visible_tools(offset, end):
+            if not window or window[-1]["name"] != tool["group"]:
+                window.append({"name": tool["group"], "tools": []})
+            window[-1]["tools"].append(tool)
+        self.tool_window = window
+        self._update_tool_stats()
+
+    @rx.event
+    def load_more_tools(self):
+        """Agrega la página siguiente y descarta del principio lo que pase del tope."""
+        if self.tools_end >= self.tools_total:
+            return
+        end = min(self.tools_total, self.tools_end + TOOLS_PAGE_SIZE)
+        self._set_tool_window(max(self.tools_offset, end - TOOLS_MAX_CARDS), end)
+        return self._metadata_followup()
+
+    @rx.event
+    def load_previous_tools(self):
+        offset = max(0, self.tools_offset - TOOLS_PAGE_SIZE)
+        self._set_tool_window(offset, min(self.tools_end, offset + TOOLS_MAX_CARDS))
+        return self._metadata_followup()
+
+    @rx.event
+    def check_tools_scroll(self):
+        if self.tools_end < self.tools_total and not self.search_query:
+            return rx.call_script(
+                _TOOLS_NEAR_END_JS, callback=AppState.load_more_tools_if_near_end
+            )
+
+    @rx.event
+    def load_more_tools_if_near_end(self, near_end: bool):
+        if near_end:
+            return self.load_more_tools()
+
+    def _group_start(self, name: str) -> int:
+        """Posición de la primera tarjeta del grupo `name` (0 si no existe)."""
+        start = 0
+        for group in self.group_summaries:
+            if group["name"] == name:
+                return start
+            start += group["count"]
+        return 0
+
+    @rx.event
+    def show_group(self, name: str):
+        """Mueve la ventana al comienzo del grupo elegido en la barra lateral."""
+        self.selected_group = name
+        start = self._group_start(name)
+        self.search_query = ""
+        self._search_matches = []
+        self._show_search_results(0)
+        self._set_tool_window(start, min(self.tools_total, start + TOOLS_PAGE_SIZE))
+        scroll_top = rx.call_script(
+            'document.getElementById("tools-scroll")?.scrollTo({top: 0})'
+        )
+        followup = self._metadata_followup()
+        return [scroll_top] if followup is None else [scroll_top, followup]
+
+    def _show_search_results(self, count: int):
+        snapshot = self._catalog()
+        self.search_total = len(self._search_matches)
+        self.search_results = self._with_metadata(
+            [
+                dict(tool)
+                for relpath in self._search_matches[:count]
+                if (tool := snapshot.get(relpath)) is not None
+            ]
+        )
+        self._update_tool_stats()
+
+    def _apply_search(self):
+        """Herramientas visibles que coinciden con `search_query`, por relevancia."""
+        if self.search_query.strip():
+            self._search_matches = search.search_tools(
+                self.tools_root_abs,
+                self.search_query,
+                allowed=None if self.user_is_admin else self._visible_relpaths,
+            )
         else:
-            self.tools = []
-            self.groups = {}
+            self._search_matches = []
+        self._show_search_results(TOOLS_PAGE_SIZE)
+
+    @rx.event
+    def set_search_query(self, value: str):
+        """Búsqueda de herramientas; el input la envía con debounce."""
+        self.search_query = value
+        self._apply_search()
+        return self._metadata_followup()
+
+    @rx.event
+    def load_more_results(self):
+        self._show_search_results(len(self.search_results) + TOOLS_PAGE_SIZE)
+        return self._metadata_followup()
+
+    @rx.event
+    def clear_search(self):
+        self.search_query = ""
+        self._search_matches = []
+        self._show_search_results(0)
+
+    @rx.event
+    async def refresh_tools(self):
+        """
+        Descarta el snapshot compartido de herramientas y vuelve a escanear el árbol.
+        """
+        if not self.user_is_admin:
+            return rx.toast.error("Only admins can rescan the tools directory.")
+        utils.invalidate_tools_cache(self.tools_root_abs)
+        await self.on_load()
+        return rx.toast.info("Tools rescanned.", duration=1500)
 
     @rx.event(background=True)
-    async def run_tool(self, relpath: str):
+    async def run_tool(self, relpath: str, force: bool = False):
         """
-        Ejecuta un script en un proceso de fondo, verificando permisos primero.
+        Lanza un script como trabajo independiente de la sesión (ver `app.jobs`),
+        verificando permisos primero, y muestra su salida mientras corre. Si el
+        script es cacheable y hay un resultado vigente se muestra ese, salvo
+        con `force`.
         """
-        if not self.user_is_admin and relpath not in self.user_permissions:
+        if not self.user_is_admin and relpath not in await asyncio.to_thread(
+            get_user_relpaths, self.user_id
+        ):
             yield rx.toast.error("You do not have permission to run this script.")
             return
+        cached = (
+            None
+            if force
+            else await asyncio.to_thread(
+                jobs.cached_result, self.tools_root_abs, relpath, self.user_id
+            )
+        )
+        if cached is not None:
+            async with self:
+                self._reset_output_log()
+                self.cancel_requested = False
+                self._apply_job_snapshot(cached)
+                self.cached_at = (
+                    cached["cached_at"]
+                    .replace(tzinfo=datetime.timezone.utc)
+                    .astimezone()
+                    .strftime("%H:%M")
+                )
+                self.modal_open = True
+            return
+        run_id = jobs.start_job(self.tools_root_abs, relpath, self.user_id, self.user)
+        my_jobs = await self._fetch_jobs()
         async with self:
             self.running = True
             self.selected_relpath = relpath
             self.stdout = "Executing script..."
             self.stderr = ""
+            self._reset_output_log()
+            self.run_id = run_id
+            self.cancel_requested = False
             self.modal_open = True
-        result = await utils.run_script(self.tools_root_abs, relpath, timeout=60)
+            self.my_jobs = my_jobs
+        yield AppState.watch_jobs
+        async for toast in self._follow_job(run_id):
+            yield toast
+
+    @rx.event(background=True)
+    async def attach_job(self, run_id: str):
+        """
+        Vuelve a mostrar un trabajo (en curso o terminado) desde cualquier página
+        o sesión del mismo usuario.
+        """
+        snapshot = await jobs.snapshot(run_id, self.user_id, self.user_is_admin)
+        if snapshot is None:
+            yield rx.toast.error("No se encontró la ejecución.")
+            return
+        async with self:
+            self._reset_output_log()
+            self.cancel_requested = False
+            self._apply_job_snapshot(snapshot)
+            self.modal_open = True
+        if not snapshot["done"]:
+            async for toast in self._follow_job(run_id):
+                yield toast
+
+    async def _follow_job(self, run_id: str):
+        """
+        Copia al estado cada cambio del trabajo mientras el modal lo muestre.
+        Si la sesión se va, el trabajo sigue; sólo deja de seguirse aquí.
+        """
+        async for snapshot in jobs.follow(run_id):
+            my_jobs = await self._fetch_jobs() if snapshot["done"] else None
+            async with self:
+                if self.run_id != run_id:
+                    return
+                self._apply_job_snapshot(snapshot)
+                if my_jobs is not None:
+                    self.my_jobs = my_jobs
+            if snapshot["done"] and snapshot["status"] in LIMIT_MESSAGES:
+                yield rx.toast.error(LIMIT_MESSAGES[snapshot["status"]])
+            elif snapshot["done"] and snapshot["status"] == "cancelled":
+                yield rx.toast.info("Ejecución cancelada.")
+
+    def _apply_job_snapshot(self, snapshot: dict):
+        self.run_id = snapshot["run_id"]
+        self.selected_relpath = snapshot["relpath"]
+        self.queue_position = snapshot["queue_position"]
+        self.stdout = snapshot["stdout"]
+        self.stderr = snapshot["stderr"]
+        self.output_truncated = snapshot["truncated"]
+        self.output_logged = snapshot["logged"]
+        self.stdout_bytes = snapshot["stdout_bytes"]
+        self.stderr_bytes = snapshot["stderr_bytes"]
+        self.running = not snapshot["done"]
+        if not self.running and not snapshot["ok"] and not self.stderr:
+            self.stderr = "Script failed without an explicit error (see stdout)."
+        if snapshot["status"] == "running" and not snapshot["stdout"] and self.running:
+            self.stdout = "Executing script..."
+
+    @rx.event
+    def cancel_run(self):
+        """
+        Cancela el trabajo mostrado: si está en cola no llega a lanzarse; si
+        ya corre, se termina todo su grupo de procesos.
+        """
+        if not self.running or not self.run_id:
+            return
+        if jobs.cancel_job(self.run_id, self.user_id, self.user_is_admin):
+            self.cancel_requested = True
+
+    async def _fetch_jobs(self) -> list[JobInfo]:
+        """
+        Trabajos recientes del usuario, listos para `my_jobs`. No toca el
+        estado: los handlers de fondo lo piden fuera de `async with self`.
+        """
+        return [
+            {
+                "run_id": job["run_id"],
+                "relpath": job["relpath"],
+                "status": job["status"],
+                "started_at": job["started_at"].strftime("%d/%m %H:%M"),
+                "active": job["status"] in jobs.ACTIVE_STATUSES,
+            }
+            for job in await jobs.user_jobs(self.user_id)
+        ]
+
+    @rx.event
+    async def refresh_jobs(self):
+        """Actualiza la lista de trabajos recientes del usuario."""
+        self.my_jobs = await self._fetch_jobs()
+
+    @rx.event(background=True)
+    async def watch_jobs(self):
+        """
+        Mientras el usuario tenga trabajos activos, refresca su lista cada pocos
+        segundos (una sola tarea por sesión).
+        """
         async with self:
-            self.stdout = result["stdout"]
-            self.stderr = result["stderr"]
-            if not result["ok"] and (not self.stderr):
-                self.stderr = "Script failed without an explicit error (see stdout)."
-            self.running = False
+            if self._watching_jobs or not self.is_authenticated:
+                return
+            self._watching_jobs = True
+        my_jobs = await self._fetch_jobs()
+        async with self:
+            self.my_jobs = my_jobs
+        try:
+            while True:
+                await asyncio.sleep(JOBS_REFRESH_SECONDS)
+                my_jobs = await self._fetch_jobs()
+                async with self:
+                    self.my_jobs = my_jobs
+                    if not any(job["active"] for job in self.my_jobs):
+                        return
+        finally:
+            async with self:
+                self._watching_jobs = False
+
+    def _reset_output_log(self):
+        self.run_id = ""
+        self.output_truncated = False
+        self.output_logged = False
+        self.stdout_bytes = 0
+        self.stderr_bytes = 0
+        self.log_stream = ""
+        self.log_page = 0
+        self.log_text = ""
+        self.cached_at = ""
+
+    @rx.event
+    async def show_log_page(self, stream: str, page: int):
+        """
+        Carga una página de la salida completa guardada en disco para el modal.
+        """
+        if not self.run_id or self.running:
+            return
+        total = self.stderr_bytes if stream == "stderr" else self.stdout_bytes
+        last_page = max(0, (total - 1) // utils.LOG_PAGE_BYTES)
+        self.log_stream = stream
+        self.log_page = min(max(page, 0), last_page)
+        self.log_text = await asyncio.to_thread(
+            utils.read_run_log, self.run_id, stream, self.log_page
+        )
+
+    @rx.event
+    def hide_log(self):
+        """
+        Vuelve a la vista resumida (principio y final) de la salida.
+        """
+        self.log_stream = ""
+        self.log_page = 0
+        self.log_text = ""
 
     @rx.event
     def close_modal(self):
@@ -182,6 +630,8 @@ class AppState(rx.State):
         Cierra el modal de resultados.
         """
         self.modal_open = False
+        self.running = False
         self.stdout = ""
         self.stderr = ""
+        self._reset_output_log()
         self.selected_relpath = ""
\ No newline at end of file
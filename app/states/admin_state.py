@@ -1,6 +1,10 @@
 import reflex as rx
 from typing import Any, Optional, TypedDict
-from app.database import get_session, hash_password
+from app.database import (
+    get_session,
+    hash_password_async,
+    invalidate_user_permissions,
+)
 from app.models import User as UserModel
 from datetime import datetime
 
@@ -70,6 +74,7 @@ class AdminState(rx.State):
         if new_password != confirm_password:
             self.password_error = "Las contraseñas no coinciden."
             return
+        hashed = await hash_password_async(new_password)
         with get_session() as db:
             user = (
                 db.query(UserModel)
@@ -79,7 +84,7 @@ class AdminState(rx.State):
             if not user:
                 self.password_error = "Usuario no encontrado."
                 return
-            user.password_hash = hash_password(new_password)
+            user.password_hash = hashed
             db.commit()
         self.password_success = (
             f"Contraseña de {self.password_user_username} cambiada exitosamente."
@@ -189,7 +194,7 @@ class AdminState(rx.State):
             if existing_user:
                 self.user_form_error = "Username already exists."
                 return
-            hashed = hash_password(password)
+            hashed = await hash_password_async(password)
             new_user = UserModel(
                 username=username,
                 email=email,
@@ -241,5 +246,6 @@ class AdminState(rx.State):
             if user:
                 db.delete(user)
                 db.commit()
+        invalidate_user_permissions(self.user_to_delete_id)
         await self.load_users()
         return rx.toast.info("User deleted.")
\ No newline at end of file
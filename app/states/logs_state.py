@@ -0,0 +1,205 @@
+import reflex as rx
+from datetime import datetime, timedelta, timezone
+from typing import TypedDict
+from sqlalchemy import select, tuple_
+from app.database import get_session
+from app.models import Execution, User
+from app.state import AppState
+
+
+LOGS_PAGE_SIZE = 100
+EXECUTION_STATUSES = [
+    "running",
+    "ok",
+    "failed",
+    "timeout",
+    "memory_limit",
+    "cpu_limit",
+    "cancelled",
+    "error",
+    "interrupted",
+]
+
+_SCROLL_TOP_JS = "document.getElementById('logs-scroll')?.scrollTo(0, 0)"
+
+
+class ExecutionRow(TypedDict):
+    id: int
+    run_id: str
+    username: str
+    script_relpath: str
+    status: str
+    started_at: str
+    duration: str
+    exit_code: str
+    peak_rss_mb: str
+    output_kb: str
+
+
+def _local_day_start_utc(day: str) -> datetime:
+    """
+    Comienzo del día `day` (AAAA-MM-DD, hora local del servidor) en UTC sin
+    zona, como se guarda `started_at`.
+    """
+    local = datetime.strptime(day, "%Y-%m-%d").astimezone()
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _execution_row(row) -> ExecutionRow:
+    return {
+        "id": row.id,
+        "run_id": row.run_id,
+        "username": row.username or "",
+        "script_relpath": row.script_relpath,
+        "status": row.status,
+        "started_at": row.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "duration": (
+            f"{row.duration_seconds:.1f} s" if row.duration_seconds is not None else ""
+        ),
+        "exit_code": "" if row.exit_code is None else str(row.exit_code),
+        "peak_rss_mb": (
+            f"{row.peak_rss_kb / 1024:.0f} MB" if row.peak_rss_kb is not None else ""
+        ),
+        "output_kb": (
+            f"{row.output_bytes / 1024:.0f} KB" if row.output_bytes is not None else ""
+        ),
+    }
+
+
+class LogsState(rx.State):
+    """
+    Historial de ejecuciones (admin), de a una página por vez. El estado guarda
+    sólo la página visible y los cursores (started_at, id) de su primera y
+    última fila, con los que se pide la página anterior o la siguiente; los
+    filtros se aplican en la consulta y usan los índices de `executions`.
+    """
+
+    rows: list[ExecutionRow] = []
+    page_number: int = 1
+    has_next: bool = False
+    has_previous: bool = False
+    filter_username: str = ""
+    filter_relpath: str = ""
+    filter_status: str = ""
+    filter_date_from: str = ""
+    filter_date_to: str = ""
+    error_message: str = ""
+    _first_key: tuple[datetime, int] | None = None
+    _last_key: tuple[datetime, int] | None = None
+
+    @rx.event
+    def set_filter(self, key: str, value: str):
+        setattr(self, f"filter_{key}", value.strip())
+
+    def _filters(self, db) -> list:
+        conditions = []
+        if self.filter_username:
+            user_id = db.execute(
+                select(User.id).where(User.username == self.filter_username)
+            ).scalar()
+            conditions.append(
+                Execution.user_id == user_id
+                if user_id is not None
+                else Execution.username == self.filter_username
+            )
+        if self.filter_relpath:
+            conditions.append(Execution.script_relpath == self.filter_relpath)
+        if self.filter_status:
+            conditions.append(Execution.status == self.filter_status)
+        if self.filter_date_from:
+            conditions.append(
+                Execution.started_at >= _local_day_start_utc(self.filter_date_from)
+            )
+        if self.filter_date_to:
+            conditions.append(
+                Execution.started_at
+                < _local_day_start_utc(self.filter_date_to) + timedelta(days=1)
+            )
+        return conditions
+
+    async def _fetch_page(self, direction: str = "first") -> bool:
+        """
+        Reemplaza la página visible por la primera, la siguiente (filas más
+        viejas que `_last_key`) o la anterior (más nuevas que `_first_key`).
+        Devuelve False si no se pudo cargar.
+        """
+        if not (await self.get_state(AppState)).user_is_admin:
+            return False
+        key = tuple_(Execution.started_at, Execution.id)
+        try:
+            with get_session() as db:
+                query = select(Execution).where(*self._filters(db))
+                if direction == "next" and self._last_key is not None:
+                    query = query.where(key < tuple_(*self._last_key)).order_by(
+                        Execution.started_at.desc(), Execution.id.desc()
+                    )
+                elif direction == "previous" and self._first_key is not None:
+                    query = query.where(key > tuple_(*self._first_key)).order_by(
+                        Execution.started_at.asc(), Execution.id.asc()
+                    )
+                else:
+                    direction = "first"
+                    query = query.order_by(
+                        Execution.started_at.desc(), Execution.id.desc()
+                    )
+                page = db.execute(query.limit(LOGS_PAGE_SIZE + 1)).scalars().all()
+        except ValueError:
+            self.error_message = "Fecha inválida (formato AAAA-MM-DD)."
+            return False
+        self.error_message = ""
+        more = len(page) > LOGS_PAGE_SIZE
+        page = page[:LOGS_PAGE_SIZE]
+        if direction == "previous":
+            page.reverse()
+        if not page and direction != "first":
+            # Las filas de ese lado ya no existen: se vuelve al principio.
+            return await self._fetch_page()
+        if direction == "first":
+            self.page_number = 1
+            self.has_previous = False
+            self.has_next = more
+        elif direction == "next":
+            self.page_number += 1
+            self.has_previous = True
+            self.has_next = more
+        else:
+            self.page_number = max(1, self.page_number - 1)
+            self.has_previous = more
+            self.has_next = True
+        self.rows = [_execution_row(row) for row in page]
+        self._first_key = (page[0].started_at, page[0].id) if page else None
+        self._last_key = (page[-1].started_at, page[-1].id) if page else None
+        return True
+
+    @rx.event
+    async def on_load_logs(self):
+        """Carga la primera página con los filtros actuales."""
+        if await self._fetch_page():
+            return rx.call_script(_SCROLL_TOP_JS)
+
+    @rx.event
+    async def apply_filters(self):
+        return await self.on_load_logs()
+
+    @rx.event
+    async def clear_filters(self):
+        self.filter_username = ""
+        self.filter_relpath = ""
+        self.filter_status = ""
+        self.filter_date_from = ""
+        self.filter_date_to = ""
+        return await self.on_load_logs()
+
+    @rx.event
+    async def next_page(self):
+        """Página siguiente (ejecuciones más viejas)."""
+        if self.has_next:
+            if await self._fetch_page("next"):
+                return rx.call_script(_SCROLL_TOP_JS)
+
+    @rx.event
+    async def previous_page(self):
+        """Página anterior (ejecuciones más nuevas)."""
+        if self.has_previous:
+            if await self._fetch_page("previous"):
+                return rx.call_script(_SCROLL_TOP_JS)
@@ -1,7 +1,14 @@
 import reflex as rx
 from typing import TypedDict
-from app.database import get_session
+from sqlalchemy import func
+from app.database import get_session, apply_permission_changes, copy_permissions
 from app.models import User, Permission, UserPermission
+from app import search
+from app.state import AppState
+
+
+USERS_PAGE_SIZE = 50
+PERMISSIONS_PAGE_SIZE = 100
 
 
 class UserPermissionInfo(TypedDict):
@@ -17,61 +24,161 @@ class PermissionData(TypedDict):
 
 class PermissionsState(rx.State):
     @rx.event
-    def set_search_term(self, value: str):
+    async def set_search_term(self, value: str):
         self.search_term = value
+        await self._apply_search()
 
     "Manages the state for the permissions page."
     users_with_permissions: list[UserPermissionInfo] = []
-    all_permissions: list[PermissionData] = []
+    users_total: int = 0
+    users_page: int = 0
+    users_sort_by: str = "username"
+    users_sort_desc: bool = False
+    visible_permissions: list[PermissionData] = []
+    filtered_total: int = 0
+    permissions_page: int = 0
     search_term: str = ""
+    _all_permissions: list[PermissionData] = []
+    _filtered_permissions: list[PermissionData] = []
     is_modal_open: bool = False
     selected_user_id: int = -1
     selected_user_username: str = ""
     user_permissions: list[int] = []
+    staged_mode: bool = False
+    pending_grants: list[int] = []
+    pending_revokes: list[int] = []
+    copy_from_username: str = ""
+
+    async def _apply_search(self):
+        """
+        Filtra los permisos con el índice de búsqueda de herramientas; el
+        resultado queda ordenado por relevancia. Un término terminado en "/"
+        selecciona exactamente los scripts bajo esa carpeta.
+        """
+        term = self.search_term.strip()
+        if not term:
+            self._filtered_permissions = self._all_permissions
+        elif term.endswith("/"):
+            self._filtered_permissions = [
+                p for p in self._all_permissions if p["script_relpath"].startswith(term)
+            ]
+        else:
+            tools_root = (await self.get_state(AppState)).tools_root_abs
+            by_relpath = {p["script_relpath"]: p for p in self._all_permissions}
+            self._filtered_permissions = [
+                by_relpath[relpath]
+                for relpath in search.search_tools(
+                    tools_root, term, allowed=by_relpath
+                )
+            ]
+        self.filtered_total = len(self._filtered_permissions)
+        self._show_permissions_page(0)
+
+    def _show_permissions_page(self, page: int):
+        """Sólo la página actual de la lista filtrada se envía al navegador."""
+        last_page = max(0, (self.filtered_total - 1) // PERMISSIONS_PAGE_SIZE)
+        self.permissions_page = min(max(page, 0), last_page)
+        start = self.permissions_page * PERMISSIONS_PAGE_SIZE
+        self.visible_permissions = self._filtered_permissions[
+            start : start + PERMISSIONS_PAGE_SIZE
+        ]
+
+    @rx.event
+    def set_permissions_page(self, page: int):
+        self._show_permissions_page(page)
 
     @rx.var
-    def filtered_permissions(self) -> list[PermissionData]:
-        """Filters permissions based on the search term."""
-        if not self.search_term:
-            return self.all_permissions
+    def effective_permissions(self) -> list[int]:
+        """Permisos del usuario seleccionado incluyendo los cambios pendientes."""
+        revoked = set(self.pending_revokes)
         return [
-            p
-            for p in self.all_permissions
-            if self.search_term.lower() in p["script_relpath"].lower()
-        ]
+            p for p in self.user_permissions if p not in revoked
+        ] + self.pending_grants
+
+    @rx.var
+    def pending_changes(self) -> int:
+        return len(self.pending_grants) + len(self.pending_revokes)
+
+    @rx.var
+    def permissions_page_count(self) -> int:
+        return max(1, -(-self.filtered_total // PERMISSIONS_PAGE_SIZE))
+
+    @rx.var
+    def users_page_count(self) -> int:
+        """Cantidad de páginas de la tabla de usuarios."""
+        return max(1, -(-self.users_total // USERS_PAGE_SIZE))
 
     @rx.event
     async def on_load_permissions(self):
         """Loads all necessary data when the permissions page is accessed."""
         with get_session() as db:
-            users = (
-                db.query(User)
-                .filter(User.is_admin == False)
-                .order_by(User.username)
+            permissions = (
+                db.query(Permission.id, Permission.script_relpath)
+                .filter(Permission.orphaned == False)
+                .order_by(Permission.script_relpath)
                 .all()
             )
-            permissions = db.query(Permission).order_by(Permission.script_relpath).all()
-            self.all_permissions = [
+            self._all_permissions = [
                 {"id": p.id, "script_relpath": p.script_relpath} for p in permissions
             ]
-            user_perms_info = []
-            for user in users:
-                count = (
-                    db.query(UserPermission)
-                    .filter(UserPermission.user_id == user.id)
-                    .count()
-                )
-                user_perms_info.append(
-                    {
-                        "user_id": user.id,
-                        "username": user.username,
-                        "permission_count": count,
-                    }
+        await self._apply_search()
+        self._load_users_page()
+
+    def _load_users_page(self):
+        """
+        Carga una página de usuarios no admin con su cantidad de permisos en una
+        sola consulta agregada, ordenada y paginada en la base de datos.
+        """
+        with get_session() as db:
+            self.users_total = (
+                db.query(func.count(User.id)).filter(User.is_admin == False).scalar()
+                or 0
+            )
+            last_page = max(0, (self.users_total - 1) // USERS_PAGE_SIZE)
+            self.users_page = min(self.users_page, last_page)
+            permission_count = func.count(UserPermission.id).label("permission_count")
+            sort_column = (
+                permission_count
+                if self.users_sort_by == "permission_count"
+                else User.username
+            )
+            rows = (
+                db.query(User.id, User.username, permission_count)
+                .outerjoin(UserPermission, UserPermission.user_id == User.id)
+                .filter(User.is_admin == False)
+                .group_by(User.id, User.username)
+                .order_by(
+                    sort_column.desc() if self.users_sort_desc else sort_column,
+                    User.id,
                 )
-            self.users_with_permissions = user_perms_info
+                .offset(self.users_page * USERS_PAGE_SIZE)
+                .limit(USERS_PAGE_SIZE)
+                .all()
+            )
+        self.users_with_permissions = [
+            {"user_id": row.id, "username": row.username, "permission_count": row[2]}
+            for row in rows
+        ]
 
     @rx.event
-    def open_permissions_modal(self, user_id: int):
+    def sort_users(self, column: str):
+        """Ordena la tabla por `column`; si ya estaba ordenada por ella invierte el orden."""
+        if self.users_sort_by == column:
+            self.users_sort_desc = not self.users_sort_desc
+        else:
+            self.users_sort_by = column
+            self.users_sort_desc = column == "permission_count"
+        self.users_page = 0
+        self._load_users_page()
+
+    @rx.event
+    def set_users_page(self, page: int):
+        """Cambia de página en la tabla de usuarios."""
+        self.users_page = max(page, 0)
+        self._load_users_page()
+
+    @rx.event
+    async def open_permissions_modal(self, user_id: int):
         """Opens the modal to edit permissions for a given user."""
         self.selected_user_id = user_id
         with get_session() as db:
@@ -85,8 +192,10 @@ class PermissionsState(rx.State):
                 .all()
             )
             self.user_permissions = [p[0] for p in permissions]
+        self._clear_pending()
         self.is_modal_open = True
         self.search_term = ""
+        await self._apply_search()
 
     @rx.event
     def close_permissions_modal(self):
@@ -95,40 +204,130 @@ class PermissionsState(rx.State):
         self.selected_user_id = -1
         self.selected_user_username = ""
         self.user_permissions = []
+        self._clear_pending()
         return PermissionsState.on_load_permissions
 
+    def _clear_pending(self):
+        self.pending_grants = []
+        self.pending_revokes = []
+
+    def _reload_selected_permissions(self):
+        with get_session() as db:
+            permissions = (
+                db.query(UserPermission.permission_id)
+                .filter(UserPermission.user_id == self.selected_user_id)
+                .all()
+            )
+        self.user_permissions = [p[0] for p in permissions]
+
+    def _stage(self, permission_ids: list[int], grant: bool):
+        """Registra cambios pendientes respecto de los permisos ya guardados."""
+        ids = set(permission_ids)
+        current = set(self.user_permissions)
+        grants = [p for p in self.pending_grants if p not in ids]
+        revokes = [p for p in self.pending_revokes if p not in ids]
+        if grant:
+            grants += [p for p in permission_ids if p not in current]
+        else:
+            revokes += [p for p in permission_ids if p in current]
+        self.pending_grants = grants
+        self.pending_revokes = revokes
+
+    def _apply(self, grant_ids: list[int], revoke_ids: list[int]):
+        granted, revoked = apply_permission_changes(
+            self.selected_user_id, grant_ids, revoke_ids
+        )
+        self._reload_selected_permissions()
+        return granted, revoked
+
+    @rx.event
+    async def toggle_permission(self, permission_id: int, is_granted: bool):
+        """
+        Grants or revokes a permission for the selected user. In staged mode the
+        change is only recorded until `apply_pending_changes`.
+        """
+        if not (await self.get_state(AppState)).user_is_admin:
+            return
+        if self.staged_mode:
+            self._stage([permission_id], is_granted)
+            return
+        if is_granted:
+            self._apply([permission_id], [])
+        else:
+            self._apply([], [permission_id])
+        return rx.toast.info("Permissions updated.", duration=1500)
+
     @rx.event
-    def toggle_permission(self, permission_id: int, is_granted: bool):
-        """Grants or revokes a permission for the selected user."""
+    def set_staged_mode(self, value: bool):
+        """Activa o desactiva el modo de cambios pendientes (descarta los que haya)."""
+        self.staged_mode = value
+        self._clear_pending()
+
+    @rx.event
+    async def apply_pending_changes(self):
+        """Aplica todos los cambios pendientes en una sola transacción."""
+        if not (await self.get_state(AppState)).user_is_admin:
+            return
+        if not self.pending_changes:
+            return
+        granted, revoked = self._apply(self.pending_grants, self.pending_revokes)
+        self._clear_pending()
+        return rx.toast.success(
+            f"{granted} permisos concedidos, {revoked} revocados.", duration=2500
+        )
+
+    @rx.event
+    def discard_pending_changes(self):
+        self._clear_pending()
+
+    @rx.event
+    async def grant_filtered(self):
+        """Concede todos los permisos que coinciden con el filtro actual."""
+        if not (await self.get_state(AppState)).user_is_admin:
+            return
+        ids = [p["id"] for p in self._filtered_permissions]
+        if self.staged_mode:
+            self._stage(ids, True)
+            return
+        granted, _ = self._apply(ids, [])
+        self._clear_pending()
+        return rx.toast.success(f"{granted} permisos concedidos.", duration=2500)
+
+    @rx.event
+    async def revoke_filtered(self):
+        """
+        Revoca todos los permisos que coinciden con el filtro actual; filtrando
+        por "grupo/" se revoca un grupo entero.
+        """
+        if not (await self.get_state(AppState)).user_is_admin:
+            return
+        ids = [p["id"] for p in self._filtered_permissions]
+        if self.staged_mode:
+            self._stage(ids, False)
+            return
+        _, revoked = self._apply([], ids)
+        self._clear_pending()
+        return rx.toast.success(f"{revoked} permisos revocados.", duration=2500)
+
+    @rx.event
+    def set_copy_from_username(self, value: str):
+        self.copy_from_username = value
+
+    @rx.event
+    async def copy_from_user(self):
+        """Reemplaza los permisos del usuario seleccionado por los de otro usuario."""
+        if not (await self.get_state(AppState)).user_is_admin:
+            return
+        username = self.copy_from_username.strip()
         with get_session() as db:
-            if is_granted:
-                existing = (
-                    db.query(UserPermission)
-                    .filter(
-                        UserPermission.user_id == self.selected_user_id,
-                        UserPermission.permission_id == permission_id,
-                    )
-                    .first()
-                )
-                if not existing:
-                    new_permission = UserPermission(
-                        user_id=self.selected_user_id, permission_id=permission_id
-                    )
-                    db.add(new_permission)
-                    db.commit()
-                    self.user_permissions.append(permission_id)
-            else:
-                to_delete = (
-                    db.query(UserPermission)
-                    .filter(
-                        UserPermission.user_id == self.selected_user_id,
-                        UserPermission.permission_id == permission_id,
-                    )
-                    .first()
-                )
-                if to_delete:
-                    db.delete(to_delete)
-                    db.commit()
-                    if permission_id in self.user_permissions:
-                        self.user_permissions.remove(permission_id)
-        return rx.toast.info("Permissions updated.", duration=1500)
\ No newline at end of file
+            source = db.query(User).filter(User.username == username).first()
+        if not source or source.id == self.selected_user_id:
+            return rx.toast.error("Usuario de origen no válido.")
+        granted, revoked = copy_permissions(source.id, self.selected_user_id)
+        self._reload_selected_permissions()
+        self._clear_pending()
+        self.copy_from_username = ""
+        return rx.toast.success(
+            f"Permisos copiados de {username}: {granted} concedidos, {revoked} revocados.",
+            duration=2500,
+        )
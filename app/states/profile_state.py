@@ -1,7 +1,7 @@
 import reflex as rx
 from app.state import AppState
 from app.models import User as UserModel
-from app.database import get_session, verify_password, hash_password
+from app.database import get_session, verify_password_async, hash_password_async
 
 
 class ProfileState(rx.State):
@@ -58,10 +58,12 @@ class ProfileState(rx.State):
             return
         with get_session() as db:
             user = db.query(UserModel).filter(UserModel.id == user_id).first()
-            if not user or not verify_password(current_password, user.password_hash):
+            if not user or not await verify_password_async(
+                current_password, user.password_hash
+            ):
                 self.error_message = "La contraseña actual es incorrecta."
                 return
-            user.password_hash = hash_password(new_password)
+            user.password_hash = await hash_password_async(new_password)
             db.commit()
         self.success_message = "Contraseña cambiada exitosamente."
         self.error_message = ""
@@ -0,0 +1,92 @@
+import reflex as rx
+import asyncio
+from typing import TypedDict
+from app import stats
+from app.state import AppState
+
+
+class ScriptStatsRow(TypedDict):
+    relpath: str
+    runs: int
+    avg: str
+    max: str
+    p50: str
+    p95: str
+    p99: str
+    cpu_p50: str
+    rss_p95: str
+    output_avg: str
+    trend: str
+    trend_up: bool
+
+
+class DailyPoint(TypedDict):
+    day: str
+    runs: int
+    p50: float
+    p95: float
+
+
+def _stats_row(relpath: str, s: dict) -> ScriptStatsRow:
+    trend = s["trend_pct"]
+    return {
+        "relpath": relpath,
+        "runs": s["runs"],
+        "avg": stats.format_duration(s["avg"]),
+        "max": stats.format_duration(s["max"]),
+        "p50": stats.format_duration(s["p50"]),
+        "p95": stats.format_duration(s["p95"]),
+        "p99": stats.format_duration(s["p99"]),
+        "cpu_p50": (
+            stats.format_duration(s["cpu_p50"]) if s["cpu_p50"] is not None else ""
+        ),
+        "rss_p95": (
+            f"{s['rss_p95_kb'] / 1024:.0f} MB" if s["rss_p95_kb"] is not None else ""
+        ),
+        "output_avg": (
+            f"{s['output_avg_bytes'] / 1024:.0f} KB"
+            if s["output_avg_bytes"] is not None
+            else ""
+        ),
+        "trend": f"{trend:+.0f}%" if trend is not None else "",
+        "trend_up": trend is not None and trend > 0,
+    }
+
+
+class StatsState(rx.State):
+    """
+    Tablero de rendimiento (admin): scripts ordenados por p95 de duración y
+    evolución diaria del script seleccionado.
+    """
+
+    rows: list[ScriptStatsRow] = []
+    selected_relpath: str = ""
+    daily: list[DailyPoint] = []
+    window_days: int = stats.STATS_WINDOW_DAYS
+
+    @rx.event
+    async def on_load_stats(self):
+        await self._load(force=False)
+
+    @rx.event
+    async def refresh_stats(self):
+        await self._load(force=True)
+
+    async def _load(self, force: bool):
+        if not (await self.get_state(AppState)).user_is_admin:
+            return
+        script_stats = await asyncio.to_thread(stats.get_script_stats, force)
+        ordered = sorted(script_stats.items(), key=lambda item: -item[1]["p95"])
+        self.rows = [_stats_row(relpath, s) for relpath, s in ordered]
+        if self.selected_relpath not in script_stats:
+            self.selected_relpath = ordered[0][0] if ordered else ""
+        self.daily = (
+            script_stats[self.selected_relpath]["daily"]
+            if self.selected_relpath
+            else []
+        )
+
+    @rx.event
+    async def select_script(self, relpath: str):
+        self.selected_relpath = relpath
+        await self._load(force=False)
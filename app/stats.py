@@ -0,0 +1,228 @@
+"""
+Estadísticas de rendimiento por script a partir de la tabla `executions`.
+
+Se calculan sobre las ejecuciones terminadas de los últimos STATS_WINDOW_DAYS
+días. Cantidad, media y máximo de la duración, salida media y ejecuciones por
+día salen de un GROUP BY en la base; los percentiles (p50/p95/p99) de la
+duración, CPU y memoria pico, la mediana diaria para ver la evolución y una
+tendencia que compara la mediana de los últimos STATS_TREND_DAYS días con la
+del resto de la ventana se calculan sobre las últimas STATS_MAX_SAMPLES
+ejecuciones de cada script.
+
+El resultado es compartido por todo el proceso y se recalcula como mucho cada
+STATS_CACHE_SECONDS: las páginas lo piden con `refresh_in_background` y
+muestran el último resultado mientras tanto.
+"""
+
+import collections
+import datetime
+import logging
+import os
+import threading
+import time
+from typing import Any, Sequence
+
+from sqlalchemy import func, select
+
+from app.database import engine
+from app.models import Execution
+
+STATS_WINDOW_DAYS = int(os.getenv("STATS_WINDOW_DAYS", "30"))
+STATS_TREND_DAYS = int(os.getenv("STATS_TREND_DAYS", "7"))
+STATS_CACHE_SECONDS = float(os.getenv("STATS_CACHE_SECONDS", "300"))
+STATS_MAX_SAMPLES = int(os.getenv("STATS_MAX_SAMPLES", "2000"))
+STATS_MIN_SAMPLES = 3
+
+_stats_lock = threading.Lock()
+_stats_cache: dict[str, Any] = {"computed_at": 0.0, "scripts": {}}
+_refresh_lock = threading.Lock()
+_refresh_thread: threading.Thread | None = None
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def format_duration(seconds: float) -> str:
+    """Duración legible: "850 ms", "40 s", "2 min 5 s", "1 h 3 min"."""
+    if seconds < 1:
+        return f"{seconds * 1000:.0f} ms"
+    if seconds < 60:
+        return f"{seconds:.0f} s"
+    if seconds < 3600:
+        minutes, secs = divmod(int(round(seconds)), 60)
+        return f"{minutes} min {secs} s" if secs else f"{minutes} min"
+    hours, rest = divmod(int(round(seconds)), 3600)
+    return f"{hours} h {rest // 60} min"
+
+
+def _summarize(
+    totals: tuple,
+    samples: list[tuple],
+    daily_runs: dict[str, int],
+    trend_since: datetime.datetime,
+) -> dict[str, Any]:
+    runs, duration_avg, duration_max, output_avg = totals
+    durations = sorted(s[1] for s in samples)
+    cpu = sorted(s[2] for s in samples if s[2] is not None)
+    # Sólo las ejecuciones con el pico medido (VmHWM del propio script).
+    rss = sorted(s[3] for s in samples if s[3])
+    recent = sorted(s[1] for s in samples if s[0] >= trend_since)
+    baseline = sorted(s[1] for s in samples if s[0] < trend_since)
+    trend_pct = None
+    if len(recent) >= STATS_MIN_SAMPLES and len(baseline) >= STATS_MIN_SAMPLES:
+        base = percentile(baseline, 50)
+        if base > 0:
+            trend_pct = (percentile(recent, 50) - base) / base * 100
+    by_day: dict[str, list[float]] = collections.defaultdict(list)
+    for started_at, duration, *_ in samples:
+        by_day[started_at.strftime("%Y-%m-%d")].append(duration)
+    daily = []
+    for day in sorted(by_day):
+        values = sorted(by_day[day])
+        daily.append(
+            {
+                "day": day,
+                "runs": daily_runs.get(day, len(values)),
+                "p50": round(percentile(values, 50), 3),
+                "p95": round(percentile(values, 95), 3),
+            }
+        )
+    return {
+        "runs": runs,
+        "avg": float(duration_avg),
+        "max": float(duration_max),
+        "p50": percentile(durations, 50),
+        "p95": percentile(durations, 95),
+        "p99": percentile(durations, 99),
+        "cpu_p50": percentile(cpu, 50) if cpu else None,
+        "rss_p95_kb": (
+            percentile(rss, 95) if len(rss) >= STATS_MIN_SAMPLES else None
+        ),
+        "output_avg_bytes": float(output_avg) if output_avg is not None else None,
+        "trend_pct": trend_pct,
+        "daily": daily,
+    }
+
+
+def _compute_stats() -> dict[str, dict[str, Any]]:
+    now = datetime.datetime.utcnow()
+    since = now - datetime.timedelta(days=STATS_WINDOW_DAYS)
+    trend_since = now - datetime.timedelta(days=STATS_TREND_DAYS)
+    finished = (
+        Execution.started_at >= since,
+        Execution.status.in_(("ok", "failed", "timeout")),
+        Execution.duration_seconds.is_not(None),
+    )
+    totals_query = (
+        select(
+            Execution.script_relpath,
+            func.count(),
+            func.avg(Execution.duration_seconds),
+            func.max(Execution.duration_seconds),
+            func.avg(Execution.output_bytes),
+        )
+        .where(*finished)
+        .group_by(Execution.script_relpath)
+    )
+    day = func.date(Execution.started_at)
+    daily_query = (
+        select(Execution.script_relpath, day, func.count())
+        .where(*finished)
+        .group_by(Execution.script_relpath, day)
+    )
+    ranked = (
+        select(
+            Execution.script_relpath,
+            Execution.started_at,
+            Execution.duration_seconds,
+            Execution.cpu_seconds,
+            Execution.peak_rss_kb,
+            func.row_number()
+            .over(
+                partition_by=Execution.script_relpath,
+                order_by=(Execution.started_at.desc(), Execution.id.desc()),
+            )
+            .label("rank"),
+        )
+        .where(*finished)
+        .subquery()
+    )
+    samples_query = select(
+        ranked.c.script_relpath,
+        ranked.c.started_at,
+        ranked.c.duration_seconds,
+        ranked.c.cpu_seconds,
+        ranked.c.peak_rss_kb,
+    ).where(ranked.c.rank <= STATS_MAX_SAMPLES)
+    samples: dict[str, list[tuple]] = collections.defaultdict(list)
+    daily_runs: dict[str, dict[str, int]] = collections.defaultdict(dict)
+    with engine.connect() as conn:
+        totals = {relpath: tuple(rest) for relpath, *rest in conn.execute(totals_query)}
+        for relpath, started_on, runs in conn.execute(daily_query):
+            daily_runs[relpath][str(started_on)[:10]] = runs
+        for relpath, *sample in conn.execute(
+            samples_query.execution_options(yield_per=5000)
+        ):
+            samples[relpath].append(tuple(sample))
+    return {
+        relpath: _summarize(
+            totals[relpath], samples[relpath], daily_runs[relpath], trend_since
+        )
+        for relpath in totals
+    }
+
+
+def get_script_stats(force: bool = False) -> dict[str, dict[str, Any]]:
+    """
+    Estadísticas por relpath (ver `_summarize`). Si la consulta falla se
+    devuelve el último resultado calculado.
+    """
+    with _stats_lock:
+        if (
+            not force
+            and time.monotonic() - _stats_cache["computed_at"] < STATS_CACHE_SECONDS
+        ):
+            return _stats_cache["scripts"]
+        try:
+            _stats_cache["scripts"] = _compute_stats()
+        except Exception as e:
+            logging.warning(f"Could not compute script statistics: {e}")
+        _stats_cache["computed_at"] = time.monotonic()
+        return _stats_cache["scripts"]
+
+
+def refresh_in_background() -> None:
+    """
+    Si el resultado venció, lo recalcula en un hilo aparte sin esperarlo; los
+    handlers siguen con `cached_script_stats` mientras tanto.
+    """
+    global _refresh_thread
+    if time.monotonic() - _stats_cache["computed_at"] < STATS_CACHE_SECONDS:
+        return
+    with _refresh_lock:
+        if _refresh_thread is not None and _refresh_thread.is_alive():
+            return
+        _refresh_thread = threading.Thread(
+            target=get_script_stats, name="script-stats", daemon=True
+        )
+        _refresh_thread.start()
+
+
+def cached_script_stats() -> dict[str, dict[str, Any]]:
+    """Último resultado de `get_script_stats`, sin recalcular ni esperar el lock."""
+    return _stats_cache["scripts"]
+
+
+def typical_duration_label(stats: dict[str, Any] | None) -> str:
+    """Texto corto para la tarjeta de una herramienta, p. ej. "≈ 40 s (p95 1 min)"."""
+    if not stats or stats["runs"] < STATS_MIN_SAMPLES:
+        return ""
+    label = f"≈ {format_duration(stats['p50'])} (p95 {format_duration(stats['p95'])})"
+    if stats["trend_pct"] is not None and abs(stats["trend_pct"]) >= 20:
+        label += " ↑" if stats["trend_pct"] > 0 else " ↓"
+    return label
@@ -1,49 +1,200 @@
 import os
+import codecs
+import collections
+import gzip
+import hashlib
 import json
 import asyncio
 import sys
 import logging
+import math
+import itertools
+import marshal
+import re
+import select
+import signal
+import struct
+import subprocess
+import threading
+import time
+import uuid
+import zlib
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator
+from . import prewarm
 
 EXCLUDE_DIRS = {"__pycache__", "tests", ".venv", "venv"}
 EXCLUDE_FILES = {"__init__.py", "vec-tools.py"}
 
 
-def load_tools_catalog(root_path: str) -> dict[str, dict[str, str]]:
-    """
-    Carga un archivo 'tools.json' opcional para enriquecer los datos de las herramientas.
-    Busca en el directorio raíz del proyecto.
-    """
+def _find_catalog_path(root_path: str) -> Path | None:
+    """Devuelve la ruta del 'tools.json' que aplica a `root_path`, si existe."""
     project_root = Path.cwd()
     parent_of_root = Path(root_path).parent
     potential_paths = [project_root / "tools.json", parent_of_root / "tools.json"]
     for catalog_path in potential_paths:
         if catalog_path.is_file():
-            try:
-                with open(catalog_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    return {item["relpath"]: item for item in data}
-            except (json.JSONDecodeError, IOError) as e:
-                logging.exception(f"Error loading tools catalog: {e}")
-                return {}
-    return {}
+            return catalog_path
+    return None
+
+
+_COMPILED_CATALOG_MAGIC = b"VECTCAT1"
+_COMPILED_CATALOG_HEADER = struct.Struct("<8sIQQ")
+_catalog_memo_lock = threading.Lock()
+_catalog_memo: dict[str, tuple[tuple[int, int], dict[str, dict[str, Any]]]] = {}
+
+
+def compiled_catalog_path(catalog_path: Path) -> Path:
+    """Ruta del catálogo precompilado que acompaña a `catalog_path`."""
+    return catalog_path.with_name(catalog_path.name + ".bin")
+
+
+def _read_compiled_catalog(
+    catalog_path: Path, key: tuple[int, int]
+) -> dict[str, dict[str, Any]] | None:
+    """
+    Lee el catálogo precompilado si existe y corresponde exactamente al
+    'tools.json' actual (mismo mtime y tamaño); si no, devuelve None.
+    """
+    try:
+        with open(compiled_catalog_path(catalog_path), "rb") as f:
+            data = f.read()
+        magic, version, mtime_ns, size = _COMPILED_CATALOG_HEADER.unpack_from(data)
+        if magic != _COMPILED_CATALOG_MAGIC or version != marshal.version:
+            return None
+        if (mtime_ns, size) != key:
+            logging.info(f"Compiled catalog for {catalog_path} is stale.")
+            return None
+        # marshal.loads sobre el buffer completo: marshal.load sobre el archivo
+        # lee de a pocos bytes y es varias veces más lento que el propio JSON.
+        return marshal.loads(memoryview(data)[_COMPILED_CATALOG_HEADER.size :])
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError, TypeError, struct.error) as e:
+        logging.warning(f"Ignoring unreadable compiled catalog: {e}")
+        return None
+
 
+def _parse_catalog(catalog_path: Path) -> dict[str, dict[str, Any]]:
+    with open(catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {item["relpath"]: item for item in data}
 
-def discover_tools(root_path: str) -> list[dict[str, str]]:
+
+def load_tools_catalog(root_path: str) -> dict[str, dict[str, str]]:
     """
-    Escanea el directorio `root_path` en busca de scripts .py.
-    Normaliza y enriquece los datos de cada script.
+    Carga un archivo 'tools.json' opcional para enriquecer los datos de las herramientas.
+    Busca en el directorio raíz del proyecto.
+
+    El resultado se memoiza por (ruta, mtime_ns, tamaño) y se comparte entre
+    llamadas: no debe modificarse. Si existe un catálogo precompilado vigente
+    ('tools.json.bin', ver `compile_tools_catalog`) se usa en lugar del JSON.
     """
+    catalog_path = _find_catalog_path(root_path)
+    if catalog_path is None:
+        return {}
+    try:
+        st = catalog_path.stat()
+    except OSError as e:
+        logging.warning(f"Could not stat tools catalog {catalog_path}: {e}")
+        return {}
+    key = (st.st_mtime_ns, st.st_size)
+    memo = _catalog_memo.get(str(catalog_path))
+    if memo is not None and memo[0] == key:
+        return memo[1]
+    try:
+        catalog = _read_compiled_catalog(catalog_path, key)
+        if catalog is None:
+            catalog = _parse_catalog(catalog_path)
+    except (json.JSONDecodeError, IOError) as e:
+        logging.exception(f"Error loading tools catalog: {e}")
+        return {}
+    with _catalog_memo_lock:
+        _catalog_memo[str(catalog_path)] = (key, catalog)
+    return catalog
+
+
+def compile_tools_catalog(catalog_path: Path) -> Path:
+    """
+    Escribe junto a `catalog_path` su versión precompilada (marshal), con una
+    cabecera que registra el mtime y el tamaño del JSON de origen: si el JSON
+    cambia después, el precompilado se ignora hasta volver a generarlo.
+    """
+    st = catalog_path.stat()
+    catalog = _parse_catalog(catalog_path)
+    target = compiled_catalog_path(catalog_path)
+    tmp_path = target.with_name(target.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(
+            _COMPILED_CATALOG_HEADER.pack(
+                _COMPILED_CATALOG_MAGIC, marshal.version, st.st_mtime_ns, st.st_size
+            )
+        )
+        marshal.dump(catalog, f)
+    os.replace(tmp_path, target)
+    return target
+
+
+DISCOVERY_RECHECK_SECONDS = float(os.getenv("DISCOVERY_RECHECK_SECONDS", "5"))
+
+_discovery_lock = threading.Lock()
+_discovery_cache: dict[str, dict[str, Any]] = {}
+_discovery_versions = itertools.count(1)
+
+
+def _catalog_key(root_path: str) -> tuple[str, int, int] | None:
+    catalog_path = _find_catalog_path(root_path)
+    if catalog_path is None:
+        return None
+    try:
+        st = catalog_path.stat()
+    except OSError:
+        return None
+    return (str(catalog_path), st.st_mtime_ns, st.st_size)
+
+
+_DirListing = tuple[int, tuple[str, ...], tuple[tuple[str, int, int], ...]]
+
+
+def _scan_dir(dirpath: str, previous: dict[str, _DirListing]) -> _DirListing:
+    """
+    Lista un directorio y devuelve (mtime_ns, subdirectorios, scripts), con
+    cada script como (nombre, mtime_ns, tamaño).
+    Si el mtime no cambió desde el último escaneo se reutiliza el listado anterior:
+    crear, borrar o renombrar entradas siempre actualiza el mtime del directorio.
+    Un script editado en el lugar conserva su (mtime, tamaño) anterior hasta el
+    próximo cambio del directorio o un `invalidate_tools_cache`.
+    """
+    mtime_ns = os.stat(dirpath).st_mtime_ns
+    cached = previous.get(dirpath)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached
+    subdirs = []
+    files = []
+    with os.scandir(dirpath) as it:
+        for entry in it:
+            if entry.is_dir():
+                if entry.name not in EXCLUDE_DIRS and not entry.is_symlink():
+                    subdirs.append(entry.name)
+            elif entry.name.endswith(".py") and entry.name not in EXCLUDE_FILES:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                files.append((entry.name, st.st_mtime_ns, st.st_size))
+    return (mtime_ns, tuple(sorted(subdirs)), tuple(sorted(files)))
+
+
+def _build_tools(
+    root_path: str,
+    dirs: dict[str, _DirListing],
+    catalog: dict[str, dict[str, str]],
+) -> tuple[list[dict[str, str]], dict[str, tuple[int, int]]]:
+    """Herramientas descubiertas y el (mtime_ns, tamaño) de cada script."""
     discovered_tools = []
-    catalog = load_tools_catalog(root_path)
-    if not os.path.isdir(root_path):
-        return []
-    for dirpath, dirnames, filenames in os.walk(root_path, topdown=True):
-        dirnames[:] = [d for d in dirnames if d not in EXCLUDE_DIRS]
-        for filename in filenames:
-            if not filename.endswith(".py") or filename in EXCLUDE_FILES:
-                continue
+    file_keys = {}
+    for dirpath in sorted(dirs):
+        for filename, mtime_ns, size in dirs[dirpath][2]:
             full_path = os.path.join(dirpath, filename)
             relpath = os.path.relpath(full_path, root_path).replace("\\", "/")
             parts = relpath.split("/")
@@ -59,56 +210,861 @@ def discover_tools(root_path: str) -> list[dict[str, str]]:
             if relpath in catalog:
                 tool_data.update(catalog[relpath])
             discovered_tools.append(tool_data)
-    return discovered_tools
+            file_keys[relpath] = (mtime_ns, size)
+    return discovered_tools, file_keys
+
+
+def _refresh_discovery(root_path: str, entry: dict[str, Any] | None) -> dict[str, Any]:
+    """
+    Re-escanea `root_path` de forma incremental: sólo se listan de nuevo los
+    directorios cuyo mtime cambió. Devuelve la entrada de caché actualizada.
+    """
+    previous_dirs = entry["dirs"] if entry else {}
+    dirs: dict[str, _DirListing] = {}
+    pending = [root_path]
+    while pending:
+        dirpath = pending.pop()
+        try:
+            listing = _scan_dir(dirpath, previous_dirs)
+        except OSError as e:
+            logging.warning(f"Could not scan tools directory {dirpath}: {e}")
+            if isinstance(e, FileNotFoundError) or dirpath not in previous_dirs:
+                continue
+            # Falla transitoria (p. ej. el montaje de red): se conserva el
+            # listado anterior para no perder sus scripts ni sus permisos.
+            listing = previous_dirs[dirpath]
+        dirs[dirpath] = listing
+        pending.extend(os.path.join(dirpath, d) for d in listing[1])
+    catalog_key = _catalog_key(root_path)
+    if entry and dirs == previous_dirs and catalog_key == entry["catalog_key"]:
+        entry["checked_at"] = time.monotonic()
+        return entry
+    tools, file_keys = _build_tools(root_path, dirs, load_tools_catalog(root_path))
+    version = next(_discovery_versions)
+    logging.info(f"Tools discovery for {root_path}: {len(tools)} scripts (v{version}).")
+    return {
+        "dirs": dirs,
+        "catalog_key": catalog_key,
+        "tools": tools,
+        "by_relpath": {tool["relpath"]: tool for tool in tools},
+        "file_keys": file_keys,
+        "version": version,
+        "checked_at": time.monotonic(),
+    }
+
+
+def _get_discovery_entry(root_path: str) -> dict[str, Any] | None:
+    """
+    Snapshot de descubrimiento de `root_path`, compartido por todas las
+    sesiones; se vuelve a validar cada DISCOVERY_RECHECK_SECONDS.
+    """
+    if not os.path.isdir(root_path):
+        return None
+    entry = _discovery_cache.get(root_path)
+    if (
+        entry is not None
+        and time.monotonic() - entry["checked_at"] < DISCOVERY_RECHECK_SECONDS
+    ):
+        return entry
+    with _discovery_lock:
+        entry = _discovery_cache.get(root_path)
+        if (
+            entry is not None
+            and time.monotonic() - entry["checked_at"] < DISCOVERY_RECHECK_SECONDS
+        ):
+            return entry
+        entry = _refresh_discovery(root_path, entry)
+        _discovery_cache[root_path] = entry
+        return entry
+
+
+def discovery_snapshot(
+    root_path: str,
+) -> tuple[int, list[dict[str, str]], dict[str, tuple[int, int]]]:
+    """
+    Versión, herramientas y (mtime_ns, tamaño) de cada script del snapshot
+    actual, leídos de la misma entrada.
+    """
+    entry = _get_discovery_entry(root_path)
+    if entry is None:
+        return 0, [], {}
+    return entry["version"], entry["tools"], entry["file_keys"]
+
+
+def get_tool(root_path: str, relpath: str) -> dict[str, Any] | None:
+    """Datos descubiertos (incluida la configuración de tools.json) de un script."""
+    entry = _get_discovery_entry(root_path)
+    if entry is None:
+        return None
+    return entry["by_relpath"].get(relpath)
+
+
+def invalidate_tools_cache(root_path: str | None = None) -> None:
+    """
+    Descarta el snapshot de descubrimiento de `root_path` (o de todos) para que
+    la próxima consulta vuelva a escanear el árbol completo.
+    """
+    with _discovery_lock:
+        if root_path is None:
+            _discovery_cache.clear()
+        else:
+            _discovery_cache.pop(root_path, None)
+
+
+MAX_OUTPUT_CHARS = 4000
+OUTPUT_HEAD_CHARS = int(os.getenv("OUTPUT_HEAD_CHARS", str(MAX_OUTPUT_CHARS // 2)))
+OUTPUT_TAIL_CHARS = int(os.getenv("OUTPUT_TAIL_CHARS", str(MAX_OUTPUT_CHARS // 2)))
+OUTPUT_FLUSH_SECONDS = float(os.getenv("OUTPUT_FLUSH_SECONDS", "0.5"))
+RUN_LOGS_DIR = os.getenv("RUN_LOGS_DIR", os.path.join(os.getcwd(), "run_logs"))
+RUN_LOG_RETENTION_DAYS = float(os.getenv("RUN_LOG_RETENTION_DAYS", "7"))
+SCRIPT_EXEC_MODE = os.getenv("SCRIPT_EXEC_MODE", "subprocess")
+LOG_PAGE_BYTES = int(os.getenv("LOG_PAGE_BYTES", str(64 * 1024)))
+SCRIPT_TIMEOUT_SECONDS = int(os.getenv("SCRIPT_TIMEOUT_SECONDS", "60"))
+SCRIPT_MAX_RSS_MB = int(os.getenv("SCRIPT_MAX_RSS_MB", "0"))
+SCRIPT_CPU_SECONDS = int(os.getenv("SCRIPT_CPU_SECONDS", "0"))
+SCRIPT_NICE = int(os.getenv("SCRIPT_NICE", "0"))
+MEMORY_CHECK_SECONDS = float(os.getenv("MEMORY_CHECK_SECONDS", "0.5"))
+SCRIPT_KILL_GRACE_SECONDS = float(os.getenv("SCRIPT_KILL_GRACE_SECONDS", "5"))
+_READ_CHUNK_BYTES = 4096
+_PEAK_SAMPLE_SECONDS = 0.01
+# Intérprete intermedio que fija los rlimits y hace exec del script: así
+# nunca corre sin ellos y Popen no necesita preexec_fn (inseguro con hilos).
+_LIMITS_WRAPPER = """\
+import json, os, resource, sys
+for limit, soft, hard in json.loads(sys.argv[1]):
+    resource.setrlimit(limit, (soft, hard))
+if int(sys.argv[2]):
+    os.setpriority(os.PRIO_PROCESS, 0, int(sys.argv[2]))
+os.execv(sys.executable, [sys.executable, sys.argv[3]])
+"""
+_RUN_ID_RE = re.compile(r"[0-9a-f]{32}")
+_last_log_prune = 0.0
+
+
+class OutputCapture:
+    """
+    Captura la salida de un stream con memoria acotada: conserva los primeros
+    `head_chars` y los últimos `tail_chars` caracteres y descarta el medio.
+    Si se indica `log_path`, los bytes originales completos se vuelcan a disco
+    con `_PagedLog` para poder paginarlos después.
+    """
+
+    def __init__(
+        self,
+        head_chars: int = OUTPUT_HEAD_CHARS,
+        tail_chars: int = OUTPUT_TAIL_CHARS,
+        log_path: str | None = None,
+    ):
+        self.head_chars = head_chars
+        self.tail_chars = tail_chars
+        self.total_chars = 0
+        self.total_bytes = 0
+        self._head: list[str] = []
+        self._head_len = 0
+        self._tail: collections.deque[str] = collections.deque()
+        self._tail_len = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self._log = _PagedLog(log_path) if log_path else None
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_chars > self._head_len + self._tail_len
+
+    def write(self, data: bytes, final: bool = False) -> None:
+        self.total_bytes += len(data)
+        if self._log is not None and data:
+            self._log.write(data)
+        text = self._decoder.decode(data, final=final)
+        if not text:
+            return
+        self.total_chars += len(text)
+        if self._head_len < self.head_chars:
+            take = text[: self.head_chars - self._head_len]
+            self._head.append(take)
+            self._head_len += len(take)
+            text = text[len(take) :]
+        if not text or self.tail_chars <= 0:
+            return
+        self._tail.append(text)
+        self._tail_len += len(text)
+        while self._tail_len - len(self._tail[0]) >= self.tail_chars:
+            self._tail_len -= len(self._tail.popleft())
+        excess = self._tail_len - self.tail_chars
+        if excess > 0:
+            self._tail[0] = self._tail[0][excess:]
+            self._tail_len -= excess
+
+    def text(self) -> str:
+        head = "".join(self._head)
+        tail = "".join(self._tail)
+        omitted = self.total_chars - self._head_len - self._tail_len
+        if omitted > 0:
+            return f"{head}\n… [{omitted} caracteres omitidos] …\n{tail}"
+        return head + tail
+
+    def close(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+_LOG_INDEX_ENTRY = struct.Struct("<Q")
+
+
+class _PagedLog:
+    """
+    Archivo gzip escrito como un miembro independiente por cada página de
+    LOG_PAGE_BYTES bytes, más un índice ('.idx') con el offset de cada miembro
+    (uint64 little-endian). Leer una página es un seek y la descompresión de
+    esa sola página; el archivo completo sigue siendo un gzip válido.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "wb")
+        self._index = open(_run_log_index_path(path), "wb")
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> None:
+        self._buffer += data
+        while len(self._buffer) >= LOG_PAGE_BYTES:
+            self._write_page(bytes(self._buffer[:LOG_PAGE_BYTES]))
+            del self._buffer[:LOG_PAGE_BYTES]
+
+    def _write_page(self, page: bytes) -> None:
+        offset = self._file.tell()
+        self._file.write(gzip.compress(page, compresslevel=3))
+        self._file.flush()
+        self._index.write(_LOG_INDEX_ENTRY.pack(offset))
+        self._index.flush()
+
+    def close(self) -> None:
+        if self._buffer:
+            self._write_page(bytes(self._buffer))
+            self._buffer.clear()
+        self._file.close()
+        self._index.close()
+
+
+def _run_log_path(run_id: str, stream: str) -> str:
+    return os.path.join(RUN_LOGS_DIR, f"{run_id}.{stream}.log.gz")
+
+
+def _run_log_index_path(log_path: str) -> str:
+    return log_path.removesuffix(".gz") + ".idx"
+
+
+def _prune_run_logs() -> None:
+    """Borra, como mucho una vez por hora, los logs de ejecución más viejos que la retención."""
+    global _last_log_prune
+    now = time.time()
+    if now - _last_log_prune < 3600:
+        return
+    _last_log_prune = now
+    cutoff = now - RUN_LOG_RETENTION_DAYS * 86400
+    try:
+        with os.scandir(RUN_LOGS_DIR) as it:
+            for entry in it:
+                if (
+                    entry.name.endswith((".log.gz", ".log.idx", ".summary.json"))
+                    and entry.stat().st_mtime < cutoff
+                ):
+                    os.remove(entry.path)
+    except OSError as e:
+        logging.warning(f"Could not prune run logs in {RUN_LOGS_DIR}: {e}")
 
 
-async def run_script(
-    root: str, relpath: str, timeout: int = 60
-) -> dict[str, bool | str]:
+def read_run_log(run_id: str, stream: str, page: int) -> str:
     """
-    Ejecuta un script de forma segura usando un subproceso.
+    Devuelve la página `page` (de LOG_PAGE_BYTES bytes) de la salida completa
+    de una ejecución guardada en disco.
+    """
+    if not _RUN_ID_RE.fullmatch(run_id) or stream not in ("stdout", "stderr"):
+        return ""
+    log_path = _run_log_path(run_id, stream)
+    page = max(page, 0)
+    if not os.path.exists(_run_log_index_path(log_path)):
+        return _read_legacy_run_log(log_path, page)
+    try:
+        with open(_run_log_index_path(log_path), "rb") as f:
+            f.seek(page * _LOG_INDEX_ENTRY.size)
+            entry = f.read(_LOG_INDEX_ENTRY.size)
+        if len(entry) < _LOG_INDEX_ENTRY.size:
+            return ""
+        with open(log_path, "rb") as f:
+            f.seek(_LOG_INDEX_ENTRY.unpack(entry)[0])
+            # Un miembro ocupa como mucho la página más el overhead de gzip;
+            # decompressobj se detiene al final del miembro.
+            compressed = f.read(LOG_PAGE_BYTES + 4096)
+        data = zlib.decompressobj(wbits=31).decompress(compressed, LOG_PAGE_BYTES)
+    except (OSError, zlib.error) as e:
+        logging.warning(f"Could not read run log {run_id}.{stream}: {e}")
+        return ""
+    return data.decode("utf-8", errors="ignore")
+
+
+def _read_legacy_run_log(log_path: str, page: int) -> str:
+    """Logs escritos antes del índice por páginas: un único stream gzip."""
+    try:
+        with gzip.open(log_path, "rb") as f:
+            f.seek(page * LOG_PAGE_BYTES)
+            data = f.read(LOG_PAGE_BYTES)
+    except (OSError, EOFError) as e:
+        logging.warning(f"Could not read run log {log_path}: {e}")
+        return ""
+    return data.decode("utf-8", errors="ignore")
+
+
+def save_run_summary(run_id: str, summary: dict[str, Any]) -> None:
+    """
+    Guarda junto a los logs la vista final (acotada) de una ejecución, para
+    poder mostrarla después desde cualquier sesión o worker.
+    """
+    if not RUN_LOGS_DIR or not _RUN_ID_RE.fullmatch(run_id):
+        return
+    path = os.path.join(RUN_LOGS_DIR, f"{run_id}.summary.json")
+    try:
+        os.makedirs(RUN_LOGS_DIR, exist_ok=True)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(summary, f)
+        os.replace(f"{path}.tmp", path)
+    except (OSError, TypeError) as e:
+        logging.warning(f"Could not save run summary {run_id}: {e}")
+
+
+def load_run_summary(run_id: str) -> dict[str, Any] | None:
+    """Devuelve la vista final guardada con `save_run_summary`, si existe."""
+    if not RUN_LOGS_DIR or not _RUN_ID_RE.fullmatch(run_id):
+        return None
+    try:
+        with open(
+            os.path.join(RUN_LOGS_DIR, f"{run_id}.summary.json"), encoding="utf-8"
+        ) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+_fingerprints: dict[str, tuple[int, int, str]] = {}
+
+
+def script_fingerprint(root: str, relpath: str) -> str | None:
+    """
+    Identifica la versión de un script: sha256 del contenido más su mtime.
+    Cambia si el archivo se modifica (o sólo se toca). Se memoiza por
+    (mtime, tamaño) para no releer el archivo en cada ejecución.
     """
     full_path = os.path.abspath(os.path.join(root, relpath))
+    try:
+        st = os.stat(full_path)
+        memo = _fingerprints.get(full_path)
+        if memo and memo[:2] == (st.st_mtime_ns, st.st_size):
+            return memo[2]
+        digest = hashlib.sha256()
+        with open(full_path, "rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    fingerprint = f"{digest.hexdigest()[:40]}-{st.st_mtime_ns}"
+    _fingerprints[full_path] = (st.st_mtime_ns, st.st_size, fingerprint)
+    return fingerprint
+
+
+def _check_script_path(root: str, relpath: str) -> str | None:
+    """Devuelve un mensaje de error si `relpath` no es un script ejecutable de `root`."""
+    full_path = os.path.abspath(os.path.join(root, relpath))
     if not os.path.commonpath([full_path, os.path.abspath(root)]) == os.path.abspath(
         root
     ):
-        return {
-            "ok": False,
-            "stdout": "",
-            "stderr": "Error: Intento de acceso fuera del directorio de herramientas.",
-        }
+        return "Error: Intento de acceso fuera del directorio de herramientas."
     if not os.path.isfile(full_path):
-        return {
-            "ok": False,
-            "stdout": "",
-            "stderr": f"Error: No se encontró el archivo {relpath}.",
-        }
+        return f"Error: No se encontró el archivo {relpath}."
+    return None
+
+
+class _LocalProcess:
+    """
+    Script lanzado como intérprete nuevo. Se cosecha con `os.wait4` en un hilo
+    propio para obtener, además del código de salida, su uso de recursos.
+    """
+
+    def __init__(
+        self,
+        popen: subprocess.Popen,
+        stdout: asyncio.StreamReader,
+        stderr: asyncio.StreamReader,
+    ):
+        self.pid = popen.pid
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode: int | None = None
+        self.rusage: dict[str, float] | None = None
+        self._popen = popen
+        loop = asyncio.get_running_loop()
+        self._exited = loop.create_future()
+        threading.Thread(
+            target=self._reap, args=(loop,), name=f"reap-{self.pid}", daemon=True
+        ).start()
+
+    def _reap(self, loop: asyncio.AbstractEventLoop) -> None:
+        peak_rss_kb = self._sample_peak_rss()
+        _, status, rusage = os.wait4(self.pid, 0)
+        loop.call_soon_threadsafe(self._set_exited, status, rusage, peak_rss_kb)
+
+    def _sample_peak_rss(self) -> int | None:
+        """
+        Pico de memoria del script (VmHWM, que empieza de cero en el exec)
+        muestreado hasta que termina, cada vez más espaciado hasta
+        MEMORY_CHECK_SECONDS. El ru_maxrss de `wait4` no sirve: arrastra a
+        través del exec la memoria del worker web del que se hizo fork.
+        """
+        peak = None
+        interval = _PEAK_SAMPLE_SECONDS
+        try:
+            pidfd = os.pidfd_open(self.pid)
+        except (AttributeError, OSError):
+            pidfd = None
+        try:
+            while True:
+                # Un zombie ya no tiene VmHWM: el último valor leído queda.
+                sample = _proc_status_kb(self.pid, b"VmHWM:")
+                if sample:
+                    peak = max(peak or 0, sample)
+                if pidfd is not None:
+                    if select.select([pidfd], [], [], interval)[0]:
+                        return peak
+                else:
+                    flags = os.WEXITED | os.WNOHANG | os.WNOWAIT
+                    if os.waitid(os.P_PID, self.pid, flags) is not None:
+                        return peak
+                    time.sleep(interval)
+                interval = min(interval * 2, MEMORY_CHECK_SECONDS)
+        finally:
+            if pidfd is not None:
+                os.close(pidfd)
+
+    def _set_exited(self, status: int, rusage, peak_rss_kb: int | None) -> None:
+        self.returncode = os.waitstatus_to_exitcode(status)
+        self.rusage = prewarm.rusage_dict(rusage)
+        self.rusage["max_rss_kb"] = peak_rss_kb
+        self._popen.returncode = self.returncode
+        if not self._exited.done():
+            self._exited.set_result(self.returncode)
+
+    async def wait(self) -> int:
+        return await asyncio.shield(self._exited)
+
+
+def script_limits(tool: dict[str, Any] | None) -> dict[str, int]:
+    """
+    Límites de ejecución de un script según su entrada de 'tools.json'
+    ("timeout", "max_rss_mb", "cpu_seconds", "nice"), con los valores por
+    defecto de SCRIPT_* para lo que no declare. 0 significa sin límite.
+    """
+    tool = tool or {}
+    defaults = {
+        "timeout": SCRIPT_TIMEOUT_SECONDS,
+        "max_rss_mb": SCRIPT_MAX_RSS_MB,
+        "cpu_seconds": SCRIPT_CPU_SECONDS,
+        "nice": SCRIPT_NICE,
+    }
+    limits = {}
+    for key, default in defaults.items():
+        value = tool.get(key, default)
+        try:
+            value = int(value)
+            if value < 0:
+                raise ValueError(value)
+        except (TypeError, ValueError):
+            logging.warning(
+                f"Invalid {key!r} for {tool.get('relpath')} in tools.json: {value!r}"
+            )
+            value = default
+        limits[key] = value
+    limits["timeout"] = limits["timeout"] or SCRIPT_TIMEOUT_SECONDS
+    limits["nice"] = min(limits["nice"], 19)
+    return limits
+
+
+def _proc_status_kb(pid: int, field: bytes) -> int:
+    """Un campo en KiB de /proc/<pid>/status (0 si ya no existe)."""
     try:
-        process = await asyncio.create_subprocess_exec(
-            sys.executable,
-            full_path,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+        with open(f"/proc/{pid}/status", "rb") as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def _rss_kb(pid: int) -> int:
+    """Memoria residente actual de `pid` según /proc (0 si ya no existe)."""
+    return _proc_status_kb(pid, b"VmRSS:")
+
+
+_active_processes: dict[str, Any] = {}
+_cancelled_runs: set[str] = set()
+_kill_tasks: set[asyncio.Task] = set()
+
+
+def _signal_group(pid: int, sig: int) -> bool:
+    """Envía `sig` a todo el grupo de procesos del script (su pid es el pgid)."""
+    try:
+        os.killpg(pid, sig)
+    except (ProcessLookupError, PermissionError):
+        return False
+    return True
+
+
+async def terminate_process_group(
+    process, grace: float = SCRIPT_KILL_GRACE_SECONDS
+) -> None:
+    """
+    Termina el script y todo lo que lanzó: SIGTERM al grupo, SIGKILL a lo que
+    siga vivo tras `grace` segundos, y espera a que el proceso principal sea
+    cosechado.
+    """
+    if process.returncode is None and _signal_group(process.pid, signal.SIGTERM):
+        try:
+            await asyncio.wait_for(process.wait(), timeout=grace)
+        except asyncio.TimeoutError:
+            pass
+    # Aunque el principal ya haya salido pueden quedar hijos suyos en el grupo.
+    _signal_group(process.pid, signal.SIGKILL)
+    if process.returncode is None:
+        await process.wait()
+
+
+def _terminate_in_background(process) -> None:
+    task = asyncio.get_running_loop().create_task(terminate_process_group(process))
+    _kill_tasks.add(task)
+    task.add_done_callback(_kill_tasks.discard)
+
+
+def cancel_run(run_id: str) -> bool:
+    """
+    Cancela una ejecución en curso de este proceso. Devuelve False si `run_id`
+    ya terminó (o no existe).
+    """
+    process = _active_processes.get(run_id)
+    if process is None or process.returncode is not None:
+        return False
+    _cancelled_runs.add(run_id)
+    _terminate_in_background(process)
+    return True
+
+
+class _RunStopped(Exception):
+    def __init__(self, status: str, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _limit_exceeded(
+    returncode: int, process, stderr: OutputCapture, limits: dict[str, int]
+) -> _RunStopped | None:
+    """Identifica si un script terminó por alguno de sus límites de recursos."""
+    if returncode == 0:
+        return None
+    cpu_limit = limits.get("cpu_seconds", 0)
+    rusage = getattr(process, "rusage", None) or {}
+    cpu_used = rusage.get("user_cpu", 0.0) + rusage.get("sys_cpu", 0.0)
+    if cpu_limit and (
+        returncode == -signal.SIGXCPU
+        or (returncode == -signal.SIGKILL and cpu_used >= cpu_limit)
+    ):
+        return _RunStopped(
+            "cpu_limit",
+            f"Error: El script superó el límite de {cpu_limit} segundos de CPU "
+            "y fue detenido.",
+        )
+    # RLIMIT_DATA no manda ninguna señal: la asignación falla y el script
+    # termina con un MemoryError (el corte por RSS del vigía se informa aparte).
+    if limits.get("max_rss_mb") and "MemoryError" in stderr.text()[-2000:]:
+        return _RunStopped(
+            "memory_limit",
+            "Error: El script superó el límite de memoria de "
+            f"{limits['max_rss_mb']} MB.",
+        )
+    return None
+
+
+async def _spawn_script(full_path: str, limits: dict[str, int] | None = None):
+    """
+    Lanza el script con stdout/stderr en pipes y `limits` aplicados antes de
+    que empiece (ver _LIMITS_WRAPPER). Con
+    SCRIPT_EXEC_MODE=prewarm se usa la plantilla pre-calentada de `app.prewarm`;
+    si falla, un intérprete nuevo.
+    """
+    if SCRIPT_EXEC_MODE == "prewarm":
+        try:
+            return await prewarm.spawn(full_path, cwd=os.getcwd(), limits=limits)
+        except Exception as e:
+            logging.warning(f"Prewarmed spawn failed, using a fresh interpreter: {e}")
+    rlimits = prewarm.rlimits(limits)
+    nice = (limits or {}).get("nice", 0)
+    if rlimits or nice:
+        argv = [sys.executable, "-c", _LIMITS_WRAPPER]
+        argv += [json.dumps(rlimits), str(nice), full_path]
+    else:
+        argv = [sys.executable, full_path]
+    popen = subprocess.Popen(
+        argv,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    return _LocalProcess(
+        popen,
+        await prewarm.pipe_reader(popen.stdout),
+        await prewarm.pipe_reader(popen.stderr),
+    )
+
+
+async def _pump_stream(
+    stream: asyncio.StreamReader, capture: OutputCapture, changed: asyncio.Event
+) -> None:
+    """Vuelca un pipe del subproceso en su captura y avisa de que hay salida nueva."""
+    while True:
+        data = await stream.read(_READ_CHUNK_BYTES)
+        if not data:
+            break
+        capture.write(data)
+        changed.set()
+    capture.write(b"", final=True)
+    changed.set()
+
+
+def _output_event(
+    run_id: str,
+    stdout: OutputCapture | None,
+    stderr: OutputCapture | None,
+    extra_stderr: str = "",
+    done: bool = False,
+    ok: bool = False,
+    status: str = "running",
+    process: Any = None,
+    duration: float = 0.0,
+) -> dict[str, Any]:
+    stderr_text = stderr.text() if stderr else ""
+    if extra_stderr:
+        stderr_text = f"{stderr_text}\n{extra_stderr}" if stderr_text else extra_stderr
+    return {
+        "run_id": run_id,
+        "stdout": stdout.text() if stdout else "",
+        "stderr": stderr_text,
+        "stdout_bytes": stdout.total_bytes if stdout else 0,
+        "stderr_bytes": stderr.total_bytes if stderr else 0,
+        "truncated": bool(
+            (stdout and stdout.truncated) or (stderr and stderr.truncated)
+        ),
+        "logged": bool(RUN_LOGS_DIR) and stdout is not None,
+        "done": done,
+        "ok": ok,
+        "status": status,
+        "exit_code": getattr(process, "returncode", None),
+        "duration_seconds": duration,
+        "rusage": getattr(process, "rusage", None),
+    }
+
+
+async def stream_script(
+    root: str,
+    relpath: str,
+    timeout: int = 60,
+    batch_interval: float = OUTPUT_FLUSH_SECONDS,
+    run_id: str | None = None,
+    limits: dict[str, int] | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Ejecuta un script de forma segura en un subproceso y entrega la salida a
+    medida que llega.
+
+    Produce diccionarios con la vista actual de "stdout" y "stderr" (principio y
+    final acotados por OutputCapture), como mucho uno cada `batch_interval`
+    segundos. El último tiene `done=True`, `ok` y `status` ("ok", "failed",
+    "timeout", "memory_limit", "cpu_limit", "cancelled" o "error") con el
+    resultado final, además del código de salida, la duración y el uso de
+    recursos del proceso. La salida completa queda en RUN_LOGS_DIR bajo el
+    `run_id` del evento. Ver `cancel_run` para detener una ejecución en curso.
+
+    `limits` (ver `script_limits`) se aplica al proceso; la memoria además se
+    vigila desde aquí cada MEMORY_CHECK_SECONDS para cortar el script con un
+    mensaje claro en lugar de un MemoryError a mitad de camino.
+    """
+    limits = limits or {}
+    max_rss_kb = limits.get("max_rss_mb", 0) * 1024
+    run_id = run_id or uuid.uuid4().hex
+    started = time.monotonic()
+    error = _check_script_path(root, relpath)
+    if error:
+        yield _output_event(run_id, None, None, error, done=True, status="error")
+        return
+    full_path = os.path.abspath(os.path.join(root, relpath))
+    stdout = stderr = None
+    try:
+        if RUN_LOGS_DIR:
+            os.makedirs(RUN_LOGS_DIR, exist_ok=True)
+            _prune_run_logs()
+        stdout = OutputCapture(
+            log_path=_run_log_path(run_id, "stdout") if RUN_LOGS_DIR else None
         )
-        stdout_bytes, stderr_bytes = await asyncio.wait_for(
-            process.communicate(), timeout=timeout
+        stderr = OutputCapture(
+            log_path=_run_log_path(run_id, "stderr") if RUN_LOGS_DIR else None
         )
-        return {
-            "ok": process.returncode == 0,
-            "stdout": stdout_bytes.decode("utf-8", errors="ignore")[:4000],
-            "stderr": stderr_bytes.decode("utf-8", errors="ignore")[:4000],
-        }
-    except asyncio.TimeoutError as e:
-        logging.exception(f"Script timeout: {e}")
-        return {
-            "ok": False,
-            "stdout": "",
-            "stderr": f"Error: El script superó el tiempo límite de {timeout} segundos.",
-        }
+        process = await _spawn_script(full_path, limits)
     except Exception as e:
         logging.exception(f"Unexpected error running script: {e}")
-        return {
-            "ok": False,
-            "stdout": "",
-            "stderr": f"Error de ejecución inesperado: {str(e)}",
-        }
\ No newline at end of file
+        for capture in (stdout, stderr):
+            if capture:
+                capture.close()
+        yield _output_event(
+            run_id,
+            None,
+            None,
+            f"Error de ejecución inesperado: {str(e)}",
+            done=True,
+            status="error",
+        )
+        return
+    _active_processes[run_id] = process
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+    readers = [
+        asyncio.create_task(_pump_stream(process.stdout, stdout, changed)),
+        asyncio.create_task(_pump_stream(process.stderr, stderr, changed)),
+    ]
+    # timeout <= 0 (p. ej. SCRIPT_TIMEOUT_SECONDS=0) es "sin tiempo límite".
+    deadline = loop.time() + timeout if timeout > 0 else math.inf
+    last_flush = loop.time() - batch_interval
+    next_memory_check = loop.time() + MEMORY_CHECK_SECONDS if max_rss_kb else None
+    try:
+        while not all(reader.done() for reader in readers):
+            now = loop.time()
+            if now >= deadline:
+                raise asyncio.TimeoutError()
+            if next_memory_check is not None and now >= next_memory_check:
+                next_memory_check = now + MEMORY_CHECK_SECONDS
+                if process.returncode is None and _rss_kb(process.pid) > max_rss_kb:
+                    await terminate_process_group(process, grace=0)
+                    raise _RunStopped(
+                        "memory_limit",
+                        "Error: El script superó el límite de memoria de "
+                        f"{limits['max_rss_mb']} MB y fue detenido.",
+                    )
+            wake = min(deadline, next_memory_check or math.inf) - now
+            if wake == math.inf:
+                wake = None
+            if changed.is_set():
+                wait = last_flush + batch_interval - now
+                if wait <= 0:
+                    changed.clear()
+                    last_flush = now
+                    yield _output_event(run_id, stdout, stderr)
+                    continue
+                await asyncio.wait(readers, timeout=min(wait, wake or wait))
+            else:
+                waiter = asyncio.ensure_future(changed.wait())
+                try:
+                    await asyncio.wait(
+                        [waiter, *readers],
+                        timeout=wake,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                finally:
+                    waiter.cancel()
+        for reader in readers:
+            reader.result()
+        returncode = await asyncio.wait_for(
+            process.wait(),
+            timeout=None if deadline == math.inf else max(0.0, deadline - loop.time()),
+        )
+        if run_id in _cancelled_runs:
+            raise _RunStopped("cancelled", "Ejecución cancelada por el usuario.")
+        exceeded = _limit_exceeded(returncode, process, stderr, limits)
+        if exceeded:
+            raise exceeded
+        yield _output_event(
+            run_id,
+            stdout,
+            stderr,
+            done=True,
+            ok=returncode == 0,
+            status="ok" if returncode == 0 else "failed",
+            process=process,
+            duration=time.monotonic() - started,
+        )
+    except _RunStopped as e:
+        logging.warning(f"Script {relpath} stopped early: {e.status}")
+        yield _output_event(
+            run_id,
+            stdout,
+            stderr,
+            str(e),
+            done=True,
+            status=e.status,
+            process=process,
+            duration=time.monotonic() - started,
+        )
+    except asyncio.TimeoutError:
+        logging.warning(f"Script {relpath} timed out after {timeout} s")
+        await terminate_process_group(process)
+        yield _output_event(
+            run_id,
+            stdout,
+            stderr,
+            f"Error: El script superó el tiempo límite de {timeout} segundos.",
+            done=True,
+            status="timeout",
+            process=process,
+            duration=time.monotonic() - started,
+        )
+    except Exception as e:
+        logging.exception(f"Unexpected error running script: {e}")
+        yield _output_event(
+            run_id,
+            stdout,
+            stderr,
+            f"Error de ejecución inesperado: {str(e)}",
+            done=True,
+            status="error",
+            process=process,
+            duration=time.monotonic() - started,
+        )
+    finally:
+        _active_processes.pop(run_id, None)
+        _cancelled_runs.discard(run_id)
+        if process.returncode is None:
+            # Cancelación del consumidor o error: no dejar el árbol de procesos vivo.
+            _signal_group(process.pid, signal.SIGTERM)
+            _terminate_in_background(process)
+        for reader in readers:
+            reader.cancel()
+        stdout.close()
+        stderr.close()
+
+
+def main(argv: list[str]) -> int:
+    """
+    `python -m app.utils compile-catalog [TOOLS_ROOT]` precompila el
+    'tools.json' que aplica a TOOLS_ROOT (por defecto TOOLS_ROOT_ABS).
+    """
+    if not argv or argv[0] != "compile-catalog" or len(argv) > 2:
+        print(main.__doc__.strip(), file=sys.stderr)
+        return 2
+    root_path = argv[1] if len(argv) > 1 else os.getenv(
+        "TOOLS_ROOT_ABS", os.path.join(os.getcwd(), "support_scripts")
+    )
+    catalog_path = _find_catalog_path(root_path)
+    if catalog_path is None:
+        print(f"No tools.json found for {root_path}", file=sys.stderr)
+        return 1
+    target = compile_tools_catalog(catalog_path)
+    print(f"{catalog_path} -> {target} ({len(load_tools_catalog(root_path))} tools)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,125 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app import utils
+
+SLOW_SCRIPT = 'import time\nprint("started", flush=True)\ntime.sleep(30)\n'
+
+
+async def _run_and_cancel(root: str) -> dict:
+    run_id = uuid.uuid4().hex
+    event = {}
+    async for event in utils.stream_script(
+        root, "slow.py", timeout=20, batch_interval=0.05, run_id=run_id
+    ):
+        if "started" in event["stdout"] and not event["done"]:
+            assert utils.cancel_run(run_id)
+    return event
+
+
+@pytest.mark.parametrize("mode", ["subprocess", "prewarm"])
+def test_cancel_run_stops_the_script(tmp_path, monkeypatch, mode):
+    monkeypatch.setattr(utils, "SCRIPT_EXEC_MODE", mode)
+    monkeypatch.setattr(utils, "RUN_LOGS_DIR", "")
+    (tmp_path / "slow.py").write_text(SLOW_SCRIPT)
+    for _ in range(3):
+        event = asyncio.run(_run_and_cancel(str(tmp_path)))
+        assert event["done"]
+        assert event["status"] == "cancelled", event["stderr"]
+        assert event["duration_seconds"] < 15
+
+
+async def _run(
+    root: str, relpath: str, limits: dict | None = None, timeout: int = 20
+) -> dict:
+    event = {}
+    async for event in utils.stream_script(
+        root, relpath, timeout=timeout, limits=limits
+    ):
+        pass
+    return event
+
+
+def test_peak_rss_is_the_scripts_own(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "RUN_LOGS_DIR", "")
+    (tmp_path / "hello.py").write_text('print("hello")\n')
+    (tmp_path / "grow.py").write_text(
+        "import time\n"
+        "data = bytearray(b'x') * (150 * 1024 * 1024)\n"
+        "time.sleep(0.3)\n"
+    )
+    # Memoria del worker web que el hijo hereda en el fork y no debe contarse.
+    ballast = bytearray(b"x") * (200 * 1024 * 1024)
+    hello = asyncio.run(_run(str(tmp_path), "hello.py"))
+    grow = asyncio.run(_run(str(tmp_path), "grow.py"))
+    del ballast
+    assert hello["status"] == "ok"
+    assert 0 < hello["rusage"]["max_rss_kb"] < 100 * 1024
+    assert 150 * 1024 < grow["rusage"]["max_rss_kb"] < 250 * 1024
+
+
+def test_limits_are_set_before_the_script_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "RUN_LOGS_DIR", "")
+    (tmp_path / "limits.py").write_text(
+        "import os, resource, sys\n"
+        "print(resource.getrlimit(resource.RLIMIT_DATA)[0] // 2**20,"
+        " resource.getrlimit(resource.RLIMIT_CPU)[0], os.nice(0), sys.argv[0])\n"
+    )
+    limits = {"max_rss_mb": 256, "cpu_seconds": 10, "nice": 5}
+    event = asyncio.run(_run(str(tmp_path), "limits.py", limits))
+    assert event["status"] == "ok"
+    assert event["stdout"].split() == ["256", "10", "5", str(tmp_path / "limits.py")]
+
+
+def test_memory_limit_only_when_out_of_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "RUN_LOGS_DIR", "")
+    (tmp_path / "exit1.py").write_text("import sys\nsys.exit(1)\n")
+    (tmp_path / "hog.py").write_text("data = bytearray(1024 ** 3)\n")
+    limits = {"max_rss_mb": 256}
+    exit1 = asyncio.run(_run(str(tmp_path), "exit1.py", limits))
+    hog = asyncio.run(_run(str(tmp_path), "hog.py", limits))
+    assert exit1["status"] == "failed"
+    assert hog["status"] == "memory_limit"
+
+
+def test_zero_timeout_means_no_time_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "RUN_LOGS_DIR", "")
+    (tmp_path / "nap.py").write_text("import time\ntime.sleep(0.3)\nprint('ok')\n")
+    event = asyncio.run(_run(str(tmp_path), "nap.py", timeout=0))
+    assert event["status"] == "ok"
+    assert event["stdout"].strip() == "ok"
+
+
+def test_output_capture_keeps_head_and_tail():
+    capture = utils.OutputCapture(head_chars=10, tail_chars=10)
+    for i in range(10_000):
+        capture.write(f"{i:05d}\n".encode())
+    assert capture.truncated
+    assert capture.total_chars == capture.total_bytes == 60_000
+    assert capture._head_len == capture._tail_len == 10
+    assert capture.text() == (
+        "00000\n0000\n… [59980 caracteres omitidos] …\n998\n09999\n"
+    )
+
+
+def test_output_capture_splits_multibyte_characters(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "RUN_LOGS_DIR", str(tmp_path))
+    monkeypatch.setattr(utils, "LOG_PAGE_BYTES", 1000)
+    run_id = uuid.uuid4().hex
+    data = "ñandú " * 1000
+    capture = utils.OutputCapture(
+        head_chars=6, tail_chars=6, log_path=utils._run_log_path(run_id, "stdout")
+    )
+    encoded = data.encode()
+    for i in range(0, len(encoded), 7):
+        capture.write(encoded[i : i + 7])
+    capture.write(b"", final=True)
+    capture.close()
+    assert capture.total_chars == len(data)
+    assert capture.text().startswith("ñandú \n… [5988 caracteres omitidos]")
+    assert capture.text().endswith("\nñandú ")
+    pages = [utils.read_run_log(run_id, "stdout", page) for page in range(9)]
+    assert pages[-1] == ""
+    assert "".join(pages) == data
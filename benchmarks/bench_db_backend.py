@@ -0,0 +1,157 @@
+"""
+Ráfaga de escrituras desde varios procesos (como varios workers de Reflex
+detrás de un balanceador) contra el engine de `app.database`.
+
+Cada proceso hace `--writes` commits cortos (un UserPermission por commit) y se
+cuentan los commits por segundo y los errores "database is locked". Por defecto
+compara un archivo SQLite temporal; con `--url` se agrega otra base, por
+ejemplo un MySQL/Postgres local como sustituto del servidor de producción.
+La base tiene que estar vacía (sin filas en `users`): el benchmark crea sus
+propios usuarios y permisos y los borra al terminar.
+
+    python -m benchmarks.bench_db_backend --workers 8 --writes 200
+    python -m benchmarks.bench_db_backend --url mysql+pymysql://u:p@localhost/bench
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue
+import tempfile
+import time
+
+
+def _worker(url: str, worker_id: int, writes: int, results) -> None:
+    os.environ["DATABASE_URL"] = url
+    from sqlalchemy.exc import OperationalError
+
+    from app.database import get_session
+    from app.models import UserPermission
+
+    ok = locked = 0
+    for i in range(writes):
+        try:
+            with get_session() as db:
+                db.add(UserPermission(user_id=worker_id + 1, permission_id=i + 1))
+                db.commit()
+            ok += 1
+        except OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            locked += 1
+    results.put((ok, locked))
+
+
+def _prepare(url: str, workers: int, writes: int) -> None:
+    """Crea los usuarios y permisos del benchmark; se niega si `users` tiene filas."""
+    os.environ["DATABASE_URL"] = url
+    from sqlalchemy import select
+
+    from app.database import create_db_engine
+    from app.models import Base, Permission, User
+
+    engine = create_db_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        if conn.execute(select(User.id).limit(1)).first() is not None:
+            engine.dispose()
+            raise SystemExit(
+                f"{url}: the users table is not empty; "
+                "run the benchmark against a dedicated database."
+            )
+        conn.execute(
+            User.__table__.insert(),
+            [
+                {"id": i + 1, "username": f"bench{i}", "password_hash": "x"}
+                for i in range(workers)
+            ],
+        )
+        conn.execute(
+            Permission.__table__.insert(),
+            [{"id": i + 1, "script_relpath": f"bench/{i}.py"} for i in range(writes)],
+        )
+    engine.dispose()
+
+
+def _cleanup(url: str, workers: int) -> None:
+    """Borra sólo las filas que creó `_prepare` y las que escribieron los workers."""
+    from sqlalchemy import delete
+
+    from app.database import create_db_engine
+    from app.models import Permission, User, UserPermission
+
+    engine = create_db_engine(url)
+    bench_users = [i + 1 for i in range(workers)]
+    with engine.begin() as conn:
+        conn.execute(
+            delete(UserPermission).where(UserPermission.user_id.in_(bench_users))
+        )
+        conn.execute(
+            delete(Permission).where(Permission.script_relpath.like("bench/%"))
+        )
+        conn.execute(delete(User).where(User.id.in_(bench_users)))
+    engine.dispose()
+
+
+def _collect(procs, results) -> list[tuple[int, int]]:
+    """
+    Resultados de los workers. Si alguno termina con error (p. ej. una
+    excepción que no es "database is locked") se cortan los demás en lugar de
+    esperar para siempre un resultado que no va a llegar.
+    """
+    totals = []
+    while len(totals) < len(procs):
+        try:
+            totals.append(results.get(timeout=1))
+        except queue.Empty:
+            failed = [proc for proc in procs if proc.exitcode not in (None, 0)]
+            if failed:
+                for proc in procs:
+                    proc.terminate()
+                raise SystemExit(
+                    f"{len(failed)} worker(s) failed "
+                    f"(exit code {failed[0].exitcode}); see the traceback above."
+                )
+    return totals
+
+
+def bench(url: str, workers: int, writes: int) -> None:
+    _prepare(url, workers, writes)
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(url, i, writes, results))
+        for i in range(workers)
+    ]
+    start = time.perf_counter()
+    try:
+        for proc in procs:
+            proc.start()
+        totals = _collect(procs, results)
+        for proc in procs:
+            proc.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        _cleanup(url, workers)
+    ok = sum(t[0] for t in totals)
+    locked = sum(t[1] for t in totals)
+    backend = url.split(":", 1)[0]
+    print(
+        f"{backend:16} workers={workers} commits={ok} locked={locked} "
+        f"elapsed={elapsed:.2f}s commits/s={ok / elapsed:.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--url", action="append", default=[])
+    args = parser.parse_args()
+    sqlite_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    for url in [sqlite_url, *args.url]:
+        bench(url, args.workers, args.writes)
+
+
+if __name__ == "__main__":
+    main()
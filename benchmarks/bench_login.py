@@ -0,0 +1,76 @@
+"""
+Latencia de login bajo carga concurrente: verificación bcrypt en el event loop
+(como antes) contra el pool de hashing de `app.database`.
+
+Simula N sesiones que hacen login a la vez mientras otra sesión hace eventos
+livianos; mide la latencia de cada login desde el inicio de la ráfaga y el
+retraso que sufre el event loop (lo que esperan las demás sesiones).
+
+    python -m benchmarks.bench_login --logins 32
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+from app import database  # noqa: E402
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _run(mode: str, logins: int, hashed: str) -> dict[str, float]:
+    latencies: list[float] = []
+    lags: list[float] = []
+    stop = asyncio.Event()
+
+    async def heartbeat():
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - start - 0.005)
+
+    async def login(start: float):
+        if mode == "sync":
+            database.verify_password("secret", hashed)
+        else:
+            await database.verify_password_async("secret", hashed)
+        latencies.append(time.perf_counter() - start)
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0.02)
+    burst_start = time.perf_counter()
+    await asyncio.gather(*(login(burst_start) for _ in range(logins)))
+    stop.set()
+    await beat
+    return {
+        "login_p50_ms": statistics.median(latencies) * 1000,
+        "login_p99_ms": _percentile(latencies, 99) * 1000,
+        "loop_lag_p99_ms": _percentile(lags, 99) * 1000,
+        "loop_lag_max_ms": max(lags) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=32)
+    args = parser.parse_args()
+    hashed = database.hash_password("secret")
+    for mode in ("sync", "pool"):
+        result = asyncio.run(_run(mode, args.logins, hashed))
+        print(
+            f"{mode:5} logins={args.logins} "
+            + " ".join(f"{k}={v:.1f}" for k, v in result.items())
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Búsquedas de permisos sobre una tabla user_permissions grande, sin y con el
+índice único compuesto (user_id, permission_id).
+
+Mide las dos consultas calientes: los relpaths permitidos de un usuario
+(AppState.on_load) y la comprobación de un permiso puntual (grant/revoke), y
+muestra el plan de SQLite para cada una.
+
+    python -m benchmarks.bench_user_permissions --users 2000 --scripts 500
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.sqlite import dialect as sqlite_dialect
+from sqlalchemy.schema import CreateIndex
+
+from app.models import Base, UserPermission
+
+USER_RELPATHS = """
+    SELECT permissions.script_relpath FROM permissions
+    JOIN user_permissions ON user_permissions.permission_id = permissions.id
+    WHERE user_permissions.user_id = ?
+"""
+HAS_PERMISSION = """
+    SELECT 1 FROM user_permissions WHERE user_id = ? AND permission_id = ?
+"""
+
+
+def _build(path: str, users: int, scripts: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    conn = sqlite3.connect(path)
+    conn.execute("DROP INDEX ux_user_permissions_user_permission")
+    conn.executemany(
+        "INSERT INTO users (id, username, password_hash, is_admin, created_at) "
+        "VALUES (?, ?, 'x', 0, '2024-01-01')",
+        ((i, f"user{i}") for i in range(1, users + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO permissions (id, script_relpath) VALUES (?, ?)",
+        ((i, f"group{i % 20}/script{i}.py") for i in range(1, scripts + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO user_permissions (user_id, permission_id, granted_at) "
+        "VALUES (?, ?, '2024-01-01')",
+        ((u, p) for u in range(1, users + 1) for p in range(1, scripts + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _time(conn: sqlite3.Connection, sql: str, args_list: list[tuple]) -> float:
+    start = time.perf_counter()
+    for args in args_list:
+        conn.execute(sql, args).fetchall()
+    return (time.perf_counter() - start) / len(args_list) * 1000
+
+
+def _plan(conn: sqlite3.Connection, sql: str, args: tuple) -> str:
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, args).fetchall()
+    return "; ".join(row[-1] for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--scripts", type=int, default=500)
+    parser.add_argument("--lookups", type=int, default=50)
+    args = parser.parse_args()
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    print(f"building {args.users * args.scripts:,} user_permissions rows…")
+    _build(path, args.users, args.scripts)
+    conn = sqlite3.connect(path)
+    rng = random.Random(0)
+    users = [(rng.randint(1, args.users),) for _ in range(args.lookups)]
+    pairs = [
+        (rng.randint(1, args.users), rng.randint(1, args.scripts))
+        for _ in range(args.lookups)
+    ]
+    index = next(
+        ix
+        for ix in UserPermission.__table__.indexes
+        if ix.name == "ux_user_permissions_user_permission"
+    )
+    create_index = str(CreateIndex(index).compile(dialect=sqlite_dialect()))
+    for label in ("sin índice", "con índice"):
+        if label == "con índice":
+            conn.execute(create_index)
+            conn.execute("ANALYZE")
+        print(f"[{label}]")
+        print(
+            f"  relpaths de un usuario: {_time(conn, USER_RELPATHS, users):8.2f} ms"
+            f"  plan: {_plan(conn, USER_RELPATHS, users[0])}"
+        )
+        print(
+            f"  permiso puntual:        {_time(conn, HAS_PERMISSION, pairs):8.3f} ms"
+            f"  plan: {_plan(conn, HAS_PERMISSION, pairs[0])}"
+        )
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()